@@ -1,6 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Clinic, Dentist, Patient, Appointment, ClinicUser, ClinicSubscription
+from .models import (
+    Clinic, Dentist, Patient, Appointment, ClinicUser, ClinicSubscription, OutboundMessage,
+    DentistStatRollup, WorkingHours, ScheduleBreak, DentistLeave, Holiday, WaitlistEntry,
+)
+from .search import filter_patients
 
 
 @admin.register(ClinicUser)
@@ -24,11 +28,34 @@ class ClinicAdmin(admin.ModelAdmin):
     search_fields = ['name', 'address']
 
 
+class WorkingHoursInline(admin.TabularInline):
+    model = WorkingHours
+    extra = 0
+
+
+class ScheduleBreakInline(admin.TabularInline):
+    model = ScheduleBreak
+    extra = 0
+
+
+class DentistLeaveInline(admin.TabularInline):
+    model = DentistLeave
+    extra = 0
+
+
 @admin.register(Dentist)
 class DentistAdmin(admin.ModelAdmin):
     list_display = ['id', 'name', 'clinic', 'specialty', 'phone', 'is_active']
     list_filter = ['clinic', 'specialty', 'is_active']
     search_fields = ['name', 'specialty']
+    inlines = [WorkingHoursInline, ScheduleBreakInline, DentistLeaveInline]
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ['clinic', 'date', 'name']
+    list_filter = ['clinic']
+    date_hierarchy = 'date'
 
 
 @admin.register(Patient)
@@ -37,6 +64,12 @@ class PatientAdmin(admin.ModelAdmin):
     list_filter = ['clinic']
     search_fields = ['name', 'phone']
 
+    def get_search_results(self, request, queryset, search_term):
+        # icontains yerine indeksli, aksan duyarsız arama (bkz. search.py)
+        if not search_term:
+            return queryset, False
+        return filter_patients(queryset, search_term), False
+
 
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
@@ -44,3 +77,26 @@ class AppointmentAdmin(admin.ModelAdmin):
     list_filter = ['status', 'dentist', 'start_time']
     search_fields = ['patient__name', 'dentist__name']
     date_hierarchy = 'start_time'
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'patient', 'dentist', 'window_start', 'window_end', 'duration_minutes', 'status']
+    list_filter = ['status', 'clinic']
+    raw_id_fields = ['patient', 'appointment']
+
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'phone', 'provider', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'kind', 'provider']
+    search_fields = ['phone']
+    raw_id_fields = ['patient', 'appointment']
+
+
+@admin.register(DentistStatRollup)
+class DentistStatRollupAdmin(admin.ModelAdmin):
+    list_display = ['dentist', 'period', 'period_start', 'treatment_type', 'status',
+                    'appointment_count', 'revenue', 'booked_minutes']
+    list_filter = ['period', 'status', 'clinic']
+    date_hierarchy = 'period_start'
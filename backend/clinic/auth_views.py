@@ -91,10 +91,8 @@ def logout_view(request):
     """
     Logout endpoint - deletes the auth token.
     """
-    try:
-        request.user.auth_token.delete()
-    except:
-        pass
+    # Token silinince kimlik doğrulama önbelleği de temizlenir (signals.py)
+    Token.objects.filter(user=request.user).delete()
     
     return Response({'message': 'Çıkış yapıldı.'})
 
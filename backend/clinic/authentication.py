@@ -0,0 +1,117 @@
+"""
+Önbellekli token kimlik doğrulama.
+
+TokenAuthentication her istekte authtoken_token + kullanıcı sorgusu yapar;
+ardından view'lar user.clinic için ayrı bir sorgu daha çalıştırır.
+CachedTokenAuthentication token → (kullanıcı + klinik) eşlemesini iki
+katmanda tutar:
+
+    1. Süreç içi, boyutu sınırlı ve TTL'li bir LRU (her zaman açık)
+    2. Paylaşımlı Django cache (opsiyonel, AUTH_TOKEN_CACHE['SHARED'])
+
+Token silindiğinde (logout) ve kullanıcı veya klinik değiştiğinde ilgili
+kayıtlar signals.py üzerinden silinir. Süreç içi katman sadece kendi
+sürecinde silinebildiği için diğer worker'larda bir kayıt en fazla
+AUTH_TOKEN_CACHE['TTL'] saniye daha geçerli kalabilir.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+SHARED_KEY_PREFIX = 'auth_token:'
+
+
+class TTLCache:
+    """Thread-safe, boyutu sınırlı ve girdileri süreli LRU önbellek."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _config(name):
+    return settings.AUTH_TOKEN_CACHE[name]
+
+
+local_cache = TTLCache(_config('MAX_SIZE'), _config('TTL'))
+
+
+def invalidate_tokens(keys):
+    """Verilen token anahtarlarını her iki katmandan siler."""
+    keys = list(keys)
+    for key in keys:
+        local_cache.delete(key)
+    if keys and _config('SHARED'):
+        cache.delete_many([SHARED_KEY_PREFIX + key for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication'ın önbellekli hali.
+    Sıcak isteklerde kimlik doğrulama için hiç SQL çalıştırılmaz.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = local_cache.get(key)
+
+        if entry is None and _config('SHARED'):
+            entry = cache.get(SHARED_KEY_PREFIX + key)
+            if entry is not None:
+                local_cache.set(key, entry)
+
+        if entry is None:
+            try:
+                token = Token.objects.select_related('user', 'user__clinic').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            entry = (token.user, token)
+            local_cache.set(key, entry)
+            if _config('SHARED'):
+                cache.set(SHARED_KEY_PREFIX + key, entry, _config('SHARED_TTL'))
+
+        user, token = entry
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        # Önbellekteki nesneyi istekler arasında paylaşmamak için kopyalanır
+        return copy.copy(user), token
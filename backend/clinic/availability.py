@@ -0,0 +1,495 @@
+"""
+Müsaitlik motoru - hekim bazlı slot hesaplama.
+
+Her hekimin günlük slotları derlenmiş takviminden (DentistSchedule) hazır
+bir şablon olarak alınır; slotlar gün başından itibaren dakika olarak
+tutulduğu için istek sırasında slot için datetime oluşturulmaz. Randevular
+bir kez yerel dakikaya çevrilip başlangıç saatine göre sıralanır ve her
+slot için çakışan randevu ikili arama (bisect) ile bulunur. Böylece maliyet
+O(slot × randevu) yerine O((slot + randevu) log randevu) olur.
+
+Takvim kayıtlarının derlenmesi ve önbelleğe alınması schedules.py'dedir.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from heapq import merge
+from itertools import accumulate, islice
+
+from django.utils import timezone
+
+
+# Çalışma saatleri: 09:00 - 17:00
+WORK_START_HOUR = 9
+WORK_END_HOUR = 17
+SLOT_DURATION_MINUTES = 30
+
+# Slotu dolu sayan randevu durumları
+ACTIVE_STATUSES = ('scheduled', 'confirmed')
+
+# Tarih aralığı modunda tek istekte sorgulanabilecek en fazla gün
+MAX_RANGE_DAYS = 31
+
+# En erken boş slot aramasında varsayılan gün ufku ve sonuç sayısı
+NEXT_AVAILABLE_DAYS = 14
+# Randevular önce bu kadar günlük ilk pencere için okunur; yeterli slot
+# bulunamazsa ufkun geri kalanı ikinci bir aralık sorgusuyla alınır
+NEXT_AVAILABLE_FIRST_WINDOW_DAYS = 7
+NEXT_AVAILABLE_LIMIT = 5
+MAX_NEXT_AVAILABLE_LIMIT = 50
+
+
+def day_range_bounds(start_date, end_date):
+    """
+    [start_date, end_date] günlerini kapsayan yarı açık, saat dilimi bilgili
+    [başlangıç, bitiş) datetime aralığını döndürür.
+    """
+    return (
+        timezone.make_aware(datetime.combine(start_date, time.min)),
+        timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min)),
+    )
+
+
+# ============================================================================
+# SLOT ŞABLONLARI
+# ============================================================================
+
+# start, end: gün başından itibaren dakika (yerel saat); offset'ler aynı
+# değerlerin timedelta karşılığı (günün datetime'larını hesaplamak için)
+Slot = namedtuple('Slot', 'start end start_label end_label start_offset end_offset')
+
+
+def _label(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def _subtract(segments, break_start, break_end):
+    """Aralık listesinden [break_start, break_end) molasını çıkarır."""
+    result = []
+    for start, end in segments:
+        if break_end <= start or break_start >= end:
+            result.append((start, end))
+            continue
+        if start < break_start:
+            result.append((start, break_start))
+        if break_end < end:
+            result.append((break_end, end))
+    return result
+
+
+@lru_cache(maxsize=4096)
+def compile_template(hours, breaks=()):
+    """
+    Bir günün çalışma aralıklarını slot şablonuna çevirir. Aynı girdiler
+    için aynı (değişmez) tuple döner; hekimler şablonları paylaşır.
+
+    Args:
+        hours: (başlangıç dk, bitiş dk, slot dk) tuple'ları
+        breaks: (başlangıç dk, bitiş dk) mola tuple'ları
+
+    Returns:
+        tuple: Başlangıca göre sıralı Slot'lar. Molayla kesişen veya çalışma
+        aralığına sığmayan slotlar şablona girmez.
+    """
+    slots = set()
+    for start, end, step in hours:
+        segments = [(start, end)]
+        for break_start, break_end in breaks:
+            segments = _subtract(segments, break_start, break_end)
+        for seg_start, seg_end in segments:
+            current = seg_start
+            while current + step <= seg_end:
+                slots.add(Slot(
+                    current, current + step, _label(current), _label(current + step),
+                    timedelta(minutes=current), timedelta(minutes=current + step),
+                ))
+                current += step
+    return tuple(sorted(slots))
+
+
+def template_hours(template):
+    """
+    Şablonun çalışma saatleri ve slot süreleri.
+
+    Returns:
+        tuple: ({'start', 'end'} veya çalışılmayan günde None,
+        sıralı slot süreleri listesi (dakika))
+    """
+    if not template:
+        return None, []
+    hours = {'start': template[0].start_label, 'end': _label(max(slot.end for slot in template))}
+    return hours, sorted({slot.end - slot.start for slot in template})
+
+
+DEFAULT_HOURS = ((WORK_START_HOUR * 60, WORK_END_HOUR * 60, SLOT_DURATION_MINUTES),)
+DEFAULT_TEMPLATE = compile_template(DEFAULT_HOURS)
+
+
+class DentistSchedule:
+    """Bir hekimin derlenmiş haftalık takvimi: gün başına slot şablonu ve kapalı günler."""
+    __slots__ = ('templates', 'closed_days')
+
+    def __init__(self, templates, closed_days=frozenset()):
+        self.templates = tuple(templates)
+        self.closed_days = frozenset(closed_days)
+
+    def slots_for(self, day):
+        """Günün slot şablonu (tatil veya izin gününde boş)."""
+        if day in self.closed_days:
+            return ()
+        return self.templates[day.weekday()]
+
+
+DEFAULT_SCHEDULE = DentistSchedule([DEFAULT_TEMPLATE] * 7)
+
+
+class ClinicSchedules:
+    """
+    Hekim -> DentistSchedule eşlemesi. Takvimi olmayan hekimler kliniğin
+    varsayılan takvimini (varsayılan saatler + klinik tatilleri) kullanır.
+    """
+    __slots__ = ('dentists', 'clinic_defaults')
+
+    def __init__(self, dentists=None, clinic_defaults=None):
+        self.dentists = dentists or {}
+        self.clinic_defaults = clinic_defaults or {}
+
+    def get(self, dentist_id, clinic_id=None):
+        schedule = self.dentists.get(dentist_id)
+        if schedule is None:
+            schedule = self.clinic_defaults.get(clinic_id, DEFAULT_SCHEDULE)
+        return schedule
+
+
+DEFAULT_SCHEDULES = ClinicSchedules()
+
+
+def day_bounds(day, tz, offsets):
+    """
+    `day` gününün gece yarısına göre verilen (başlangıç, bitiş) offset
+    çiftlerini UTC datetime'lara çevirir. Veritabanından gelen randevu
+    zamanları da UTC olduğundan karşılaştırmalarda saat dilimi dönüşümü
+    yapılmaz. Saat geçişi olan günlerde (yaz saati) her zaman duvar
+    saatine göre ayrı ayrı çevrilir.
+    """
+    midnight = datetime.combine(day, time.min, tzinfo=tz)
+    utc_midnight = midnight.astimezone(dt_timezone.utc)
+    if midnight.utcoffset() == (midnight + timedelta(days=1)).utcoffset():
+        return [(utc_midnight + start, utc_midnight + end) for start, end in offsets]
+    return [
+        ((midnight + start).astimezone(dt_timezone.utc), (midnight + end).astimezone(dt_timezone.utc))
+        for start, end in offsets
+    ]
+
+
+def slot_bounds(template, day, tz):
+    """Şablondaki slotların `day` günündeki (başlangıç, bitiş) datetime'ları (UTC)."""
+    return day_bounds(day, tz, [(slot.start_offset, slot.end_offset) for slot in template])
+
+
+def build_day_slots(target_date, start_hour=WORK_START_HOUR, end_hour=WORK_END_HOUR,
+                    slot_minutes=SLOT_DURATION_MINUTES):
+    """
+    Bir gün için sıralı slot listesi oluşturur (varsayılan saatlerle,
+    datetime olarak). Müsaitlik hesabı şablonları kullanır; bu fonksiyon
+    bench_availability'deki eski tarama ile karşılaştırma içindir.
+
+    Args:
+        target_date: Slotları oluşturulacak tarih
+        start_hour: Çalışma başlangıç saati
+        end_hour: Çalışma bitiş saati
+        slot_minutes: Slot süresi (dakika)
+
+    Returns:
+        list: (etiket_baslangic, etiket_bitis, baslangic, bitis) tuple listesi
+    """
+    slots = []
+    step = timedelta(minutes=slot_minutes)
+    current = datetime.combine(target_date, time(hour=start_hour))
+    day_end = datetime.combine(target_date, time(hour=end_hour))
+
+    while current < day_end:
+        slot_end = current + step
+        slots.append((
+            current.strftime('%H:%M'),
+            slot_end.strftime('%H:%M'),
+            timezone.make_aware(current),
+            timezone.make_aware(slot_end),
+        ))
+        current = slot_end
+
+    return slots
+
+
+class DentistTimeline:
+    """
+    Tek bir hekimin sıralanmış randevuları.
+
+    `max_ends[k]`, ilk k+1 randevunun en geç bitiş saatidir ve monoton artar.
+    Bir [start, end) slotu için bitişi `start`tan sonra olan ilk randevu
+    `bisect_right(max_ends, start)` ile bulunur; bu randevu `end`ten önce
+    başlıyorsa slot doludur.
+    """
+    __slots__ = ('bookings', 'starts', 'max_ends')
+
+    def __init__(self, bookings):
+        self.bookings = sorted(bookings, key=lambda apt: apt['start_time'])
+        self.starts = [apt['start_time'] for apt in self.bookings]
+        self.max_ends = list(accumulate((apt['end_time'] for apt in self.bookings), max))
+
+    def find_overlap(self, start, end):
+        """[start, end) aralığıyla çakışan en erken randevuyu döndürür (yoksa None)."""
+        k = bisect_right(self.max_ends, start)
+        if k < len(self.starts) and self.starts[k] < end:
+            return self.bookings[k]
+        return None
+
+
+def group_by_dentist(bookings):
+    """Randevuları hekim bazında DentistTimeline nesnelerine ayırır."""
+    grouped = {}
+    for apt in bookings:
+        grouped.setdefault(apt['dentist_id'], []).append(apt)
+    return {dentist_id: DentistTimeline(items) for dentist_id, items in grouped.items()}
+
+
+def _booking_info(apt):
+    return {
+        'appointment_id': apt['id'],
+        'dentist_id': apt['dentist_id'],
+        'dentist_name': apt['dentist__name'],
+        'patient_name': apt['patient__name'],
+        'treatment_type': apt['treatment_type'] or 'Belirtilmemiş',
+    }
+
+
+def compute_availability(day, bookings, dentists, schedules=DEFAULT_SCHEDULES):
+    """
+    Günün slotlarını hekim bazında müsait/dolu olarak işaretler.
+
+    Args:
+        day: Gün (yerel tarih)
+        bookings: Aktif randevu dict'leri (id, dentist_id, dentist__name,
+            patient__name, start_time, end_time, treatment_type)
+        dentists: (id, name) veya (id, name, clinic_id) tuple'ları;
+            randevusu olmayan hekimler de dahil
+        schedules: Derlenmiş takvimler (bkz. schedules.get_schedules)
+
+    Returns:
+        dict: 'dentists' (hekim bazlı slot haritası) ile birlikte o slotta
+        çalışan hekimlerden en az biri boşsa slotu müsait sayan klinik özeti
+    """
+    tz = timezone.get_current_timezone()
+    timelines = group_by_dentist(bookings)
+    dentist_results = []
+    # Aynı şablonu kullanan hekimler birlikte sayılır; slot datetime'ları
+    # şablon başına bir kez hesaplanır:
+    # id(şablon) -> [şablon, slot sınırları, çalışan hekim sayısı,
+    #                slot başına dolu hekim sayısı, slot başına ilk randevu,
+    #                (çalışma saatleri, slot süreleri)]
+    groups = {}
+
+    for dentist in dentists:
+        dentist_id, dentist_name = dentist[0], dentist[1]
+        template = schedules.get(dentist_id, dentist[2] if len(dentist) > 2 else None).slots_for(day)
+        group = groups.get(id(template))
+        if group is None:
+            group = groups[id(template)] = [
+                template, slot_bounds(template, day, tz), 0, [0] * len(template), [None] * len(template),
+                template_hours(template),
+            ]
+        group[2] += 1
+        bounds, busy_counts, first_booking, (hours, slot_minutes) = group[1], group[3], group[4], group[5]
+        timeline = timelines.get(dentist_id)
+        available_slots = []
+        booked_slots = []
+
+        for index, slot in enumerate(template):
+            overlap = timeline.find_overlap(*bounds[index]) if timeline else None
+            slot_data = {
+                'start_time': slot.start_label,
+                'end_time': slot.end_label,
+                'is_available': overlap is None,
+            }
+            if overlap is None:
+                available_slots.append(slot_data)
+            else:
+                slot_data['booking'] = _booking_info(overlap)
+                booked_slots.append(slot_data)
+                busy_counts[index] += 1
+                if first_booking[index] is None:
+                    first_booking[index] = slot_data['booking']
+
+        dentist_results.append({
+            'dentist_id': dentist_id,
+            'dentist_name': dentist_name,
+            'working_hours': hours and dict(hours),
+            'slot_minutes': list(slot_minutes),
+            'available_count': len(available_slots),
+            'booked_count': len(booked_slots),
+            'available_slots': available_slots,
+            'booked_slots': booked_slots,
+        })
+
+    # (başlangıç, bitiş) -> [slot, çalışan hekim sayısı, dolu hekim sayısı, ilk randevu]
+    summary = {}
+    for template, _, working, busy_counts, first_booking, _ in groups.values():
+        for slot, busy, booking in zip(template, busy_counts, first_booking):
+            entry = summary.get((slot.start, slot.end))
+            if entry is None:
+                summary[(slot.start, slot.end)] = [slot, working, busy, booking]
+            else:
+                entry[1] += working
+                entry[2] += busy
+                entry[3] = entry[3] or booking
+
+    # Klinik özeti: slotta çalışan en az bir hekim boşsa slot müsaittir
+    available_slots = []
+    booked_slots = []
+    for key in sorted(summary):
+        slot, working, busy, booking = summary[key]
+        slot_data = {
+            'start_time': slot.start_label,
+            'end_time': slot.end_label,
+            'is_available': busy < working,
+        }
+        if busy < working:
+            available_slots.append(slot_data)
+        else:
+            slot_data['booking'] = booking
+            booked_slots.append(slot_data)
+
+    return {
+        'total_slots': len(summary),
+        'available_count': len(available_slots),
+        'booked_count': len(booked_slots),
+        'available_slots': available_slots,
+        'booked_slots': booked_slots,
+        'dentists': dentist_results,
+    }
+
+
+def working_hours(day_result):
+    """Günün ilk slot başlangıcı ve son slot bitişi (çalışan hekim yoksa None)."""
+    slots = day_result['available_slots'] + day_result['booked_slots']
+    if not slots:
+        return None
+    return {'start': min(slot['start_time'] for slot in slots), 'end': max(slot['end_time'] for slot in slots)}
+
+
+def iter_range_availability(start_date, end_date, bookings, dentists, schedules=DEFAULT_SCHEDULES):
+    """
+    Tarih aralığındaki her gün için hekim bazlı slot haritası üretir.
+
+    Randevular tek bir aralık sorgusundan gelir ve yerel tarihe göre
+    bir kez gruplanır; günler sırayla (generator olarak) hesaplanır.
+
+    Args:
+        start_date: İlk gün
+        end_date: Son gün (dahil)
+        bookings: Aralıktaki aktif randevu dict'leri
+        dentists: (id, name[, clinic_id]) tuple'ları
+        schedules: Derlenmiş takvimler
+
+    Yields:
+        dict: 'date' ve 'working_hours' alanları eklenmiş compute_availability() çıktısı
+    """
+    tz = timezone.get_current_timezone()
+    by_day = {}
+    for apt in bookings:
+        by_day.setdefault(apt['start_time'].astimezone(tz).date(), []).append(apt)
+
+    current = start_date
+    while current <= end_date:
+        day = compute_availability(current, by_day.get(current, ()), dentists, schedules)
+        yield {'date': current.isoformat(), 'working_hours': working_hours(day), **day}
+        current += timedelta(days=1)
+
+
+# ============================================================================
+# EN ERKEN BOŞ SLOT
+# ============================================================================
+
+@lru_cache(maxsize=4096)
+def candidate_offsets(template, duration):
+    """
+    `duration` dakikalık bir tedavinin şablonda başlayabileceği slotlar.
+    Tedavi slot başlangıcından itibaren kesintisiz çalışma aralığına
+    sığmalıdır (molaya veya mesai bitişine taşmaz).
+
+    Returns:
+        tuple: (başlangıç offset, bitiş offset) timedelta çiftleri
+    """
+    # Ardışık slotlar kesintisiz çalışma aralıklarında birleştirilir
+    segments = []
+    for slot in template:
+        if segments and slot.start <= segments[-1][1]:
+            segments[-1][1] = max(segments[-1][1], slot.end)
+        else:
+            segments.append([slot.start, slot.end])
+
+    result = []
+    index = 0
+    length = timedelta(minutes=duration)
+    for slot in template:
+        while segments[index][1] <= slot.start:
+            index += 1
+        if slot.start + duration <= segments[index][1]:
+            result.append((slot.start_offset, slot.start_offset + length))
+    return tuple(result)
+
+
+def _dentist_free_slots(order, schedule, timeline, first_day, last_day, earliest, duration, tz, day_cache):
+    """Bir hekimin boş başlangıçlarını kronolojik sırada (tembel) üretir."""
+    day = first_day
+    one_day = timedelta(days=1)
+    while day <= last_day:
+        offsets = candidate_offsets(schedule.slots_for(day), duration)
+        if offsets:
+            # Aynı şablonu kullanan hekimler günün datetime'larını paylaşır
+            key = (id(offsets), day)
+            bounds = day_cache.get(key)
+            if bounds is None:
+                bounds = day_cache[key] = day_bounds(day, tz, offsets)
+            for start, end in bounds:
+                if start < earliest:
+                    continue
+                if timeline is None or timeline.find_overlap(start, end) is None:
+                    yield start, order, end
+        day += one_day
+
+
+def find_next_available(earliest, last_day, duration, bookings, dentists,
+                        schedules=DEFAULT_SCHEDULES, limit=NEXT_AVAILABLE_LIMIT):
+    """
+    Hekimler arasında en erken `limit` boş slotu bulur.
+
+    Her hekim için boş başlangıçlar gün gün, tembel olarak üretilir ve
+    akışlar öncelik kuyruğuyla (heapq.merge) birleştirilir; ilk `limit`
+    sonuç bulunduğunda arama durur. Aynı saatteki slotlar hekim sırasını
+    (dentists) izler.
+
+    Args:
+        earliest: Aranacak en erken zaman (tz bilgili)
+        last_day: Aranacak son gün (dahil)
+        duration: Tedavi süresi (dakika)
+        bookings: Aralıktaki aktif randevu dict'leri (dentist_id, start_time, end_time)
+        dentists: (id, name, clinic_id) tuple'ları
+        schedules: Derlenmiş takvimler
+
+    Returns:
+        list: (hekim, başlangıç, bitiş) tuple'ları, başlangıca göre sıralı
+    """
+    tz = timezone.get_current_timezone()
+    first_day = earliest.astimezone(tz).date()
+    timelines = group_by_dentist(bookings)
+    day_cache = {}
+    streams = [
+        _dentist_free_slots(
+            order, schedules.get(dentist[0], dentist[2]), timelines.get(dentist[0]),
+            first_day, last_day, earliest, duration, tz, day_cache,
+        )
+        for order, dentist in enumerate(dentists)
+    ]
+    return [(dentists[order], start, end) for start, order, end in islice(merge(*streams), limit)]
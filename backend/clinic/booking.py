@@ -0,0 +1,145 @@
+"""
+Randevu kayıt servisi - aynı hekime çift rezervasyonu engeller.
+
+Çakışma kontrolü ve kayıt, hekim bazlı bir kilit altında tek transaction
+içinde yapılır; farklı hekimlerin randevuları hekim kilidinde birbirini
+beklemez. Kaynak sürümleri (koşullu GET, önbellekler) commit'ten sonra
+ilerletildiği için kilit altında tutulmaz (bkz. conditional.py). Klinik
+genelindeki satırlardan yalnızca aylık kota sayacı ve senkron sırası
+kaydın sonunda güncellenir ve commit'e kadar kilitli kalır.
+
+Kilit stratejisi veritabanına göre seçilir:
+    - PostgreSQL: pg_advisory_xact_lock (transaction bitince otomatik bırakılır).
+      Ek güvence olarak migration ile tstzrange üzerinde exclusion constraint
+      eklenir (bkz. 0005_appointment_no_overlap).
+    - SQLite: hekim satırına boş bir UPDATE ile yazma kilidi alınır; SQLite
+      yazıcıları zaten sıraya koyar.
+    - Diğerleri: hekim satırı SELECT ... FOR UPDATE ile kilitlenir.
+
+Aynı süreçteki thread'ler ayrıca hekim bazlı bir threading.Lock ile sıraya
+girer; bu, veritabanı kilidine gitmeden önceki bekleşmeyi azaltır.
+"""
+import threading
+from contextlib import ExitStack, contextmanager
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .availability import ACTIVE_STATUSES
+from .models import Dentist, Appointment
+from .quotas import reserve_appointment
+
+
+# pg_advisory_xact_lock(int, int) için randevu kilitleri ad alanı
+ADVISORY_LOCK_NAMESPACE = 0x44454E54  # 'DENT'
+
+# Süreç içi kilitler: hekim ID'si kilit sayısına göre paylaştırılır
+_LOCK_STRIPES = 64
+_local_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+
+class BookingConflict(Exception):
+    """Randevu aynı hekimin başka bir aktif randevusuyla çakışıyor."""
+    default_message = "Bu zaman aralığında başka bir randevu mevcut."
+
+    def __init__(self, message=default_message):
+        super().__init__(message)
+
+
+def _acquire_db_lock(dentist_id):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [ADVISORY_LOCK_NAMESPACE, dentist_id])
+    elif connection.vendor == 'sqlite':
+        Dentist.objects.filter(pk=dentist_id).update(is_active=F('is_active'))
+    else:
+        list(Dentist.objects.select_for_update().filter(pk=dentist_id).values_list('pk'))
+
+
+@contextmanager
+def dentist_locks(dentist_ids):
+    """
+    Birden fazla hekim için kilit alır ve bir transaction açar.
+
+    Kilitler her zaman aynı (artan) sırada alınır; böylece aynı hekimleri
+    kilitleyen iki işlem birbirini kilitlenmeye (deadlock) sokmaz. Aynı
+    süreç içi kilide düşen hekimler için kilit bir kez alınır.
+
+    Args:
+        dentist_ids: Kilitlenecek hekimlerin ID'leri
+    """
+    dentist_ids = sorted(set(dentist_ids))
+    stripes = sorted({dentist_id % _LOCK_STRIPES for dentist_id in dentist_ids})
+    with ExitStack() as stack:
+        for stripe in stripes:
+            stack.enter_context(_local_locks[stripe])
+        with transaction.atomic():
+            for dentist_id in dentist_ids:
+                _acquire_db_lock(dentist_id)
+            yield
+
+
+def dentist_lock(dentist_id):
+    """
+    Hekim bazlı kilit alır ve bir transaction açar.
+
+    Args:
+        dentist_id: Kilitlenecek hekimin ID'si
+    """
+    return dentist_locks([dentist_id])
+
+
+def has_conflict(dentist_id, start_time, end_time, exclude_pk=None):
+    """Hekimin [start_time, end_time) aralığında aktif randevusu var mı?"""
+    overlapping = Appointment.objects.filter(
+        dentist_id=dentist_id,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=end_time,
+        end_time__gt=start_time
+    )
+    if exclude_pk:
+        overlapping = overlapping.exclude(pk=exclude_pk)
+    return overlapping.exists()
+
+
+def save_appointment(appointment):
+    """
+    Randevuyu çakışma olmadığı garanti edilerek kaydeder.
+
+    Aktif olmayan (iptal, tamamlandı vb.) randevular kilit almadan kaydedilir.
+    Yeni randevular kaydedilmeden önce kliniğin aylık kotasından düşülür
+    (bkz. quotas.py); kayıt başarısız olursa ayırma da geri alınır.
+
+    Args:
+        appointment: Kaydedilecek (yeni veya mevcut) Appointment nesnesi
+
+    Returns:
+        Appointment: Kaydedilen randevu
+
+    Raises:
+        BookingConflict: Randevu başka bir aktif randevuyla çakışıyorsa
+        QuotaExceeded: Yeni randevu kliniğin aylık kotasını aşıyorsa
+    """
+    adding = appointment._state.adding
+    if appointment.status not in ACTIVE_STATUSES:
+        with transaction.atomic():
+            if adding:
+                reserve_appointment(appointment)
+            appointment.save()
+        return appointment
+
+    try:
+        with dentist_lock(appointment.dentist_id):
+            if has_conflict(appointment.dentist_id, appointment.start_time,
+                            appointment.end_time, exclude_pk=appointment.pk):
+                raise BookingConflict()
+            if adding:
+                reserve_appointment(appointment)
+            appointment.save()
+    except IntegrityError as exc:
+        # PostgreSQL exclusion constraint'i (appt_no_overlap) ihlal edildi
+        if 'appt_no_overlap' in str(exc):
+            raise BookingConflict() from exc
+        raise
+
+    return appointment
@@ -0,0 +1,183 @@
+"""
+Koşullu GET (ETag / Last-Modified) desteği.
+
+Her klinik ve kaynak türü (randevu, hekim, hasta, klinik, takvim) için
+veritabanında bir sürüm satırı tutulur (ResourceVersion). Kayıtlar
+kaydedildiğinde veya silindiğinde sürüm signals.py üzerinden, toplu
+yazmalarda ise aktarım sonunda ilerletilir. Sürümler veritabanında olduğu
+için tüm worker'lar aynı değeri görür.
+
+Sürüm, değişikliği yapan transaction commit edildikten sonra kendi kısa
+transaction'ında ilerletilir (transaction.on_commit). Böylece sürüm satırı
+yazma transaction'ı boyunca kilitli kalmaz ve aynı kliniğin farklı
+hekimlere yapılan rezervasyonları birbirini beklemez. Yeni sürüm ancak
+veri commit edildikten sonra görünür; eski veri yeni sürümle birlikte
+önbelleğe alınamaz. Geri alınan değişiklik sürümü hiç ilerletmez.
+
+Yanıtın doğrulayıcıları (validator) bu sürümlerden türetilir; hesaplamak
+için tek bir küçük sorgu çalışır. İstemcinin elindeki ETag hâlâ geçerliyse
+görünüm hiç çalışmadan 304 döner (görünümün sorguları ve serileştirme
+yapılmaz).
+"""
+import hashlib
+from datetime import datetime, time as dt_time
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import Clinic, ResourceVersion
+from .tenancy import get_request_clinic_id
+
+
+RESOURCES = ('appointment', 'dentist', 'patient', 'clinic')
+
+
+def _ensure_rows(clinic_id, resources, now):
+    ResourceVersion.objects.bulk_create(
+        [ResourceVersion(clinic_id=clinic_id, resource=resource, changed_at=now) for resource in resources],
+        ignore_conflicts=True,
+    )
+
+
+def _advance_versions(clinic_id, resources):
+    now = timezone.now()
+    with transaction.atomic():
+        rows = ResourceVersion.objects.filter(clinic_id=clinic_id, resource__in=resources)
+        updated = rows.update(version=F('version') + 1, changed_at=now)
+        # İlk değişiklik: eksik satırlar 0 ile oluşturulup ilerletilir (klinik
+        # aynı transaction'da silinmişse satır oluşturulmaz)
+        if updated < len(set(resources)) and Clinic.objects.filter(pk=clinic_id).exists():
+            _ensure_rows(clinic_id, resources, now)
+            rows.filter(version=0).update(version=F('version') + 1, changed_at=now)
+
+
+def bump_versions(clinic_id, *resources):
+    """
+    Kliniğin kaynak sürümlerini ilerletir. Transaction içinde çağrılırsa
+    sürüm commit'ten sonra ilerletilir (transaction yoksa hemen); değişiklik
+    geri alınırsa sürüm değişmez.
+    """
+    transaction.on_commit(lambda: _advance_versions(clinic_id, resources))
+
+
+def get_versions(clinic_id, resources):
+    """
+    Kaynak sürümlerini tek sorguyla okur.
+
+    Kliniği olmayan istekler (tüm klinikler) için her kaynağın klinik
+    sürümlerinin toplamı kullanılır. Henüz değişmemiş
+    kaynağın sürümü 0'dır.
+
+    Returns:
+        list: Her kaynak için (sürüm, son değişiklik zaman damgası)
+    """
+    rows = ResourceVersion.objects.filter(resource__in=resources)
+    if str(clinic_id or '').isdigit():
+        found = {
+            resource: (version, changed_at.timestamp())
+            for resource, version, changed_at in rows.filter(clinic_id=clinic_id).values_list(
+                'resource', 'version', 'changed_at')
+        }
+    else:
+        totals = rows.order_by().values('resource').annotate(total=Sum('version'), last=Max('changed_at'))
+        found = {
+            row['resource']: (row['total'], row['last'].timestamp())
+            for row in totals
+        }
+    return [found.get(resource, (0, 0.0)) for resource in resources]
+
+
+def compute_validators(request, resources, daily=False):
+    """
+    İsteğin (ETag, Last-Modified) değerlerini hesaplar.
+
+    ETag kaynak sürümlerinin, kliniğin, tam URL'nin ve Accept başlığının
+    özetidir. `daily` verilirse yanıt güne de bağlıdır (ör. "bugünkü
+    randevular"): gün değiştiğinde doğrulayıcılar da değişir.
+    """
+    clinic_id = get_request_clinic_id(request)
+    versions = get_versions(clinic_id, resources)
+    last_modified = max(changed_at for _, changed_at in versions)
+    parts = [f'{version}@{changed_at}' for version, changed_at in versions]
+    parts += [str(clinic_id), request.get_full_path(), request.META.get('HTTP_ACCEPT', '')]
+    if daily:
+        today = timezone.localdate()
+        midnight = timezone.make_aware(datetime.combine(today, dt_time.min)).timestamp()
+        last_modified = max(last_modified, midnight)
+        parts.append(today.isoformat())
+    digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"', last_modified
+
+
+def evaluate_conditional(request, resources, daily=False):
+    """
+    Returns:
+        (not_modified, etag, last_modified): not_modified, istemcinin
+        önbelleği geçerliyse hazır 304 yanıtıdır, değilse None.
+    """
+    etag, last_modified = compute_validators(request, resources, daily)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if not_modified is not None:
+        _set_validators(not_modified, etag, last_modified)
+    return not_modified, etag, last_modified
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Yanıt kullanıcıya/kliniğe özeldir; her kullanımda yeniden doğrulanır
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Accept', 'Authorization'))
+
+
+def apply_validators(response, etag, last_modified):
+    """Başarılı GET yanıtına doğrulayıcıları ekler."""
+    if response.status_code == 200:
+        _set_validators(response, etag, last_modified)
+    return response
+
+
+def conditional_get(*resources, daily=False):
+    """
+    Fonksiyon görünümleri için dekoratör (@api_view'in altında kullanılır).
+
+    Örnek:
+        @api_view(['GET'])
+        @conditional_get('appointment', 'dentist')
+        def view(request): ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            not_modified, etag, last_modified = evaluate_conditional(request, resources, daily)
+            if not_modified is not None:
+                return not_modified
+            return apply_validators(view(request, *args, **kwargs), etag, last_modified)
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet'lerin list ve retrieve işlemlerine koşullu GET ekler.
+    Yanıtın bağlı olduğu kaynaklar `conditional_resources` ile verilir.
+    """
+    conditional_resources = ()
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        not_modified, etag, last_modified = evaluate_conditional(request, self.conditional_resources)
+        if not_modified is not None:
+            return not_modified
+        return apply_validators(handler(request, *args, **kwargs), etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
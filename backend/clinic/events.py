@@ -0,0 +1,362 @@
+"""
+Randevu değişikliklerinin panellere anlık iletilmesi (server push).
+
+Randevu kaydedildiğinde/silindiğinde transaction commit olduktan sonra
+kliniğin kanalına küçük bir olay (delta) yayınlanır:
+
+    {"type": "appointment.created" | "appointment.updated" |
+             "appointment.cancelled" | "appointment.deleted",
+     "appointment": {id, dentist, dentist_name, patient, patient_name,
+                     start_time, end_time, status, treatment_type},   # silmede adlar yok
+     "previous": {dentist, start_time, end_time, status}}   # sadece güncellemede
+
+Paneller /api/events/ uç noktasına Server-Sent Events (EventSource) ile
+bağlanır ve listelerini bu olaylarla yerinde günceller; değişiklik yokken
+sunucuya hiç istek gelmez. Bağlantı koparsa tarayıcı Last-Event-ID ile
+yeniden bağlanır ve kaçırılan olaylar geçmişten tekrar gönderilir. Geçmiş
+yetmiyorsa (veya toplu aktarım gibi olay üretmeyen bir değişiklikte)
+{"type": "resync"} gönderilir; istemci verisini bir kez yeniden yükler.
+
+Dağıtım PUSH_BROKER ayarındaki broker ile yapılır:
+    - InMemoryBroker: tek süreç (geliştirme, testler)
+    - RedisBroker: birden fazla worker/sunucu; `redis` paketi ve
+      PUSH_BROKER_URL gerekir
+
+SSE için uygulama ASGI sunucusuyla çalıştırılmalıdır (örn.
+`uvicorn config.asgi:application`). WSGI altında (runserver) her bağlantı
+bir thread'i meşgul eder.
+"""
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .availability import ACTIVE_STATUSES
+
+
+# Klinik başına saklanan son olay sayısı (yeniden bağlananlara tekrar gönderilir)
+EVENT_HISTORY = 500
+# Yavaş bir istemci için bekleyen en fazla olay; aşılırsa istemciye resync gönderilir
+MAX_PENDING = 1000
+HEARTBEAT_SECONDS = 25
+RESYNC = {'type': 'resync'}
+
+_DELTA_FIELDS = ('start_time', 'end_time', 'status', 'treatment_type')
+
+
+# ============================================================================
+# OLAYLAR
+# ============================================================================
+
+def appointment_delta(instance, names=True):
+    """
+    Randevunun panellerde gösterilen alanları (AppointmentSerializer ile aynı adlar).
+
+    Silinen randevular için adlar gönderilmez; istemci kaydı kimliğiyle
+    kaldırır (toplu silmelerde randevu başına ek sorgu olmaz).
+    """
+    delta = {'id': instance.pk, 'dentist': instance.dentist_id, 'patient': instance.patient_id}
+    if names:
+        delta['dentist_name'] = instance.dentist.name
+        delta['patient_name'] = instance.patient.name
+    delta.update({field: getattr(instance, field) for field in _DELTA_FIELDS})
+    return delta
+
+
+def appointment_event(instance, created=False, previous=None, deleted=False):
+    """
+    Kaydedilen/silinen randevu için olay oluşturur.
+
+    Args:
+        previous: Randevunun değişiklikten önceki alanları (rollups.loaded_values)
+    """
+    event = {'appointment': appointment_delta(instance, names=not deleted)}
+    if deleted:
+        event['type'] = 'appointment.deleted'
+    elif created or previous is None:
+        event['type'] = 'appointment.created'
+    else:
+        cancelled = instance.status == 'cancelled' and previous['status'] in ACTIVE_STATUSES
+        event['type'] = 'appointment.cancelled' if cancelled else 'appointment.updated'
+        event['previous'] = {
+            'dentist': previous['dentist_id'],
+            'start_time': previous['start_time'],
+            'end_time': previous['end_time'],
+            'status': previous['status'],
+        }
+    return event
+
+
+def event_dentists(event):
+    """Olayın ilgilendirdiği hekimler (hekim değiştiyse eskisi de)."""
+    dentists = {event.get('appointment', {}).get('dentist')}
+    if 'previous' in event:
+        dentists.add(event['previous']['dentist'])
+    dentists.discard(None)
+    return dentists
+
+
+def publish_appointment(instance, **kwargs):
+    """Olayı transaction commit olduktan sonra yayınlar (geri alınan değişiklikler yayınlanmaz)."""
+    if not instance.clinic_id:
+        return
+    event = appointment_event(instance, **kwargs)
+    transaction.on_commit(partial(get_broker().publish, instance.clinic_id, event))
+
+
+def publish_resync(clinic_id):
+    """Olay üretmeyen toplu değişikliklerden sonra panellerin veriyi yeniden yüklemesini ister."""
+    transaction.on_commit(partial(get_broker().publish, clinic_id, dict(RESYNC)))
+
+
+def format_sse(event):
+    """Olayı SSE mesajına çevirir."""
+    data = json.dumps(event, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False)
+    if 'id' in event:
+        return f"id: {event['id']}\ndata: {data}\n\n"
+    return f"data: {data}\n\n"
+
+
+# ============================================================================
+# BROKER
+# ============================================================================
+
+class Subscription:
+    """
+    Tek bir bağlantının olay kuyruğu.
+
+    Olaylar herhangi bir thread'den deliver() ile eklenir; bağlantı
+    async (ASGI) tarafta next_batch(), sync (WSGI) tarafta wait_batch()
+    ile bekler.
+    """
+
+    def __init__(self, clinic_id, dentist_id=None, loop=None):
+        self.clinic_id = clinic_id
+        self.dentist_id = dentist_id
+        self.loop = loop
+        self.pending = deque()
+        self._async_ready = asyncio.Event() if loop is not None else None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def wants(self, event):
+        return self.dentist_id is None or 'appointment' not in event or self.dentist_id in event_dentists(event)
+
+    def deliver(self, event):
+        with self._lock:
+            if len(self.pending) >= MAX_PENDING:
+                # İstemci yetişemiyor; bekleyenler yerine tek bir resync yeterli
+                self.pending.clear()
+                event = dict(RESYNC)
+            self.pending.append(event)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._async_ready.set)
+        else:
+            self._ready.set()
+
+    def drain(self):
+        with self._lock:
+            events = list(self.pending)
+            self.pending.clear()
+        return events
+
+    async def next_batch(self, timeout=HEARTBEAT_SECONDS):
+        """Olay gelene kadar (en fazla `timeout` saniye) bekler; zaman aşımında []."""
+        if not self.pending:
+            try:
+                await asyncio.wait_for(self._async_ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._async_ready.clear()
+        return self.drain()
+
+    def wait_batch(self, timeout=HEARTBEAT_SECONDS):
+        if not self.pending:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        return self.drain()
+
+
+class InMemoryBroker:
+    """
+    Süreç içi broker. Olay kimlikleri "<epoch>-<sıra>" biçimindedir; epoch
+    her broker örneğinde farklıdır, böylece sunucu yeniden başladıktan sonra
+    gelen eski bir Last-Event-ID resync ile karşılanır.
+    """
+
+    def __init__(self, history=EVENT_HISTORY):
+        self.history_size = history
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        # Bu sıra numarasına kadarki olaylar tekrar gönderilemez
+        self._base_sequence = 0
+        self._history = {}
+        self._horizon = {}
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        with self._lock:
+            self._sequence += 1
+            return f'{self.epoch}-{self._sequence}'
+
+    def publish(self, clinic_id, event):
+        """Olaya kimlik verir ve kliniğin abonelerine iletir."""
+        self.dispatch(clinic_id, dict(event, id=self.next_id()))
+
+    def dispatch(self, clinic_id, event):
+        with self._lock:
+            history = self._history.setdefault(clinic_id, deque())
+            history.append(event)
+            if len(history) > self.history_size:
+                evicted = history.popleft()
+                self._horizon[clinic_id] = self._sequence_of(evicted['id'])
+            subscribers = [sub for sub in self._subscribers.get(clinic_id, ()) if sub.wants(event)]
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def _sequence_of(self, event_id):
+        epoch, _, sequence = str(event_id).rpartition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def subscribe(self, clinic_id, dentist_id=None, last_event_id=None, loop=None):
+        """
+        Kliniğin (isteğe bağlı tek bir hekimin) olaylarına abone olur.
+
+        last_event_id verilirse sonraki olaylar geçmişten kuyruğa eklenir;
+        geçmiş yetmiyorsa ilk olay resync olur.
+        """
+        subscription = Subscription(clinic_id, dentist_id, loop)
+        with self._lock:
+            self._subscribers.setdefault(clinic_id, set()).add(subscription)
+            if last_event_id:
+                sequence = self._sequence_of(last_event_id)
+                horizon = max(self._base_sequence, self._horizon.get(clinic_id, 0))
+                if sequence is None or sequence < horizon:
+                    missed = [dict(RESYNC)]
+                else:
+                    missed = [
+                        event for event in self._history.get(clinic_id, ())
+                        if self._sequence_of(event['id']) > sequence and subscription.wants(event)
+                    ]
+                subscription.pending.extend(missed)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.clinic_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.clinic_id]
+
+    def subscriber_count(self, clinic_id=None):
+        with self._lock:
+            if clinic_id is not None:
+                return len(self._subscribers.get(clinic_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class RedisBroker(InMemoryBroker):
+    """
+    Birden fazla worker/sunucu için Redis pub/sub üzerinden dağıtım.
+
+    Olaylar tek bir Redis kanalına yayınlanır; her süreçteki dinleyici
+    thread'i onları kendi abonelerine iletir. Sıra numarası Redis sayacından
+    alındığı için kimlikler tüm süreçlerde ortaktır.
+    """
+    channel = 'dentcare:events'
+
+    def __init__(self, url=None, **kwargs):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImproperlyConfigured('RedisBroker için "redis" paketi gereklidir (pip install redis).') from exc
+        super().__init__(**kwargs)
+        self.epoch = 'r'
+        self.client = redis.Redis.from_url(url or settings.PUSH_BROKER_URL)
+        self._listener = None
+
+    def next_id(self):
+        return f'{self.epoch}-{self.client.incr(self.channel + ":seq")}'
+
+    def publish(self, clinic_id, event):
+        message = {'clinic': clinic_id, 'event': dict(event, id=self.next_id())}
+        self.client.publish(self.channel, json.dumps(message, cls=DjangoJSONEncoder))
+
+    def subscribe(self, *args, **kwargs):
+        self._ensure_listener()
+        return super().subscribe(*args, **kwargs)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel)
+            # Dinleyici başlamadan önceki olaylar bu süreçte tekrar gönderilemez
+            self._base_sequence = int(self.client.get(self.channel + ':seq') or 0)
+            self._listener = threading.Thread(target=self._listen, args=(pubsub,), daemon=True)
+            self._listener.start()
+
+    def _listen(self, pubsub):
+        for message in pubsub.listen():
+            payload = json.loads(message['data'])
+            self.dispatch(payload['clinic'], payload['event'])
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """PUSH_BROKER ayarındaki broker'ı (süreç başına tek örnek) döndürür."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.PUSH_BROKER)()
+    return _broker
+
+
+def set_broker(broker):
+    """Broker'ı değiştirir (testler). Önceki broker'ı döndürür."""
+    global _broker
+    previous, _broker = _broker, broker
+    return previous
+
+
+# ============================================================================
+# SSE AKIŞI
+# ============================================================================
+
+async def stream_events(broker, subscription, heartbeat=HEARTBEAT_SECONDS):
+    """ASGI altında SSE akışı; bağlantı kapanınca abonelik silinir."""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            events = await subscription.next_batch(heartbeat)
+            yield ''.join(format_sse(event) for event in events) if events else ': ping\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def stream_events_sync(broker, subscription, heartbeat=HEARTBEAT_SECONDS):
+    """WSGI altında aynı akış (bağlantı başına bir thread)."""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            events = subscription.wait_batch(heartbeat)
+            yield ''.join(format_sse(event) for event in events) if events else ': ping\n\n'
+    finally:
+        broker.unsubscribe(subscription)
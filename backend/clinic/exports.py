@@ -0,0 +1,199 @@
+"""
+Akış (streaming) halinde hasta listesi dışa aktarma - CSV ve XLSX.
+
+Satırlar veritabanından .iterator() ile parça parça okunur ve hiçbir
+zaman tamamı belleğe alınmaz; ilk baytlar sorgu başlar başlamaz gönderilir.
+
+CSV hücreleri =, +, - veya @ ile başlıyorsa başına ' eklenir; böylece
+hasta adı gibi serbest metin alanları elektronik tabloda formül olarak
+çalıştırılamaz (CSV/formül enjeksiyonu). XLSX hücreleri satır içi metin
+olarak yazıldığı için formül olarak yorumlanmaz.
+
+XLSX dosyası harici bir kütüphane kullanmadan, zipfile ile parça parça
+yazılır (satır içi metin hücreleri, tek çalışma sayfası).
+"""
+import csv
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+
+from .models import Patient
+
+
+# (alan, başlık) çiftleri
+PATIENT_EXPORT_COLUMNS = [
+    ('id', 'ID'),
+    ('name', 'Ad Soyad'),
+    ('phone', 'Telefon'),
+    ('email', 'E-posta'),
+    ('date_of_birth', 'Doğum Tarihi'),
+    ('blood_type', 'Kan Grubu'),
+    ('allergies', 'Alerjiler'),
+    ('chronic_diseases', 'Kronik Hastalıklar'),
+    ('current_medications', 'Kullanılan İlaçlar'),
+    ('emergency_contact_name', 'Acil Durum Kişisi'),
+    ('emergency_contact_phone', 'Acil Durum Telefonu'),
+    ('sms_consent', 'SMS İzni'),
+    ('created_at', 'Kayıt Tarihi'),
+]
+
+# Elektronik tabloların formül başlangıcı saydığı karakterler
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+# Aynı anda okunup tek parça olarak gönderilen satır sayısı
+EXPORT_CHUNK_SIZE = 2000
+
+BLOOD_TYPE_LABELS = dict(Patient.BLOOD_TYPE_CHOICES)
+
+
+def patient_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Hastaları görüntülenecek değerlere çevrilmiş tuple'lar olarak üretir."""
+    fields = [field for field, _ in PATIENT_EXPORT_COLUMNS]
+    blood_index = fields.index('blood_type')
+    consent_index = fields.index('sms_consent')
+    created_index = fields.index('created_at')
+    tz = timezone.get_current_timezone()
+
+    for row in queryset.order_by('name', 'id').values_list(*fields).iterator(chunk_size=chunk_size):
+        row = list(row)
+        row[blood_index] = BLOOD_TYPE_LABELS.get(row[blood_index], row[blood_index])
+        row[consent_index] = 'Evet' if row[consent_index] else 'Hayır'
+        row[created_index] = row[created_index].astimezone(tz).strftime('%d.%m.%Y %H:%M')
+        yield row
+
+
+class _Buffer:
+    """Yazılan baytları biriktiren, generator'ın boşaltabildiği dosya benzeri nesne."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Başlık + satırları UTF-8 (BOM'lu, Excel uyumlu) CSV parçaları olarak üretir."""
+    buffer = _Buffer()
+
+    class _TextBuffer:
+        def write(self, text):
+            buffer.write(text.encode('utf-8'))
+
+    writer = csv.writer(_TextBuffer())
+    buffer.write('\ufeff'.encode('utf-8'))
+    writer.writerow([title for _, title in PATIENT_EXPORT_COLUMNS])
+    yield buffer.drain()
+
+    for chunk in _chunked(rows, chunk_size):
+        writer.writerows([_csv_cell(value) for value in row] for row in chunk)
+        yield buffer.drain()
+
+
+# ============================================================================
+# XLSX
+# ============================================================================
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        value = 'Evet' if value else 'Hayır'
+    elif isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    elif isinstance(value, (date, datetime)):
+        value = value.strftime('%d.%m.%Y')
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(rows, sheet_name='Hastalar', chunk_size=EXPORT_CHUNK_SIZE):
+    """Başlık + satırları parça parça yazılan bir XLSX dosyası olarak üretir."""
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(sheet=escape(sheet_name)))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_SHEET_START + _xlsx_row(title for _, title in PATIENT_EXPORT_COLUMNS)).encode('utf-8'))
+            for chunk in _chunked(rows, chunk_size):
+                sheet.write(''.join(_xlsx_row(row) for row in chunk).encode('utf-8'))
+                yield buffer.drain()
+            sheet.write(_SHEET_END.encode('utf-8'))
+
+    yield buffer.drain()
@@ -0,0 +1,533 @@
+"""
+Toplu hasta ve randevu aktarımı (başka sistemden geçiş).
+
+Kayıtlar CSV, JSON dizisi veya JSON Lines dosyasından akış halinde okunur,
+parçalar (chunk) halinde doğrulanır ve her parça kendi transaction'ı
+içinde bulk_create ile (insert_objects) yazılır. Hatalı satırlar atlanıp
+satır numarasıyla raporlanır; bir parçadaki veritabanı hatası sadece o
+parçayı geri alır.
+
+    - Hastalar telefon anahtarına (search.phone_key) göre tekilleştirilir:
+      klinikte veya dosyada daha önce görülen telefonlar atlanır.
+    - Randevuların hastası `patient_phone` (veya `patient_id`), hekimi
+      `dentist_id` (veya `dentist` adı) ile bulunur. Aktif randevular,
+      parçadaki hekimler kilitlenerek mevcut randevulara ve dosyadaki
+      önceki randevulara karşı toplu olarak çakışma kontrolünden geçer.
+
+Toplu yazma sinyal tetiklemediği için rapor özetleri (rollups), dashboard
+önbelleği ve açık paneller (events.publish_resync) burada güncellenir; onay
+SMS'i gönderilmez.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, NotSupportedError, connections, transaction
+from django.utils import timezone
+
+from . import quotas, rollups
+from .availability import ACTIVE_STATUSES, SLOT_DURATION_MINUTES, group_by_dentist
+from .booking import dentist_locks
+from .conditional import bump_versions
+from .events import publish_resync
+from .models import Dentist, Patient, Appointment, SyncChange
+from .search import fold_text, phone_key
+from .sync import change_entries
+
+
+DEFAULT_CHUNK_SIZE = 5000
+# Yanıtta/raporda ayrıntısı verilen en fazla hatalı satır
+MAX_REPORTED_ERRORS = 1000
+IMPORT_FORMATS = ('csv', 'json')
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'evet', 'e', 'on'}
+_FALSE_VALUES = {'0', 'false', 'no', 'hayir', 'hayır', 'h', 'off'}
+_DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y')
+_DATETIME_FORMATS = ('%d.%m.%Y %H:%M', '%d/%m/%Y %H:%M')
+
+
+# ============================================================================
+# OKUMA
+# ============================================================================
+
+def _text_stream(fileobj):
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+
+
+def iter_csv_records(fileobj):
+    """CSV satırlarını başlıkları küçük harfe çevrilmiş dict'ler olarak üretir."""
+    reader = csv.reader(_text_stream(fileobj))
+    header = [column.strip().lower() for column in next(reader, [])]
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            yield dict(zip(header, row))
+
+
+def iter_json_records(fileobj, read_size=64 * 1024):
+    """
+    JSON dizisini ([{...}, {...}]) veya JSON Lines dosyasını nesne nesne okur;
+    dosyanın tamamı belleğe alınmaz.
+    """
+    stream = _text_stream(fileobj)
+    decoder = json.JSONDecoder()
+    buffer = stream.read(read_size).lstrip('\ufeff')
+    position, eof = 0, False
+
+    def skip(chars):
+        nonlocal buffer, position, eof
+        while True:
+            while position < len(buffer) and buffer[position] in chars:
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            buffer, position = stream.read(read_size), 0
+            eof = not buffer
+
+    skip(' \t\r\n')
+    in_array = buffer[position:position + 1] == '['
+    if in_array:
+        position += 1
+
+    while True:
+        skip(' \t\r\n,' if in_array else ' \t\r\n')
+        if position >= len(buffer) or (in_array and buffer[position] == ']'):
+            return
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                break
+            except ValueError:
+                if eof:
+                    raise
+                more = stream.read(read_size)
+                eof = not more
+                buffer, position = buffer[position:] + more, 0
+        position = end
+        yield record
+
+
+def open_records(fileobj, file_format):
+    """Dosya biçimine göre kayıt üreticisini döndürür."""
+    if file_format == 'csv':
+        return iter_csv_records(fileobj)
+    if file_format == 'json':
+        return iter_json_records(fileobj)
+    raise ValueError(f'Desteklenmeyen biçim: {file_format}')
+
+
+# ============================================================================
+# ALAN DÖNÜŞÜMLERİ
+# ============================================================================
+
+class RowError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class _Row:
+    """Tek bir kaydın alanlarını dönüştürür, hataları toplar."""
+
+    def __init__(self, record, tz):
+        self.record = {str(key).strip().lower(): value for key, value in record.items()}
+        self.tz = tz
+        self.errors = {}
+
+    def raw(self, field):
+        value = self.record.get(field)
+        return value.strip() if isinstance(value, str) else value
+
+    def text(self, field, max_length=None, required=False):
+        value = self.raw(field)
+        value = '' if value is None else str(value)
+        if required and not value:
+            self.errors[field] = 'Bu alan zorunludur.'
+        elif max_length and len(value) > max_length:
+            self.errors[field] = f'En fazla {max_length} karakter olabilir.'
+        return value
+
+    def boolean(self, field, default):
+        value = self.raw(field)
+        if value in (None, ''):
+            return default
+        if isinstance(value, bool):
+            return value
+        value = str(value).lower()
+        if value in _TRUE_VALUES:
+            return True
+        if value in _FALSE_VALUES:
+            return False
+        self.errors[field] = 'Geçersiz evet/hayır değeri.'
+        return default
+
+    def date(self, field):
+        value = self.raw(field)
+        if not value:
+            return None
+        for fmt in _DATE_FORMATS:
+            try:
+                return datetime.strptime(str(value), fmt).date()
+            except ValueError:
+                continue
+        self.errors[field] = 'Geçersiz tarih (YYYY-MM-DD veya GG.AA.YYYY).'
+        return None
+
+    def datetime(self, field, required=False):
+        value = self.raw(field)
+        if not value:
+            if required:
+                self.errors[field] = 'Bu alan zorunludur.'
+            return None
+        parsed = None
+        try:
+            parsed = datetime.fromisoformat(str(value))
+        except ValueError:
+            for fmt in _DATETIME_FORMATS:
+                try:
+                    parsed = datetime.strptime(str(value), fmt)
+                    break
+                except ValueError:
+                    continue
+        if parsed is None:
+            self.errors[field] = 'Geçersiz tarih/saat (ISO 8601 veya GG.AA.YYYY SS:DD).'
+            return None
+        return timezone.make_aware(parsed, self.tz) if timezone.is_naive(parsed) else parsed
+
+    def integer(self, field):
+        value = self.raw(field)
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            self.errors[field] = 'Geçersiz sayı.'
+            return None
+
+    def decimal(self, field):
+        value = self.raw(field)
+        if value in (None, ''):
+            return None
+        try:
+            number = Decimal(str(value).replace(',', '.'))
+        except InvalidOperation:
+            self.errors[field] = 'Geçersiz tutar.'
+            return None
+        if number < 0 or not number.is_finite():
+            self.errors[field] = 'Geçersiz tutar.'
+            return None
+        return number.quantize(Decimal('0.01'))
+
+    def choice(self, field, choices, default):
+        value = self.text(field) or default
+        if value not in {key for key, _ in choices}:
+            self.errors[field] = f'Geçersiz değer: {value}'
+        return value
+
+    def check(self):
+        if self.errors:
+            raise RowError(self.errors)
+
+
+# ============================================================================
+# YAZMA
+# ============================================================================
+
+# Tek INSERT ifadesindeki en fazla satır (veritabanının parametre sınırı
+# daha düşükse bulk_create ayrıca böler)
+INSERT_BATCH_SIZE = 1000
+
+
+def insert_objects(model, objs, using=DEFAULT_DB_ALIAS):
+    """
+    Kaydedilmemiş nesneleri bulk_create ile çok satırlı INSERT'lerle yazar.
+
+    Oluşan id'ler nesnelere yazılır (senkron günlüğü bunlara dayanır);
+    veritabanı toplu INSERT'ten id döndüremiyorsa NotSupportedError verir.
+    """
+    if not objs:
+        return
+    if not connections[using].features.can_return_rows_from_bulk_insert:
+        raise NotSupportedError('Toplu aktarım, INSERT ... RETURNING destekleyen bir veritabanı gerektirir.')
+    model.objects.using(using).bulk_create(objs, batch_size=INSERT_BATCH_SIZE)
+
+
+# ============================================================================
+# AKTARIM
+# ============================================================================
+
+class BulkImporter:
+    """
+    Parça parça doğrulayıp yazan temel sınıf. Alt sınıflar clean()
+    (tek satır → model nesnesi) ve save_chunk() metodlarını tanımlar.
+    """
+    model = None
+
+    def __init__(self, clinic, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False,
+                 max_errors=MAX_REPORTED_ERRORS, progress=None):
+        self.clinic = clinic
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.max_errors = max_errors
+        self.progress = progress
+        self.result = {'processed': 0, 'created': 0, 'duplicates': 0, 'failed': 0, 'errors': []}
+
+    def add_error(self, row_number, errors):
+        self.result['failed'] += 1
+        if len(self.result['errors']) < self.max_errors:
+            self.result['errors'].append({'row': row_number, 'errors': errors})
+
+    def run(self, records):
+        rows = enumerate(records, start=1)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+            self.result['processed'] += len(chunk)
+            if self.progress:
+                self.progress(self.result)
+        if self.result['created'] and not self.dry_run:
+            self.finish()
+        return self.result
+
+    def finish(self):
+        """Aktarım kayıt oluşturduysa en sonda bir kez çağrılır."""
+        # Toplu INSERT sinyal üretmez; koşullu GET ve dashboard sürümü burada ilerletilir
+        bump_versions(self.clinic.id, self.model._meta.model_name)
+
+    def import_chunk(self, chunk):
+        self.prepare_chunk([record for _, record in chunk])
+        valid = []
+        tz = timezone.get_current_timezone()
+        for row_number, record in chunk:
+            if not isinstance(record, dict):
+                self.add_error(row_number, {'__all__': 'Kayıt bir nesne (satır) olmalıdır.'})
+                continue
+            try:
+                valid.append((row_number, self.clean(_Row(record, tz))))
+            except RowError as exc:
+                self.add_error(row_number, exc.errors)
+        if not valid:
+            return
+        try:
+            self.save_chunk(valid)
+        except DatabaseError as exc:
+            for row_number, _ in valid:
+                self.add_error(row_number, {'__all__': f'Veritabanı hatası: {exc}'})
+
+    def prepare_chunk(self, records):
+        """Parçadaki satırların ihtiyaç duyduğu verileri toplu olarak yükler."""
+
+    def clean(self, row):
+        raise NotImplementedError
+
+    def save_chunk(self, valid):
+        raise NotImplementedError
+
+
+class PatientImporter(BulkImporter):
+    model = Patient
+
+    def clean(self, row):
+        patient = Patient(
+            clinic=self.clinic,
+            name=row.text('name', 200, required=True),
+            phone=row.text('phone', 20, required=True),
+            email=row.text('email', 254),
+            date_of_birth=row.date('date_of_birth'),
+            blood_type=row.choice('blood_type', Patient.BLOOD_TYPE_CHOICES, 'unknown'),
+            allergies=row.text('allergies'),
+            chronic_diseases=row.text('chronic_diseases'),
+            current_medications=row.text('current_medications'),
+            emergency_contact_name=row.text('emergency_contact_name', 200),
+            emergency_contact_phone=row.text('emergency_contact_phone', 20),
+            notes=row.text('notes'),
+            sms_consent=row.boolean('sms_consent', default=True),
+        )
+        if patient.email and 'email' not in row.errors:
+            try:
+                validate_email(patient.email)
+            except ValidationError:
+                row.errors['email'] = 'Geçersiz e-posta adresi.'
+        patient.refresh_search_fields()
+        if patient.phone and not patient.phone_key:
+            row.errors['phone'] = 'Telefon numarası rakam içermelidir.'
+        row.check()
+        return patient
+
+    def save_chunk(self, valid):
+        # Dosya içi tekrarlar (ilk kayıt kalır) ve klinikte zaten olan telefonlar atlanır
+        unique = {}
+        for _, patient in valid:
+            unique.setdefault(patient.phone_key, patient)
+        existing = set(
+            Patient.objects.filter(clinic=self.clinic, phone_key__in=list(unique))
+            .values_list('phone_key', flat=True)
+        )
+        patients = [patient for key, patient in unique.items() if key not in existing]
+        self.result['duplicates'] += len(valid) - len(patients)
+        if not self.dry_run:
+            with transaction.atomic():
+                insert_objects(Patient, patients)
+                insert_objects(SyncChange, change_entries(patients))
+        self.result['created'] += len(patients)
+
+
+def _dentist_key(name):
+    return fold_text(name).removeprefix('dr ')
+
+
+class AppointmentImporter(BulkImporter):
+    model = Appointment
+
+    def __init__(self, clinic, **kwargs):
+        super().__init__(clinic, **kwargs)
+        dentists = list(Dentist.objects.filter(clinic=clinic).values_list('id', 'name'))
+        self.dentist_ids = {dentist_id for dentist_id, _ in dentists}
+        self.dentists_by_name = {}
+        for dentist_id, name in dentists:
+            self.dentists_by_name.setdefault(_dentist_key(name), dentist_id)
+        self.patients_by_phone = {}
+        self.patient_ids = set()
+
+    def prepare_chunk(self, records):
+        phones, ids = set(), set()
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            record = {str(key).strip().lower(): value for key, value in record.items()}
+            if record.get('patient_phone'):
+                phones.add(phone_key(str(record['patient_phone'])))
+            elif str(record.get('patient_id') or '').isdigit():
+                ids.add(int(record['patient_id']))
+        patients = Patient.objects.filter(clinic=self.clinic)
+        # Aynı telefona sahip birden fazla hasta varsa en eski kayıt kullanılır.
+        # ORDER BY eklenmez: SQLite (klinik, telefon) indeksi yerine id sırasıyla tüm tabloyu tarıyor.
+        self.patients_by_phone = {}
+        for key, patient_id in patients.filter(phone_key__in=phones).order_by().values_list('phone_key', 'id'):
+            if patient_id < self.patients_by_phone.get(key, patient_id + 1):
+                self.patients_by_phone[key] = patient_id
+        self.patient_ids = set(patients.filter(id__in=ids).values_list('id', flat=True))
+
+    def _dentist_id(self, row):
+        dentist_id = row.integer('dentist_id')
+        if dentist_id is not None:
+            if dentist_id not in self.dentist_ids:
+                row.errors['dentist_id'] = 'Hekim bu klinikte bulunamadı.'
+            return dentist_id
+        name = _dentist_key(row.text('dentist'))
+        if name not in self.dentists_by_name:
+            row.errors['dentist'] = 'Hekim bulunamadı.'
+        return self.dentists_by_name.get(name)
+
+    def _patient_id(self, row):
+        phone = row.text('patient_phone')
+        if phone:
+            patient_id = self.patients_by_phone.get(phone_key(phone))
+            if patient_id is None:
+                row.errors['patient_phone'] = 'Bu telefonla kayıtlı hasta bulunamadı.'
+            return patient_id
+        patient_id = row.integer('patient_id')
+        if patient_id is None or patient_id not in self.patient_ids:
+            row.errors.setdefault('patient_id', 'Hasta bulunamadı (patient_phone veya patient_id gerekli).')
+        return patient_id
+
+    def clean(self, row):
+        start_time = row.datetime('start_time', required=True)
+        end_time = row.datetime('end_time')
+        if start_time and end_time is None and 'end_time' not in row.errors:
+            duration = row.integer('duration_minutes') or SLOT_DURATION_MINUTES
+            end_time = start_time + timedelta(minutes=duration)
+        if start_time and end_time and start_time >= end_time:
+            row.errors['end_time'] = 'Başlangıç saati bitiş saatinden önce olmalıdır.'
+
+        appointment = Appointment(
+            clinic_id=self.clinic.id,
+            dentist_id=self._dentist_id(row),
+            patient_id=self._patient_id(row),
+            start_time=start_time,
+            end_time=end_time,
+            status=row.choice('status', Appointment.STATUS_CHOICES, 'scheduled'),
+            treatment_type=row.text('treatment_type', 100),
+            treatment_cost=row.decimal('treatment_cost'),
+            notes=row.text('notes'),
+        )
+        row.check()
+        return appointment
+
+    def _reject_conflicts(self, valid):
+        """Aktif randevuları hekim bazında mevcut ve önceki satırlarla karşılaştırır."""
+        active = [(row_number, apt) for row_number, apt in valid if apt.status in ACTIVE_STATUSES]
+        if not active:
+            return valid
+        window_start = min(apt.start_time for _, apt in active)
+        window_end = max(apt.end_time for _, apt in active)
+        timelines = group_by_dentist(
+            Appointment.objects.filter(
+                dentist_id__in={apt.dentist_id for _, apt in active},
+                status__in=ACTIVE_STATUSES,
+                start_time__lt=window_end,
+                end_time__gt=window_start,
+            ).values('dentist_id', 'start_time', 'end_time')
+        )
+
+        rejected = set()
+        latest_end = {}
+        for row_number, apt in sorted(active, key=lambda item: (item[1].dentist_id, item[1].start_time)):
+            timeline = timelines.get(apt.dentist_id)
+            previous_end = latest_end.get(apt.dentist_id)
+            if (previous_end is not None and previous_end > apt.start_time) or (
+                timeline is not None and timeline.find_overlap(apt.start_time, apt.end_time)
+            ):
+                rejected.add(row_number)
+                self.add_error(row_number, {'start_time': 'Hekimin bu saatte başka bir randevusu var.'})
+                continue
+            latest_end[apt.dentist_id] = max(previous_end or apt.end_time, apt.end_time)
+        return [(row_number, apt) for row_number, apt in valid if row_number not in rejected]
+
+    def finish(self):
+        super().finish()
+        # Toplu yazma randevu olayı üretmez; açık paneller veriyi yeniden yükler
+        publish_resync(self.clinic.id)
+
+    def save_chunk(self, valid):
+        # Kontrol ve yazma aynı kilit altında: eşzamanlı canlı randevularla yarışmaz
+        with dentist_locks({apt.dentist_id for _, apt in valid}):
+            valid = self._reject_conflicts(valid)
+            appointments = [apt for _, apt in valid]
+            if not self.dry_run:
+                insert_objects(Appointment, appointments)
+                insert_objects(SyncChange, change_entries(appointments))
+                rollups.apply_appointments(appointments)
+                # Aktarılan (çoğunlukla geçmiş) randevular sayılır ama kotayla sınırlanmaz
+                quotas.apply_appointments(appointments)
+        self.result['created'] += len(appointments)
+
+
+IMPORTERS = {
+    'patients': PatientImporter,
+    'appointments': AppointmentImporter,
+}
+
+
+def import_records(kind, clinic, records, **options):
+    """
+    Kayıtları aktarır.
+
+    Args:
+        kind: 'patients' veya 'appointments'
+        clinic: Hedef klinik
+        records: dict üreten iterable (bkz. open_records)
+        **options: chunk_size, dry_run, max_errors, progress
+
+    Returns:
+        dict: processed, created, duplicates, failed, errors
+    """
+    return IMPORTERS[kind](clinic, **options).run(records)
@@ -0,0 +1,185 @@
+"""
+Performans ölçümleri için sentetik veri üreticisi.
+
+Verilen sayıda klinik, hekim ve hasta ile geriye dönük (ve kısa bir süre
+ileriye dönük) randevu geçmişi oluşturur. Aynı parametre ve tohum (seed)
+ile her çalıştırmada aynı veri üretilir; böylece benchmark sonuçları
+karşılaştırılabilir.
+
+Hastalar ve randevular importer.insert_objects ile toplu yazılır; rapor
+özetleri en sonda rebuild_rollups ile tek seferde hesaplanır.
+
+Her klinik için `loadtest<klinik id>` kullanıcı adı ve LOADTEST_PASSWORD
+şifresiyle bir yönetici kullanıcı oluşturulur (bkz. bench_api).
+"""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import SLOT_DURATION_MINUTES, WORK_END_HOUR, WORK_START_HOUR
+from .conditional import RESOURCES, bump_versions
+from .importer import insert_objects
+from .models import Clinic, ClinicUser, Dentist, Patient, Appointment
+from .rollups import rebuild_rollups
+from .sync import record_inserted
+
+
+LOADTEST_PASSWORD = 'loadtest-2026'
+INSERT_BATCH = 5000
+# Bugünden sonra kaç günlük randevu (scheduled/confirmed) üretileceği
+FUTURE_DAYS = 30
+
+FIRST_NAMES = ['Ayşe', 'Fatma', 'Emine', 'Hatice', 'Zeynep', 'Elif', 'Şule', 'Gül', 'Özlem', 'Çiğdem',
+               'Mehmet', 'Mustafa', 'Ahmet', 'Ali', 'Hüseyin', 'İbrahim', 'Ömer', 'Yusuf', 'Şükrü', 'Ilgın']
+LAST_NAMES = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın',
+              'Özdemir', 'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özkan', 'Şimşek']
+SPECIALTIES = ['Ortodonti', 'Endodonti', 'Pedodonti', 'Periodontoloji', 'Protez', 'Cerrahi']
+# (tedavi, ücret)
+TREATMENTS = [
+    ('Kontrol', Decimal('500.00')),
+    ('Diş Temizliği', Decimal('1200.00')),
+    ('Dolgu', Decimal('1800.00')),
+    ('Kanal Tedavisi', Decimal('4500.00')),
+    ('Diş Çekimi', Decimal('1500.00')),
+    ('İmplant', Decimal('18000.00')),
+]
+# Geçmiş randevuların durum dağılımı
+PAST_STATUSES = (['completed'] * 17) + ['cancelled', 'no_show']
+FUTURE_STATUSES = ['scheduled', 'scheduled', 'confirmed']
+
+
+def _person_name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _working_days(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+class _BatchWriter:
+    def __init__(self, model):
+        self.model = model
+        self.pending = []
+        self.written = 0
+
+    def add(self, obj):
+        self.pending.append(obj)
+        if len(self.pending) >= INSERT_BATCH:
+            self.flush()
+
+    def flush(self):
+        insert_objects(self.model, self.pending)
+        self.written += len(self.pending)
+        self.pending = []
+
+
+def _create_patients(clinic, count, rng, phone_offset):
+    writer = _BatchWriter(Patient)
+    for index in range(count):
+        patient = Patient(
+            clinic=clinic,
+            name=_person_name(rng),
+            # Klinik içinde benzersiz; rastgele önek telefon aramasını gerçekçi tutar
+            phone=f'05{rng.randint(30, 59)} {phone_offset + index:07d}',
+            sms_consent=rng.random() < 0.9,
+        )
+        patient.refresh_search_fields()
+        writer.add(patient)
+    writer.flush()
+    return list(Patient.objects.filter(clinic=clinic).order_by('id').values_list('id', flat=True))
+
+
+def _create_appointments(clinic, dentist_ids, patient_ids, start_date, end_date, occupancy, rng):
+    tz = timezone.get_current_timezone()
+    today = timezone.localdate()
+    slots_per_day = (WORK_END_HOUR - WORK_START_HOUR) * 60 // SLOT_DURATION_MINUTES
+    duration = timedelta(minutes=SLOT_DURATION_MINUTES)
+    writer = _BatchWriter(Appointment)
+    for day in _working_days(start_date, end_date):
+        day_start = timezone.make_aware(datetime(day.year, day.month, day.day, WORK_START_HOUR), tz)
+        statuses = PAST_STATUSES if day < today else FUTURE_STATUSES
+        for dentist_id in dentist_ids:
+            for slot in range(slots_per_day):
+                if rng.random() >= occupancy:
+                    continue
+                start = day_start + slot * duration
+                treatment, cost = rng.choice(TREATMENTS)
+                status = rng.choice(statuses)
+                writer.add(Appointment(
+                    clinic_id=clinic.id,
+                    dentist_id=dentist_id,
+                    patient_id=rng.choice(patient_ids),
+                    start_time=start,
+                    end_time=start + duration,
+                    status=status,
+                    treatment_type=treatment,
+                    treatment_cost=cost if status == 'completed' else None,
+                ))
+    writer.flush()
+    return writer.written
+
+
+def generate_dataset(clinics=1, dentists=5, patients=2000, years=1.0, occupancy=0.6, seed=42, progress=None):
+    """
+    Sentetik klinik verisi oluşturur.
+
+    Args:
+        clinics: Klinik sayısı
+        dentists: Klinik başına hekim sayısı
+        patients: Klinik başına hasta sayısı
+        years: Kaç yıllık randevu geçmişi (bugüne kadar)
+        occupancy: Bir hekim slotunun dolu olma olasılığı (0-1)
+        seed: Rastgele sayı üreteci tohumu
+        progress: (opsiyonel) Her klinikten sonra özet dict ile çağrılır
+
+    Returns:
+        dict: clinic_ids, dentists, patients, appointments
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    start_date = today - timedelta(days=int(years * 365))
+    end_date = today + timedelta(days=FUTURE_DAYS)
+    summary = {'clinic_ids': [], 'dentists': 0, 'patients': 0, 'appointments': 0}
+
+    for clinic_index in range(clinics):
+        with transaction.atomic():
+            clinic = Clinic.objects.create(
+                name=f'Yük Testi Kliniği {clinic_index + 1}',
+                address='İstanbul',
+                phone=f'0212 {rng.randint(0, 9999999):07d}',
+            )
+            user = ClinicUser(username=f'loadtest{clinic.id}', clinic=clinic, role='admin')
+            user.set_password(LOADTEST_PASSWORD)
+            user.save()
+            dentist_ids = [
+                dentist.id for dentist in Dentist.objects.bulk_create([
+                    Dentist(
+                        clinic=clinic, name=_person_name(rng), specialty=rng.choice(SPECIALTIES),
+                        phone=f'0532 {rng.randint(0, 9999999):07d}',
+                    )
+                    for _ in range(dentists)
+                ])
+            ]
+            patient_ids = _create_patients(clinic, patients, rng, phone_offset=clinic_index * patients)
+            appointment_count = _create_appointments(
+                clinic, dentist_ids, patient_ids, start_date, end_date, occupancy, rng,
+            )
+            rebuild_rollups(dentist_ids=dentist_ids)
+            for model in (Dentist, Patient, Appointment):
+                record_inserted(model, clinic.id)
+            bump_versions(clinic.id, *RESOURCES)
+
+        summary['clinic_ids'].append(clinic.id)
+        summary['dentists'] += len(dentist_ids)
+        summary['patients'] += len(patient_ids)
+        summary['appointments'] += appointment_count
+        if progress:
+            progress(summary)
+    return summary
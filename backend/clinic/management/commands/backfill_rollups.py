@@ -0,0 +1,43 @@
+"""
+Hekim raporu özetlerini (DentistStatRollup) ham randevulardan yeniden hesaplar.
+
+İlk kurulumda, toplu veri aktarımlarından sonra veya özetlerin randevularla
+tutarsız olduğundan şüphelenildiğinde çalıştırılır. Normal işleyişte
+özetler randevu değişiklikleriyle birlikte artımlı olarak güncellenir.
+
+Kullanım: python manage.py backfill_rollups [--dentist ID ...] [--start YYYY-MM] [--end YYYY-MM]
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clinic.rollups import rebuild_rollups
+
+
+def _parse_month(value):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f'Geçersiz ay: {value}. YYYY-MM formatını kullanın.')
+
+
+class Command(BaseCommand):
+    help = 'Hekim raporu özetlerini randevulardan yeniden hesaplar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dentist', type=int, action='append', help='Sadece bu hekim (tekrarlanabilir)')
+        parser.add_argument('--start', help='İlk ay (YYYY-MM), varsayılan tüm geçmiş')
+        parser.add_argument('--end', help='Son ay (YYYY-MM), varsayılan tüm gelecek')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        start = _parse_month(options['start']) if options['start'] else None
+        end = _parse_month(options['end']) if options['end'] else None
+        if start and end and end < start:
+            raise CommandError('--end, --start değerinden önce olamaz.')
+
+        processed = rebuild_rollups(
+            dentist_ids=options['dentist'], start_date=start, end_date=end,
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{processed} randevudan özetler yeniden hesaplandı."))
@@ -0,0 +1,199 @@
+"""
+API benchmark paketi.
+
+generate_load_data ile oluşturulmuş bir klinik üzerinde sık kullanılan
+uç noktaları Django test istemcisiyle (süreç içinde, ağ olmadan) sırayla
+çağırır ve her senaryo için throughput, p50/p95/p99 gecikme ve istek başına
+SQL sorgu sayısını JSON olarak raporlar. Çıktı dosyaya yazılıp sürümler
+arasında karşılaştırılabilir.
+
+Senaryolar:
+    - login: POST /api/auth/login/ (şifre karması dahil; istek sayısının 1/10'u)
+    - check_availability: GET /api/check-availability/?date= (veri aralığından rastgele gün)
+    - dashboard_stats: GET /api/dashboard-stats/ (önbellek sıcak)
+    - appointment_list: GET /api/appointments/?date=
+    - appointment_create: POST /api/appointments/ (boş, gelecekteki slotlar)
+
+Oluşturulan randevular, token'lar ve SMS kuyruk kayıtları sonda geri alınır.
+
+Kullanım: python manage.py bench_api [--clinic ID] [--requests 200] [--seed 42] [--output sonuc.json]
+"""
+import json
+import platform
+import random
+import time
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from clinic.authentication import local_cache
+from clinic.availability import SLOT_DURATION_MINUTES, WORK_END_HOUR, WORK_START_HOUR
+from clinic.loadgen import LOADTEST_PASSWORD
+from clinic.models import Clinic, ClinicUser, Dentist, Patient, Appointment
+from clinic.management.commands.loadtest_booking import percentile
+
+
+class Rollback(Exception):
+    pass
+
+
+class QueryCounter:
+    """connection.execute_wrapper ile çalıştırılan sorguları sayar."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_scenario(make_request, count, warmup=1):
+    """
+    `make_request(i)` fonksiyonunu `count` kez çağırır.
+
+    Returns:
+        dict: requests, errors, throughput_rps, p50_ms, p95_ms, p99_ms,
+              queries_avg, queries_max
+    """
+    for i in range(warmup):
+        make_request(-1 - i)
+
+    latencies, queries, errors = [], [], 0
+    began = time.perf_counter()
+    for i in range(count):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = make_request(i)
+        latencies.append(time.perf_counter() - started)
+        queries.append(counter.count)
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries_avg': round(sum(queries) / count, 2) if count else 0.0,
+        'queries_max': max(queries, default=0),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Sık kullanılan API uç noktalarının gecikme ve sorgu sayılarını JSON olarak raporlar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clinic', type=int, help='Varsayılan: en son oluşturulan yük testi kliniği')
+        parser.add_argument('--requests', type=int, default=200, help='Senaryo başına istek')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='JSON raporun yazılacağı dosya (varsayılan: stdout)')
+
+    def get_clinic(self, clinic_id):
+        if clinic_id is None:
+            usernames = ClinicUser.objects.filter(username__startswith='loadtest').values_list('username', flat=True)
+            ids = [int(name[len('loadtest'):]) for name in usernames if name[len('loadtest'):].isdigit()]
+            clinic_id = max(ids, default=None)
+        clinic = Clinic.objects.filter(id=clinic_id).first() if clinic_id else None
+        if clinic is None:
+            raise CommandError('Klinik bulunamadı. Önce "python manage.py generate_load_data" çalıştırın.')
+        return clinic
+
+    @override_settings(DEBUG=False)
+    def handle(self, *args, **options):
+        clinic = self.get_clinic(options['clinic'])
+        count = max(options['requests'], 1)
+        rng = random.Random(options['seed'])
+
+        dentist_ids = list(Dentist.objects.filter(clinic=clinic).order_by('id').values_list('id', flat=True))
+        patient_id = Patient.objects.filter(clinic=clinic).order_by('id').values_list('id', flat=True).first()
+        bounds = Appointment.objects.filter(clinic=clinic).aggregate(first=Min('start_time'), last=Max('start_time'))
+        if not dentist_ids or patient_id is None or bounds['first'] is None:
+            raise CommandError('Klinikte hekim, hasta ve randevu bulunmalıdır.')
+        first_day = timezone.localdate(bounds['first'])
+        span = (timezone.localdate(bounds['last']) - first_day).days
+        dates = [(first_day + timedelta(days=rng.randint(0, span))).isoformat() for _ in range(count)]
+
+        report = {
+            'environment': {
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'dataset': {
+                'clinic_id': clinic.id,
+                'dentists': len(dentist_ids),
+                'patients': Patient.objects.filter(clinic=clinic).count(),
+                'appointments': Appointment.objects.filter(clinic=clinic).count(),
+            },
+            'scenarios': {},
+        }
+
+        try:
+            with transaction.atomic():
+                report['scenarios'] = self.run_scenarios(clinic, dentist_ids, patient_id, bounds['last'], dates, count)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            local_cache.clear()
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fileobj:
+                fileobj.write(output + '\n')
+        self.stdout.write(output)
+
+    def run_scenarios(self, clinic, dentist_ids, patient_id, last_start, dates, count):
+        user = ClinicUser.objects.filter(username=f'loadtest{clinic.id}').first()
+        if user is None:
+            user = ClinicUser(username=f'loadtest{clinic.id}', clinic=clinic, role='admin')
+            user.set_password(LOADTEST_PASSWORD)
+            user.save()
+        token = Token.objects.get_or_create(user=user)[0]
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        anonymous = Client()
+
+        # Mevcut verinin bittiği günden sonraki boş slotlar, hekimler arasında dağıtılır
+        slots_per_day = (WORK_END_HOUR - WORK_START_HOUR) * 60 // SLOT_DURATION_MINUTES
+        free_from = timezone.localtime(last_start).replace(hour=WORK_START_HOUR, minute=0, second=0, microsecond=0)
+        free_from += timedelta(days=7)
+
+        def create(i):
+            i += 1  # ısınma isteği -1
+            slot = i // len(dentist_ids)
+            start = free_from + timedelta(days=slot // slots_per_day,
+                                          minutes=SLOT_DURATION_MINUTES * (slot % slots_per_day))
+            return client.post('/api/appointments/', {
+                'dentist': dentist_ids[i % len(dentist_ids)],
+                'patient': patient_id,
+                'start_time': start.isoformat(),
+                'end_time': (start + timedelta(minutes=SLOT_DURATION_MINUTES)).isoformat(),
+                'treatment_type': 'Kontrol',
+            }, content_type='application/json')
+
+        login_body = {'username': user.username, 'password': LOADTEST_PASSWORD}
+        scenarios = {
+            'login': (lambda i: anonymous.post('/api/auth/login/', login_body, content_type='application/json'),
+                      max(count // 10, 1)),
+            'check_availability': (lambda i: client.get('/api/check-availability/', {'date': dates[i]}), count),
+            'dashboard_stats': (lambda i: client.get('/api/dashboard-stats/'), count),
+            'appointment_list': (lambda i: client.get('/api/appointments/', {'date': dates[i]}), count),
+            'appointment_create': (create, count),
+        }
+        return {
+            name: run_scenario(make_request, requests)
+            for name, (make_request, requests) in scenarios.items()
+        }
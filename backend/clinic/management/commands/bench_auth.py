@@ -0,0 +1,68 @@
+"""
+Kimlik doğrulama maliyeti benchmark'ı.
+
+Aynı token ile /api/auth/me/ isteğini TokenAuthentication ve
+CachedTokenAuthentication ile tekrar tekrar çalıştırır; istek başına
+SQL sorgu sayısını ve ortalama süreyi raporlar. Test verisi
+transaction sonunda geri alınır.
+
+Kullanım: python manage.py bench_auth [--requests 2000]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from clinic import auth_views
+from clinic.authentication import CachedTokenAuthentication, local_cache
+from clinic.models import Clinic, ClinicUser
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Token kimlik doğrulamanın önbellekli ve önbelleksiz maliyetini karşılaştırır.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def measure(self, view, request_count, token):
+        factory = APIRequestFactory()
+        headers = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        view(factory.get('/api/auth/me/', **headers))  # ısınma
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = view(factory.get('/api/auth/me/', **headers))
+        assert response.status_code == 200, response.status_code
+        queries = len(ctx.captured_queries)
+
+        began = time.perf_counter()
+        for _ in range(request_count):
+            view(factory.get('/api/auth/me/', **headers))
+        elapsed = time.perf_counter() - began
+        return queries, elapsed / request_count * 1e6
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                clinic = Clinic.objects.create(name='Benchmark', address='-')
+                user = ClinicUser.objects.create_user('bench-auth', clinic=clinic)
+                token = Token.objects.create(user=user)
+
+                self.stdout.write(f"{'sınıf':<28} {'sorgu/istek':>12} {'µs/istek':>10}")
+                for auth_class in (TokenAuthentication, CachedTokenAuthentication):
+                    local_cache.clear()
+                    # me_view, kimlik doğrulama sınıfı değiştirilerek yeniden sarılır
+                    view = auth_views.me_view.cls.as_view(authentication_classes=[auth_class])
+                    queries, micros = self.measure(view, options['requests'], token)
+                    self.stdout.write(f"{auth_class.__name__:<28} {queries:>12} {micros:>10.1f}")
+                raise Rollback
+        except Rollback:
+            pass
+        local_cache.clear()
@@ -0,0 +1,142 @@
+"""
+Müsaitlik motoru mikro-benchmark'ı.
+
+Eski O(slot × randevu) taramasını (datetime slotlarıyla) hekim bazlı,
+derlenmiş slot şablonlarını kullanan bisect motoruyla 10, 100 ve 1.000
+günlük randevu için karşılaştırır. Ardından en erken boş slot aramasını
+(find_next_available) 20 hekim × 30 günlük, son güne kadar dolu bir
+takvimde ölçer. Veritabanı kullanılmaz.
+
+Kullanım: python manage.py bench_availability [--repeat 200] [--dentists 15]
+"""
+import random
+import timeit
+from datetime import date, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+
+from clinic.availability import build_day_slots, compute_availability, find_next_available
+
+
+def legacy_scan(slots, bookings, dentists):
+    """Eski check_availability döngüsü, hekim bazında çalıştırılmış hali."""
+    result = []
+    for dentist_id, dentist_name in dentists:
+        available_slots = []
+        booked_slots = []
+        for start_label, end_label, slot_start, slot_end in slots:
+            booking = None
+            for apt in bookings:
+                if apt['dentist_id'] != dentist_id:
+                    continue
+                if slot_start < apt['end_time'] and slot_end > apt['start_time']:
+                    booking = {'appointment_id': apt['id']}
+                    break
+            slot_data = {'start_time': start_label, 'end_time': end_label, 'is_available': booking is None}
+            if booking is None:
+                available_slots.append(slot_data)
+            else:
+                slot_data['booking'] = booking
+                booked_slots.append(slot_data)
+        result.append({'dentist_id': dentist_id, 'booked_slots': booked_slots,
+                       'available_slots': available_slots})
+    return result
+
+
+def make_bookings(slots, dentists, booking_count, rng):
+    """Hekimlere dağıtılmış, hekim içinde çakışmayan randevular üretir (veritabanındaki gibi UTC)."""
+    day_start = slots[0][2].astimezone(dt_timezone.utc)
+    day_end = slots[-1][3].astimezone(dt_timezone.utc)
+    cursors = {dentist_id: day_start for dentist_id, _ in dentists}
+    bookings = []
+    for apt_id in range(1, booking_count + 1):
+        dentist_id = dentists[apt_id % len(dentists)][0]
+        start = cursors[dentist_id] + timedelta(minutes=rng.choice((0, 0, 15, 30)))
+        end = start + timedelta(minutes=rng.choice((15, 30, 45)))
+        if end > day_end:
+            start, end = day_start, day_start + timedelta(minutes=15)
+        cursors[dentist_id] = end
+        bookings.append({
+            'id': apt_id,
+            'dentist_id': dentist_id,
+            'dentist__name': 'Hekim',
+            'patient__name': 'Hasta',
+            'start_time': start,
+            'end_time': end,
+            'treatment_type': '',
+        })
+    rng.shuffle(bookings)
+    return bookings
+
+
+def make_full_calendar(first_day, days, dentists):
+    """Her hekimin `days` gün boyunca tüm varsayılan slotlarının dolu olduğu randevular."""
+    bookings = []
+    for offset in range(days):
+        for start_label, end_label, start, end in build_day_slots(first_day + timedelta(days=offset)):
+            for dentist_id, _, _ in dentists:
+                bookings.append({
+                    'id': len(bookings) + 1,
+                    'dentist_id': dentist_id,
+                    'start_time': start.astimezone(dt_timezone.utc),
+                    'end_time': end.astimezone(dt_timezone.utc),
+                })
+    return bookings
+
+
+class Command(BaseCommand):
+    help = 'check_availability için eski tarama ile müsaitlik motorunu karşılaştırır.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument(
+            '--per-dentist', type=int, default=10,
+            help='Hekim başına günlük randevu sayısı (hekim sayısı buna göre ölçeklenir)'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        day = date(2026, 1, 5)
+        slots = build_day_slots(day)
+        repeat = options['repeat']
+
+        self.stdout.write(
+            f"{'randevu':>8} {'hekim':>6} {'eski (ms)':>12} {'motor (ms)':>12} {'hızlanma':>10}"
+        )
+        for booking_count in (10, 100, 1000):
+            dentist_count = max(1, booking_count // options['per_dentist'])
+            dentists = [(i, f'Hekim {i}') for i in range(1, dentist_count + 1)]
+            bookings = make_bookings(slots, dentists, booking_count, rng)
+
+            # Sonuçlar aynı olmalı
+            engine = compute_availability(day, bookings, dentists)
+            expected = legacy_scan(slots, bookings, dentists)
+            for dentist, legacy in zip(engine['dentists'], expected):
+                booked = [s['start_time'] for s in dentist['booked_slots']]
+                assert booked == [s['start_time'] for s in legacy['booked_slots']], (
+                    f"Sonuç uyuşmazlığı: hekim {dentist['dentist_id']}"
+                )
+
+            # Eski yol slotları her istekte datetime olarak yeniden oluşturuyordu
+            legacy_ms = min(timeit.repeat(
+                lambda: legacy_scan(build_day_slots(day), bookings, dentists), number=1, repeat=repeat)) * 1000
+            engine_ms = min(timeit.repeat(
+                lambda: compute_availability(day, bookings, dentists), number=1, repeat=repeat)) * 1000
+            self.stdout.write(
+                f"{booking_count:>8} {dentist_count:>6} {legacy_ms:>12.3f} {engine_ms:>12.3f} {legacy_ms / engine_ms:>9.1f}x"
+            )
+
+        # En erken boş slot: 29 gün dolu, ilk boş slotlar 30. günde
+        dentists = [(i, f'Hekim {i}', None) for i in range(1, 21)]
+        bookings = make_full_calendar(day, 29, dentists)
+        earliest = slots[0][2]
+        last_day = day + timedelta(days=29)
+        found = find_next_available(earliest, last_day, 60, bookings, dentists)
+        assert found and found[0][1].date() == last_day, "Beklenen ilk boş gün bulunamadı"
+        search_ms = min(timeit.repeat(
+            lambda: find_next_available(earliest, last_day, 60, bookings, dentists),
+            number=1, repeat=repeat)) * 1000
+        self.stdout.write(
+            f"\nEn erken boş slot (20 hekim, 30 gün, {len(bookings)} randevu): {search_ms:.3f} ms"
+        )
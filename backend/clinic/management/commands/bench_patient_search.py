@@ -0,0 +1,88 @@
+"""
+Hasta arama benchmark'ı.
+
+Tek bir geçici kliniğe sentetik (Türkçe karakterli) hastalar ekler ve
+search_patients() gecikmesini farklı sorgu türleri için ölçer (p50/p95).
+Tüm veri tek transaction içinde oluşturulur ve sonunda geri alınır.
+
+Kullanım: python manage.py bench_patient_search [--patients 500000] [--repeat 50]
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from clinic.loadgen import FIRST_NAMES, LAST_NAMES
+from clinic.models import Clinic, Patient
+from clinic.search import search_patients
+from clinic.management.commands.loadtest_booking import percentile
+
+
+QUERIES = {
+    'tek kelime': 'yildiri',
+    'ad + soyad': 'sule ozt',
+    'telefon öneki': '0532 41',
+    'ad + telefon': 'ayse 533 1',
+}
+INSERT_BATCH = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+def create_patients(clinic, count, seed=7):
+    rng = random.Random(seed)
+    batch = []
+    for i in range(count):
+        patient = Patient(
+            clinic=clinic,
+            name=f'{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            phone=f'05{rng.randint(30, 59)} {rng.randint(0, 9999999):07d}',
+        )
+        # bulk_create save() çağırmaz
+        patient.refresh_search_fields()
+        batch.append(patient)
+        if len(batch) >= INSERT_BATCH:
+            Patient.objects.bulk_create(batch)
+            batch = []
+    Patient.objects.bulk_create(batch)
+
+
+class Command(BaseCommand):
+    help = 'Hasta arama gecikmesini büyük bir klinikte ölçer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=500000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    @override_settings(DEBUG=False)
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                clinic = Clinic.objects.create(name='Arama Benchmark', address='-')
+                began = time.perf_counter()
+                create_patients(clinic, options['patients'])
+                self.stdout.write(
+                    f"{options['patients']} hasta {time.perf_counter() - began:.1f} sn'de eklendi "
+                    f"({connection.vendor})"
+                )
+                base = Patient.objects.for_clinic(clinic.id)
+
+                self.stdout.write(f"{'sorgu':<14} {'sonuç':>6} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+                for label, query in QUERIES.items():
+                    timings = []
+                    for _ in range(options['repeat']):
+                        started = time.perf_counter()
+                        results = list(search_patients(base, query))
+                        timings.append(time.perf_counter() - started)
+                    timings.sort()
+                    self.stdout.write(
+                        f"{label:<14} {len(results):>6} {percentile(timings, 50) * 1000:>9.2f} "
+                        f"{percentile(timings, 95) * 1000:>9.2f}"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,103 @@
+"""
+Toplu hatırlatma planlayıcı benchmark'ı.
+
+Geçici kliniklere sentetik randevular ekler, queue_reminders() çalıştırır ve
+süreyi ve Python tarafındaki en yüksek bellek kullanımını (tracemalloc)
+raporlar. Farklı randevu sayılarında en yüksek belleğin değişmemesi,
+belleğin parça boyutuyla sınırlı olduğunu gösterir. Tüm veri tek
+transaction içinde oluşturulur ve sonunda geri alınır.
+
+Kullanım: python manage.py bench_reminders [--appointments 10000 100000] [--clinics 20]
+"""
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from clinic.models import Clinic, Dentist, Patient, Appointment, OutboundMessage
+from clinic.reminders import DEFAULT_CHUNK_SIZE, queue_reminders
+
+
+# 09:00-17:00 arası 5 dakikalık randevular: hekim başına günde 96 randevu
+SLOT_MINUTES = 5
+SLOTS_PER_DENTIST = 96
+INSERT_BATCH = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+def create_dataset(appointment_count, clinic_count, target_date):
+    day_start = timezone.make_aware(timezone.datetime.combine(target_date, timezone.datetime.min.time()))
+    day_start += timedelta(hours=9)
+    dentist_count = -(-appointment_count // SLOTS_PER_DENTIST)
+
+    clinics = Clinic.objects.bulk_create(
+        [Clinic(name=f'Benchmark {i}', address='-') for i in range(clinic_count)]
+    )
+    dentists = Dentist.objects.bulk_create([
+        Dentist(clinic=clinics[i % clinic_count], name=f'Hekim {i}', phone='-', specialty='-')
+        for i in range(dentist_count)
+    ], batch_size=INSERT_BATCH)
+    patients = Patient.objects.bulk_create([
+        Patient(clinic=dentist.clinic, name=f'Hasta {i}', phone=f'0555{i:07d}')
+        for i, dentist in enumerate(dentists)
+    ], batch_size=INSERT_BATCH)
+
+    batch = []
+    for i in range(appointment_count):
+        dentist, patient = dentists[i // SLOTS_PER_DENTIST], patients[i // SLOTS_PER_DENTIST]
+        start = day_start + timedelta(minutes=SLOT_MINUTES * (i % SLOTS_PER_DENTIST))
+        batch.append(Appointment(
+            clinic_id=dentist.clinic_id, dentist=dentist, patient=patient,
+            start_time=start, end_time=start + timedelta(minutes=SLOT_MINUTES),
+        ))
+        if len(batch) >= INSERT_BATCH:
+            Appointment.objects.bulk_create(batch)
+            batch = []
+    Appointment.objects.bulk_create(batch)
+
+
+class Command(BaseCommand):
+    help = 'Toplu hatırlatma planlayıcının süre ve bellek kullanımını ölçer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--appointments', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--clinics', type=int, default=20)
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    @override_settings(DEBUG=False)  # DEBUG'da sorgu kaydı belleği şişirir
+    def handle(self, *args, **options):
+        target_date = timezone.localdate() + timedelta(days=1)
+        self.stdout.write(f"{'randevu':>8} {'kuyruk':>8} {'süre (sn)':>10} {'randevu/sn':>11} {'tepe bellek (MB)':>17}")
+
+        for count in options['appointments']:
+            try:
+                with transaction.atomic():
+                    create_dataset(count, options['clinics'], target_date)
+                    existing = OutboundMessage.objects.count()
+
+                    tracemalloc.start()
+                    began = time.perf_counter()
+                    result = queue_reminders(target_date, chunk_size=options['chunk_size'])
+                    elapsed = time.perf_counter() - began
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                    # Tekrar çalıştırma hiçbir şey eklememeli
+                    rerun = queue_reminders(target_date, chunk_size=options['chunk_size'])
+                    assert rerun['queued'] == 0, 'Tekrar çalıştırmada çift hatırlatma oluştu'
+                    assert OutboundMessage.objects.count() - existing == result['queued']
+                    raise Rollback
+            except Rollback:
+                pass
+
+            self.stdout.write(
+                f"{result['scanned']:>8} {result['queued']:>8} {elapsed:>10.2f} "
+                f"{result['scanned'] / elapsed:>11.0f} {peak / 1024 / 1024:>17.1f}"
+            )
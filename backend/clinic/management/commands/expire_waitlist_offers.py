@@ -0,0 +1,20 @@
+"""
+Süresi dolmuş bekleme listesi tekliflerini düşürür.
+
+Yanıtlanmayan teklifin kaydı yeniden beklemeye alınır ve aralık sıradaki
+uygun kayıtlara teklif edilir (bkz. clinic.waitlist.OFFER_TTL). Sık
+aralıklarla (örn. cron ile 5 dakikada bir) çalıştırılmalıdır.
+
+Kullanım: python manage.py expire_waitlist_offers
+"""
+from django.core.management.base import BaseCommand
+
+from clinic.waitlist import expire_offers
+
+
+class Command(BaseCommand):
+    help = 'Süresi dolmuş bekleme listesi tekliflerini düşürür ve aralıkları yeniden teklif eder.'
+
+    def handle(self, *args, **options):
+        expired = expire_offers()
+        self.stdout.write(self.style.SUCCESS(f"{expired} teklifin süresi doldu."))
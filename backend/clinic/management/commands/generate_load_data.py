@@ -0,0 +1,54 @@
+"""
+Performans ölçümleri için sentetik klinik verisi oluşturur (bkz. loadgen.py).
+
+Veri kalıcıdır; geliştirme/test veritabanında çalıştırılmalıdır (PostgreSQL
+için USE_POSTGRES=true ve DB_NAME). Aynı --seed ile aynı veri üretilir.
+
+Kullanım:
+    python manage.py generate_load_data [--clinics 1] [--dentists 10] [--patients 20000] [--years 3]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clinic.loadgen import LOADTEST_PASSWORD, generate_dataset
+
+
+class Command(BaseCommand):
+    help = 'Benchmark için ölçeklenebilir sentetik klinik verisi oluşturur.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clinics', type=int, default=1)
+        parser.add_argument('--dentists', type=int, default=10, help='Klinik başına hekim')
+        parser.add_argument('--patients', type=int, default=20000, help='Klinik başına hasta')
+        parser.add_argument('--years', type=float, default=3, help='Randevu geçmişi (yıl)')
+        parser.add_argument('--occupancy', type=float, default=0.6, help='Slot doluluk oranı (0-1)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not 0 < options['occupancy'] <= 1:
+            raise CommandError('--occupancy 0 ile 1 arasında olmalıdır.')
+        if min(options['clinics'], options['dentists'], options['patients']) < 1:
+            raise CommandError('--clinics, --dentists ve --patients en az 1 olmalıdır.')
+
+        began = time.perf_counter()
+
+        def progress(summary):
+            self.stdout.write(
+                f"Klinik {summary['clinic_ids'][-1]}: toplam {summary['patients']} hasta, "
+                f"{summary['appointments']} randevu ({time.perf_counter() - began:.1f} sn)"
+            )
+
+        summary = generate_dataset(
+            clinics=options['clinics'], dentists=options['dentists'], patients=options['patients'],
+            years=options['years'], occupancy=options['occupancy'], seed=options['seed'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(summary['clinic_ids'])} klinik, {summary['dentists']} hekim, {summary['patients']} hasta, "
+            f"{summary['appointments']} randevu oluşturuldu ({time.perf_counter() - began:.1f} sn)."
+        ))
+        self.stdout.write(
+            f"Kullanıcılar: loadtest<klinik id> / {LOADTEST_PASSWORD} "
+            f"(klinikler: {', '.join(map(str, summary['clinic_ids']))})"
+        )
@@ -0,0 +1,69 @@
+"""
+Başka bir sistemden toplu hasta veya randevu aktarımı.
+
+Dosya akış halinde okunur ve parça parça (varsayılan 5000 satır) yazılır;
+her parçadan sonra ilerleme yazdırılır. Hatalı satırlar atlanır ve sonda
+satır numaralarıyla listelenir. Önce hastalar, sonra randevular aktarılmalıdır
+(randevular hastayı telefon numarasıyla bulur).
+
+Kullanım:
+    python manage.py import_data patients hastalar.csv --clinic 1
+    python manage.py import_data appointments randevular.jsonl --clinic 1 [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clinic.importer import DEFAULT_CHUNK_SIZE, IMPORT_FORMATS, IMPORTERS, import_records, open_records
+from clinic.models import Clinic
+
+
+class Command(BaseCommand):
+    help = 'CSV/JSON dosyasından toplu hasta veya randevu aktarır.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--clinic', type=int, required=True)
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Varsayılan: dosya uzantısı')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Sadece doğrula, kayıt oluşturma')
+
+    def handle(self, *args, **options):
+        try:
+            clinic = Clinic.objects.get(id=options['clinic'])
+        except Clinic.DoesNotExist:
+            raise CommandError(f"Klinik bulunamadı: {options['clinic']}")
+
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format in ('jsonl', 'ndjson'):
+            file_format = 'json'
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError('Biçim anlaşılamadı; --format csv|json kullanın.')
+
+        began = time.perf_counter()
+
+        def progress(result):
+            elapsed = time.perf_counter() - began
+            self.stdout.write(
+                f"{result['processed']} satır işlendi, {result['created']} oluşturuldu, "
+                f"{result['duplicates']} tekrar, {result['failed']} hatalı "
+                f"({result['processed'] / elapsed:.0f} satır/sn)"
+            )
+
+        with open(options['path'], 'rb') as fileobj:
+            result = import_records(
+                options['kind'], clinic, open_records(fileobj, file_format),
+                chunk_size=options['chunk_size'], dry_run=options['dry_run'], progress=progress,
+            )
+
+        for error in result['errors']:
+            details = '; '.join(f'{field}: {message}' for field, message in error['errors'].items())
+            self.stderr.write(f"Satır {error['row']}: {details}")
+        if result['failed'] > len(result['errors']):
+            self.stderr.write(f"... ve {result['failed'] - len(result['errors'])} hatalı satır daha")
+
+        verb = 'doğrulandı' if options['dry_run'] else 'aktarıldı'
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} kayıt {verb} ({time.perf_counter() - began:.1f} sn)."
+        ))
@@ -0,0 +1,127 @@
+"""
+Randevu kayıt servisi eşzamanlılık yük testi.
+
+Birçok thread aynı hekimin aynı slotlarına aynı anda randevu almaya çalışır.
+Her slot için tam olarak bir randevunun oluştuğu doğrulanır; kayıt hızı
+(throughput) ve gecikme yüzdelikleri (p50/p99) raporlanır.
+
+Test verisi geçici bir klinik altında oluşturulur ve sonunda silinir.
+
+Kullanım: python manage.py loadtest_booking [--threads 16] [--slots 50]
+"""
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from clinic.booking import BookingConflict, save_appointment
+from clinic.models import Clinic, Dentist, Patient, Appointment
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def hammer_dentist(dentist, patients, slot_starts, threads, slot_minutes=30, seed=42):
+    """
+    `threads` thread'in her biri tüm slotlara (karışık sırada) randevu dener.
+
+    Returns:
+        dict: booked, conflicts, errors, latencies (saniye, sıralı), elapsed
+    """
+    results = {'booked': 0, 'conflicts': 0, 'errors': []}
+    latencies = []
+    guard = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        order = list(slot_starts)
+        rng.shuffle(order)
+        patient = patients[index % len(patients)]
+        local = {'booked': 0, 'conflicts': 0, 'latencies': []}
+        try:
+            barrier.wait()
+            for start in order:
+                appointment = Appointment(
+                    dentist=dentist, patient=patient,
+                    start_time=start, end_time=start + timedelta(minutes=slot_minutes),
+                )
+                began = time.perf_counter()
+                try:
+                    save_appointment(appointment)
+                    local['booked'] += 1
+                except BookingConflict:
+                    local['conflicts'] += 1
+                local['latencies'].append(time.perf_counter() - began)
+        except Exception as exc:  # raporlanır, thread'i sessizce öldürmez
+            with guard:
+                results['errors'].append(repr(exc))
+        finally:
+            connection.close()
+        with guard:
+            results['booked'] += local['booked']
+            results['conflicts'] += local['conflicts']
+            latencies.extend(local['latencies'])
+
+    began = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results['elapsed'] = time.perf_counter() - began
+    results['latencies'] = sorted(latencies)
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Aynı hekimin slotlarını çok sayıda thread ile eşzamanlı rezerve etmeye çalışır.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--slots', type=int, default=50)
+        parser.add_argument('--keep', action='store_true', help='Test verisini silme')
+
+    def handle(self, *args, **options):
+        threads, slot_count = options['threads'], options['slots']
+        clinic = Clinic.objects.create(name='Yük Testi Kliniği', address='-')
+        try:
+            dentist = Dentist.objects.create(clinic=clinic, name='Yük Testi', phone='-', specialty='-')
+            patients = [
+                Patient.objects.create(clinic=clinic, name=f'Yük Hasta {i}', phone='-')
+                for i in range(threads)
+            ]
+            day = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=365)
+            slot_starts = [day + timedelta(minutes=30 * i) for i in range(slot_count)]
+
+            result = hammer_dentist(dentist, patients, slot_starts, threads)
+
+            booked_rows = Appointment.objects.filter(dentist=dentist).count()
+        finally:
+            if not options['keep']:
+                clinic.delete()
+
+        attempts = threads * slot_count
+        latencies = result['latencies']
+        self.stdout.write(f"Veritabanı       : {connection.vendor}")
+        self.stdout.write(f"Thread / slot    : {threads} / {slot_count} ({attempts} deneme)")
+        self.stdout.write(f"Başarılı / çakışma: {result['booked']} / {result['conflicts']}")
+        self.stdout.write(f"Süre             : {result['elapsed']:.3f} sn")
+        self.stdout.write(f"Throughput       : {attempts / result['elapsed']:.1f} deneme/sn, "
+                          f"{result['booked'] / result['elapsed']:.1f} randevu/sn")
+        self.stdout.write(f"Gecikme p50/p99  : {percentile(latencies, 50) * 1000:.2f} / "
+                          f"{percentile(latencies, 99) * 1000:.2f} ms")
+
+        if result['errors']:
+            raise CommandError(f"{len(result['errors'])} thread hata verdi: {result['errors'][0]}")
+        if booked_rows != slot_count:
+            raise CommandError(f"Çift rezervasyon: {slot_count} slot için {booked_rows} randevu oluştu.")
+        self.stdout.write(self.style.SUCCESS('Çift rezervasyon yok.'))
@@ -0,0 +1,23 @@
+"""
+Abonelik kota sayaçlarını (QuotaCounter) randevu ve hekim tablolarıyla eşitler.
+
+Sayaçlar normal işleyişte artımlı güncellenir; bu komut sinyal tetiklemeyen
+toplu değişikliklerden kaynaklanabilecek sapmaları düzeltir. Periyodik
+olarak (örn. cron ile her gece) çalıştırılması önerilir.
+
+Kullanım: python manage.py reconcile_quota_counters [--clinic ID ...]
+"""
+from django.core.management.base import BaseCommand
+
+from clinic.quotas import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Abonelik kota sayaçlarını gerçek randevu ve hekim sayılarıyla eşitler.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clinic', type=int, action='append', help='Sadece bu klinik (tekrarlanabilir)')
+
+    def handle(self, *args, **options):
+        updated = reconcile_counters(clinic_ids=options['clinic'])
+        self.stdout.write(self.style.SUCCESS(f"{updated} kota sayacı yeniden hesaplandı."))
@@ -0,0 +1,35 @@
+"""
+Ertesi gün randevuları için hatırlatma SMS'lerini kuyruğa ekler.
+
+Günde bir kez (örn. cron ile 18:00'de) çalıştırılması yeterlidir; tekrar
+çalıştırmak aynı hatırlatmayı ikinci kez göndermez. Gönderimi
+send_sms_outbox worker'ı yapar.
+
+Kullanım: python manage.py send_appointment_reminders [--date YYYY-MM-DD]
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clinic.reminders import DEFAULT_CHUNK_SIZE, queue_reminders
+
+
+class Command(BaseCommand):
+    help = 'Ertesi gün randevuları için hatırlatma SMS\'lerini kuyruğa ekler.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Randevu günü (YYYY-MM-DD), varsayılan yarın')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        target_date = None
+        if options['date']:
+            try:
+                target_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Geçersiz tarih formatı. YYYY-MM-DD formatını kullanın.')
+
+        result = queue_reminders(target_date, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['scanned']} randevu tarandı, {result['queued']} hatırlatma kuyruğa eklendi."
+        ))
@@ -0,0 +1,39 @@
+"""
+SMS gönderim kuyruğu worker'ı.
+
+Bekleyen mesajları sağlayıcı bazında toplu gönderir, başarısızları
+üstel bekleme ile yeniden dener.
+
+Kullanım:
+    python manage.py send_sms_outbox            # sürekli çalışır
+    python manage.py send_sms_outbox --once     # kuyruğu bir kez işler
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from clinic.messaging import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = 'Giden SMS kuyruğundaki mesajları gönderir.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Kuyruğu bir kez işle ve çık')
+        parser.add_argument('--interval', type=float, default=2.0, help='Kuyruk boşken bekleme (sn)')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            result = dispatch_pending(batch_size=options['batch_size'], max_workers=options['workers'])
+            if result['claimed']:
+                self.stdout.write(
+                    f"gönderildi={result['sent']} tekrar={result['retried']} başarısız={result['failed']}"
+                )
+            if options['once']:
+                if not result['claimed']:
+                    break
+                continue
+            if not result['claimed']:
+                time.sleep(options['interval'])
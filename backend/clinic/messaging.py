@@ -0,0 +1,226 @@
+"""
+Giden SMS kuyruğu (outbox) ve gönderim altyapısı.
+
+İstek içinde mesajlar sadece OutboundMessage tablosuna yazılır (enqueue_sms).
+`send_sms_outbox` komutu bekleyen mesajları alır, sağlayıcı (provider) bazında
+gruplayıp toplu olarak gönderir; başarısız gönderimler üstel bekleme ile
+yeniden denenir.
+
+Sağlayıcılar settings.SMS_GATEWAYS ile tanımlanır:
+    SMS_GATEWAYS = {'mock': 'clinic.messaging.MockGateway'}
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# GATEWAYS
+# ============================================================================
+
+class BaseGateway:
+    """
+    SMS sağlayıcı arayüzü.
+
+    send_batch() her mesaj için, mesajlarla aynı sırada bir sonuç dict'i
+    döndürmelidir: {'success': bool, 'message_id': str, 'error': str}
+    """
+    def send_batch(self, messages):
+        raise NotImplementedError
+
+
+class MockGateway(BaseGateway):
+    """Geliştirme sağlayıcısı - mesajları sadece log'a yazar (bkz. utils.send_sms)."""
+
+    def send_batch(self, messages):
+        from .utils import send_sms
+        return [send_sms(message.phone, message.body) for message in messages]
+
+
+class FakeGateway(BaseGateway):
+    """
+    Testler için sahte sağlayıcı.
+
+    Gönderilen mesajlar `sent` listesinde tutulur; `fail_phones` içindeki
+    numaralara gönderim başarısız olur.
+    """
+    sent = []
+    batches = []
+    fail_phones = set()
+
+    @classmethod
+    def reset(cls):
+        cls.sent = []
+        cls.batches = []
+        cls.fail_phones = set()
+
+    def send_batch(self, messages):
+        FakeGateway.batches.append([message.id for message in messages])
+        results = []
+        for message in messages:
+            if message.phone in FakeGateway.fail_phones:
+                results.append({'success': False, 'error': 'fake failure'})
+            else:
+                FakeGateway.sent.append((message.phone, message.body))
+                results.append({'success': True, 'message_id': f'fake-{message.id}'})
+        return results
+
+
+def get_gateway(provider):
+    return import_string(settings.SMS_GATEWAYS[provider])()
+
+
+# ============================================================================
+# OUTBOX
+# ============================================================================
+
+def enqueue_sms(phone, body, patient=None, appointment=None, kind='other', provider=None, dedupe_key=None):
+    """
+    Mesajı gönderim kuyruğuna ekler.
+
+    Args:
+        phone: Alıcı telefon numarası
+        body: Mesaj metni
+        patient: (opsiyonel) Hasta; SMS izni yoksa mesaj kuyruğa eklenmez
+        appointment: (opsiyonel) İlgili randevu
+        kind: Mesaj türü (OutboundMessage.KIND_CHOICES)
+        provider: (opsiyonel) Sağlayıcı, varsayılan settings.SMS_DEFAULT_PROVIDER
+        dedupe_key: (opsiyonel) Aynı anahtarla kuyruğa daha önce eklenmiş
+            mesaj varsa yenisi eklenmez, mevcut kayıt döner
+
+    Returns:
+        OutboundMessage veya hasta SMS iznini kapattıysa None
+    """
+    if patient is not None and not patient.sms_consent:
+        return None
+
+    fields = {
+        'clinic_id': patient.clinic_id if patient is not None else None,
+        'patient': patient,
+        'appointment': appointment,
+        'kind': kind,
+        'provider': provider or settings.SMS_DEFAULT_PROVIDER,
+        'phone': phone,
+        'body': body,
+        'next_attempt_at': timezone.now(),
+    }
+    if dedupe_key:
+        message, _ = OutboundMessage.objects.get_or_create(dedupe_key=dedupe_key, defaults=fields)
+        return message
+    return OutboundMessage.objects.create(**fields)
+
+
+def retry_delay(attempts):
+    """Üstel bekleme: taban × 2^(deneme-1), SMS_RETRY_MAX_SECONDS ile sınırlı."""
+    return timedelta(seconds=min(
+        settings.SMS_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.SMS_RETRY_MAX_SECONDS,
+    ))
+
+
+def claim_due_messages(limit):
+    """
+    Gönderim zamanı gelmiş mesajları 'sending' durumuna alıp döndürür.
+
+    Çöken bir worker'ın 'sending' durumunda bıraktığı mesajlar
+    SMS_SENDING_LEASE_SECONDS sonra yeniden alınır.
+    """
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=settings.SMS_SENDING_LEASE_SECONDS)
+    with transaction.atomic():
+        due = OutboundMessage.objects.filter(
+            Q(status='pending', next_attempt_at__lte=now) |
+            Q(status='sending', updated_at__lt=lease_expired)
+        ).order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:limit])
+        OutboundMessage.objects.filter(id__in=ids).update(
+            status='sending', attempts=F('attempts') + 1, updated_at=now
+        )
+    return list(OutboundMessage.objects.filter(id__in=ids).order_by('provider', 'id'))
+
+
+def _send_chunk(provider, chunk):
+    try:
+        results = get_gateway(provider).send_batch(chunk)
+    except Exception as exc:
+        logger.exception("SMS gateway %s failed for %d messages", provider, len(chunk))
+        results = [{'success': False, 'error': repr(exc)}] * len(chunk)
+    return list(zip(chunk, results))
+
+
+def _record_results(sent_results):
+    now = timezone.now()
+    updated = []
+    for message, result in sent_results:
+        if result.get('success'):
+            message.status = 'sent'
+            message.sent_at = now
+            message.provider_message_id = result.get('message_id', '')
+            message.last_error = ''
+        elif message.attempts >= settings.SMS_MAX_ATTEMPTS:
+            message.status = 'failed'
+            message.last_error = result.get('error', '')
+        else:
+            message.status = 'pending'
+            message.next_attempt_at = now + retry_delay(message.attempts)
+            message.last_error = result.get('error', '')
+        message.updated_at = now
+        updated.append(message)
+
+    OutboundMessage.objects.bulk_update(
+        updated,
+        ['status', 'sent_at', 'provider_message_id', 'last_error', 'next_attempt_at', 'updated_at'],
+    )
+    return updated
+
+
+def dispatch_pending(limit=None, batch_size=None, max_workers=None):
+    """
+    Bekleyen mesajları sağlayıcı bazında toplu olarak gönderir.
+
+    Args:
+        limit: Bu çağrıda alınacak en fazla mesaj
+        batch_size: Sağlayıcıya tek seferde gönderilecek mesaj sayısı
+        max_workers: Paralel gönderim thread sayısı
+
+    Returns:
+        dict: claimed, sent, retried, failed sayıları
+    """
+    batch_size = batch_size or settings.SMS_BATCH_SIZE
+    messages = claim_due_messages(limit or batch_size * 10)
+    if not messages:
+        return {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+
+    chunks = []
+    for provider, group in groupby(messages, key=lambda message: message.provider):
+        group = list(group)
+        chunks.extend((provider, group[i:i + batch_size]) for i in range(0, len(group), batch_size))
+
+    with ThreadPoolExecutor(max_workers=max_workers or settings.SMS_WORKER_THREADS) as executor:
+        sent_results = [
+            pair
+            for chunk_results in executor.map(lambda item: _send_chunk(*item), chunks)
+            for pair in chunk_results
+        ]
+
+    updated = _record_results(sent_results)
+    statuses = [message.status for message in updated]
+    return {
+        'claimed': len(messages),
+        'sent': statuses.count('sent'),
+        'retried': statuses.count('pending'),
+        'failed': statuses.count('failed'),
+    }
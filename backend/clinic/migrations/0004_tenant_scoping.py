@@ -0,0 +1,42 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_appointment_clinic(apps, schema_editor):
+    Appointment = apps.get_model('clinic', 'Appointment')
+    Dentist = apps.get_model('clinic', 'Dentist')
+    for dentist_id, clinic_id in Dentist.objects.values_list('id', 'clinic_id').iterator():
+        Appointment.objects.filter(dentist_id=dentist_id).update(clinic_id=clinic_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0003_appointment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='clinic',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='appointments', to='clinic.clinic', verbose_name='Klinik'),
+        ),
+        migrations.RunPython(populate_appointment_clinic, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='appointment',
+            name='clinic',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='appointments', to='clinic.clinic', verbose_name='Klinik'),
+        ),
+        migrations.AddIndex(
+            model_name='dentist',
+            index=models.Index(fields=['clinic', 'is_active', 'name'], name='dentist_clinic_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['clinic', 'name'], name='patient_clinic_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['clinic', 'start_time', 'status'], name='appt_clinic_start_status_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+"""
+PostgreSQL'de aynı hekimin aktif randevularının çakışmasını veritabanı
+seviyesinde engelleyen exclusion constraint. Diğer veritabanlarında
+bu migration bir şey yapmaz; koruma clinic.booking servisindedir.
+"""
+from django.db import migrations
+
+
+CREATE_CONSTRAINT = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE clinic_appointment ADD CONSTRAINT appt_no_overlap EXCLUDE USING gist (
+    dentist_id WITH =,
+    tstzrange(start_time, end_time, '[)') WITH &&
+) WHERE (status IN ('scheduled', 'confirmed'));
+"""
+
+DROP_CONSTRAINT = "ALTER TABLE clinic_appointment DROP CONSTRAINT IF EXISTS appt_no_overlap;"
+
+
+def add_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_CONSTRAINT)
+
+
+def remove_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0004_tenant_scoping'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_constraint, remove_constraint),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0005_appointment_no_overlap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('confirmation', 'Randevu Onayı'), ('reminder', 'Hatırlatma'), ('cancellation', 'İptal'), ('other', 'Diğer')], default='other', max_length=20, verbose_name='Tür')),
+                ('provider', models.CharField(max_length=50, verbose_name='Sağlayıcı')),
+                ('phone', models.CharField(max_length=20, verbose_name='Telefon')),
+                ('body', models.TextField(verbose_name='Mesaj')),
+                ('status', models.CharField(choices=[('pending', 'Bekliyor'), ('sending', 'Gönderiliyor'), ('sent', 'Gönderildi'), ('failed', 'Başarısız')], default='pending', max_length=20, verbose_name='Durum')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('next_attempt_at', models.DateTimeField(verbose_name='Sonraki Deneme')),
+                ('last_error', models.TextField(blank=True, verbose_name='Son Hata')),
+                ('provider_message_id', models.CharField(blank=True, max_length=100, verbose_name='Sağlayıcı Mesaj ID')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Gönderilme Zamanı')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('appointment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbound_messages', to='clinic.appointment', verbose_name='Randevu')),
+                ('clinic', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbound_messages', to='clinic.clinic', verbose_name='Klinik')),
+                ('patient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbound_messages', to='clinic.patient', verbose_name='Hasta')),
+            ],
+            options={
+                'verbose_name': 'Giden Mesaj',
+                'verbose_name_plural': 'Giden Mesajlar',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx')],
+            },
+        ),
+    ]
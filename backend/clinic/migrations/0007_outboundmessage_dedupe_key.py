@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0006_outboundmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundmessage',
+            name='dedupe_key',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True, verbose_name='Tekillik Anahtarı'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0007_outboundmessage_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DentistStatRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Günlük'), ('month', 'Aylık')], max_length=5, verbose_name='Dönem')),
+                ('period_start', models.DateField(verbose_name='Dönem Başlangıcı')),
+                ('treatment_type', models.CharField(blank=True, max_length=100, verbose_name='Tedavi Türü')),
+                ('status', models.CharField(choices=[('scheduled', 'Planlandı'), ('confirmed', 'Onaylandı'), ('completed', 'Tamamlandı'), ('cancelled', 'İptal Edildi'), ('no_show', 'Gelmedi')], max_length=20, verbose_name='Durum')),
+                ('appointment_count', models.IntegerField(default=0, verbose_name='Randevu Sayısı')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Tedavi Ücreti Toplamı')),
+                ('booked_minutes', models.IntegerField(default=0, verbose_name='Randevu Süresi (dk)')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stat_rollups', to='clinic.clinic', verbose_name='Klinik')),
+                ('dentist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stat_rollups', to='clinic.dentist', verbose_name='Diş Hekimi')),
+            ],
+            options={
+                'verbose_name': 'Hekim İstatistik Özeti',
+                'verbose_name_plural': 'Hekim İstatistik Özetleri',
+                'indexes': [models.Index(fields=['clinic', 'period', 'period_start'], name='rollup_clinic_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dentist', 'period', 'period_start', 'treatment_type', 'status'), name='rollup_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,113 @@
+"""
+Hasta arama alanları (search_name, phone_key) ve indeksleri.
+
+PostgreSQL'de iki alan için pg_trgm GIN indeksleri oluşturulur. SQLite'taki
+FTS5 tablosu migrate sonrasında clinic.search.install_sqlite_search_index
+ile kurulur (bkz. signals.py).
+
+fold_text ve phone_key, bu migration yazıldığı andaki halleriyle buraya
+kopyalanmıştır; clinic.search'teki sonraki değişiklikler eski
+veritabanlarının doldurulmasını etkilemez.
+"""
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+_DIGIT_RE = re.compile(r'[0-9]')
+
+
+def fold_text(value):
+    value = (value or '').replace('ı', 'i').replace('İ', 'I')
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(char for char in value if not unicodedata.combining(char)).lower()
+    return ' '.join(_TOKEN_RE.findall(value))
+
+
+def phone_key(value):
+    digits = ''.join(_DIGIT_RE.findall(value or ''))
+    if len(digits) == 12 and digits.startswith('90'):
+        return digits[2:]
+    if len(digits) == 11 and digits.startswith('0'):
+        return digits[1:]
+    return digits
+
+
+CREATE_TRGM_INDEXES = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS patient_search_name_trgm ON clinic_patient USING gin (search_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS patient_phone_key_trgm ON clinic_patient USING gin (phone_key gin_trgm_ops);
+"""
+
+DROP_TRGM_INDEXES = """
+DROP INDEX IF EXISTS patient_search_name_trgm;
+DROP INDEX IF EXISTS patient_phone_key_trgm;
+"""
+
+# Geri alırken search_name sütunu silinmeden önce SQLite FTS5 tablosu ve
+# tetikleyicileri kaldırılır (tetikleyiciler sütuna başvurur)
+DROP_SQLITE_FTS = (
+    "DROP TRIGGER IF EXISTS clinic_patient_fts_ai",
+    "DROP TRIGGER IF EXISTS clinic_patient_fts_ad",
+    "DROP TRIGGER IF EXISTS clinic_patient_fts_au",
+    "DROP TABLE IF EXISTS clinic_patient_fts",
+)
+
+
+def populate_search_fields(apps, schema_editor):
+    Patient = apps.get_model('clinic', 'Patient')
+    batch = []
+    for patient in Patient.objects.only('id', 'name', 'phone').iterator(chunk_size=2000):
+        patient.search_name = fold_text(patient.name)
+        patient.phone_key = phone_key(patient.phone)
+        batch.append(patient)
+        if len(batch) >= 2000:
+            Patient.objects.bulk_update(batch, ['search_name', 'phone_key'])
+            batch = []
+    if batch:
+        Patient.objects.bulk_update(batch, ['search_name', 'phone_key'])
+
+
+def add_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRGM_INDEXES)
+
+
+def remove_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRGM_INDEXES)
+    elif schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_SQLITE_FTS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0008_dentiststatrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='phone_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(populate_search_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['clinic', 'phone_key'], name='patient_clinic_phone_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['clinic', 'search_name'], name='patient_clinic_search_idx'),
+        ),
+        migrations.RunPython(add_trgm_indexes, remove_trgm_indexes),
+    ]
@@ -0,0 +1,52 @@
+"""
+Mobil senkron değişiklik günlüğü (SyncChange).
+
+Mevcut randevu, hasta ve hekimler için birer günlük satırı eklenir; böylece
+ilk senkron (cursor=0) tüm veriyi günlük üzerinden alır (bkz. clinic.sync).
+"""
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def log_existing_rows(apps, schema_editor):
+    # Bu migration anındaki şema ile sabitlenmiş INSERT ... SELECT
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    SyncChange = apps.get_model('clinic', 'SyncChange')
+    changed_at = SyncChange._meta.get_field('changed_at').get_db_prep_save(timezone.now(), connection)
+    with connection.cursor() as cursor:
+        for kind in ('dentist', 'patient', 'appointment'):
+            source_table = apps.get_model('clinic', kind)._meta.db_table
+            cursor.execute(
+                f"INSERT INTO {quote(SyncChange._meta.db_table)} (clinic_id, kind, object_id, deleted, changed_at) "
+                f"SELECT clinic_id, %s, id, %s, %s FROM {quote(source_table)} ORDER BY id",
+                [kind, False, changed_at],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0009_patient_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('appointment', 'Randevu'), ('patient', 'Hasta'), ('dentist', 'Diş Hekimi')], max_length=20, verbose_name='Kayıt Türü')),
+                ('object_id', models.BigIntegerField(verbose_name='Kayıt ID')),
+                ('deleted', models.BooleanField(default=False, verbose_name='Silindi')),
+                ('changed_at', models.DateTimeField(auto_now=True, verbose_name='Değişiklik Zamanı')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_changes', to='clinic.clinic', verbose_name='Klinik')),
+            ],
+            options={
+                'verbose_name': 'Senkronizasyon Değişikliği',
+                'verbose_name_plural': 'Senkronizasyon Değişiklikleri',
+                'indexes': [models.Index(fields=['clinic', 'id'], name='sync_clinic_id_idx'), models.Index(fields=['kind', 'object_id'], name='sync_kind_object_idx')],
+            },
+        ),
+        migrations.RunPython(log_existing_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0010_sync_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuotaCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('appointments', 'Aylık Randevu'), ('dentists', 'Aktif Hekim')], max_length=20, verbose_name='Kaynak')),
+                ('period_start', models.DateField(blank=True, null=True, verbose_name='Dönem Başlangıcı')),
+                ('value', models.IntegerField(default=0, verbose_name='Değer')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quota_counters', to='clinic.clinic', verbose_name='Klinik')),
+            ],
+            options={
+                'verbose_name': 'Kota Sayacı',
+                'verbose_name_plural': 'Kota Sayaçları',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('period_start__isnull', False)), fields=('clinic', 'resource', 'period_start'), name='quota_counter_period_unique'), models.UniqueConstraint(condition=models.Q(('period_start__isnull', True)), fields=('clinic', 'resource'), name='quota_counter_unique')],
+            },
+        ),
+    ]
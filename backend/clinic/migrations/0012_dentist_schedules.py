@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0011_quota_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DentistLeave',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(verbose_name='Başlangıç Tarihi')),
+                ('end_date', models.DateField(verbose_name='Bitiş Tarihi')),
+                ('reason', models.CharField(blank=True, max_length=200, verbose_name='Açıklama')),
+                ('dentist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaves', to='clinic.dentist', verbose_name='Diş Hekimi')),
+            ],
+            options={
+                'verbose_name': 'Hekim İzni',
+                'verbose_name_plural': 'Hekim İzinleri',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleBreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Pazartesi'), (1, 'Salı'), (2, 'Çarşamba'), (3, 'Perşembe'), (4, 'Cuma'), (5, 'Cumartesi'), (6, 'Pazar')], null=True, verbose_name='Gün')),
+                ('start_time', models.TimeField(verbose_name='Başlangıç')),
+                ('end_time', models.TimeField(verbose_name='Bitiş')),
+                ('dentist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_breaks', to='clinic.dentist', verbose_name='Diş Hekimi')),
+            ],
+            options={
+                'verbose_name': 'Mola',
+                'verbose_name_plural': 'Molalar',
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkingHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Pazartesi'), (1, 'Salı'), (2, 'Çarşamba'), (3, 'Perşembe'), (4, 'Cuma'), (5, 'Cumartesi'), (6, 'Pazar')], verbose_name='Gün')),
+                ('start_time', models.TimeField(verbose_name='Başlangıç')),
+                ('end_time', models.TimeField(verbose_name='Bitiş')),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30, verbose_name='Slot Süresi (dk)')),
+                ('dentist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to='clinic.dentist', verbose_name='Diş Hekimi')),
+            ],
+            options={
+                'verbose_name': 'Çalışma Saati',
+                'verbose_name_plural': 'Çalışma Saatleri',
+                'ordering': ['dentist', 'weekday', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('name', models.CharField(blank=True, max_length=200, verbose_name='Ad')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='clinic.clinic', verbose_name='Klinik')),
+            ],
+            options={
+                'verbose_name': 'Tatil',
+                'verbose_name_plural': 'Tatiller',
+                'constraints': [models.UniqueConstraint(fields=('clinic', 'date'), name='holiday_clinic_date_unique')],
+            },
+        ),
+    ]
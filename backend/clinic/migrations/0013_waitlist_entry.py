@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0012_dentist_schedules'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboundmessage',
+            name='kind',
+            field=models.CharField(choices=[('confirmation', 'Randevu Onayı'), ('reminder', 'Hatırlatma'), ('cancellation', 'İptal'), ('waitlist', 'Bekleme Listesi Teklifi'), ('other', 'Diğer')], default='other', max_length=20, verbose_name='Tür'),
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('treatment_type', models.CharField(blank=True, max_length=100, verbose_name='Tedavi Türü')),
+                ('duration_minutes', models.PositiveSmallIntegerField(default=30, verbose_name='Süre (dk)')),
+                ('window_start', models.DateTimeField(verbose_name='Pencere Başlangıcı')),
+                ('window_end', models.DateTimeField(verbose_name='Pencere Bitişi')),
+                ('status', models.CharField(choices=[('waiting', 'Bekliyor'), ('offered', 'Teklif Edildi'), ('booked', 'Randevu Verildi'), ('cancelled', 'İptal Edildi')], default='waiting', max_length=20, verbose_name='Durum')),
+                ('offer_start', models.DateTimeField(blank=True, null=True, verbose_name='Teklif Başlangıcı')),
+                ('offer_end', models.DateTimeField(blank=True, null=True, verbose_name='Teklif Bitişi')),
+                ('offered_at', models.DateTimeField(blank=True, null=True, verbose_name='Teklif Zamanı')),
+                ('notes', models.TextField(blank=True, verbose_name='Notlar')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('appointment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='clinic.appointment', verbose_name='Randevu')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='clinic.clinic', verbose_name='Klinik')),
+                ('dentist', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='clinic.dentist', verbose_name='Tercih Edilen Hekim')),
+                ('offer_dentist', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='clinic.dentist', verbose_name='Teklif Edilen Hekim')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='clinic.patient', verbose_name='Hasta')),
+            ],
+            options={
+                'verbose_name': 'Bekleme Listesi Kaydı',
+                'verbose_name_plural': 'Bekleme Listesi',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['dentist', 'status', 'window_start'], name='waitlist_dentist_window_idx'), models.Index(fields=['clinic', 'status', 'window_start'], name='waitlist_clinic_window_idx')],
+            },
+        ),
+    ]
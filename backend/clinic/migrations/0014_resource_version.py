@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0013_waitlist_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=20, verbose_name='Kaynak')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Sürüm')),
+                ('changed_at', models.DateTimeField(verbose_name='Değişiklik Zamanı')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resource_versions', to='clinic.clinic', verbose_name='Klinik')),
+            ],
+            options={
+                'verbose_name': 'Kaynak Sürümü',
+                'verbose_name_plural': 'Kaynak Sürümleri',
+                'constraints': [models.UniqueConstraint(fields=('clinic', 'resource'), name='resource_version_unique')],
+            },
+        ),
+    ]
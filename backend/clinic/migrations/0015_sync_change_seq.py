@@ -0,0 +1,51 @@
+"""
+Senkron imlecinin commit sırasını izlemesi için SyncChange.seq.
+
+Mevcut satırların seq değeri id'leridir; böylece istemcilerin elindeki
+(id tabanlı) imleçler geçerli kalır. Her kliniğin değişiklik sayacı
+(ResourceVersion, resource='sequence') en az kliniğin son seq değerinden
+başlatılır.
+"""
+from django.db import migrations, models
+from django.db.models import Max
+from django.utils import timezone
+
+
+def backfill_seq(apps, schema_editor):
+    SyncChange = apps.get_model('clinic', 'SyncChange')
+    ResourceVersion = apps.get_model('clinic', 'ResourceVersion')
+    SyncChange.objects.update(seq=models.F('id'))
+    now = timezone.now()
+    for row in SyncChange.objects.order_by().values('clinic_id').annotate(last=Max('seq')):
+        counter, created = ResourceVersion.objects.get_or_create(
+            clinic_id=row['clinic_id'], resource='sequence',
+            defaults={'version': row['last'], 'changed_at': now},
+        )
+        if not created and counter.version < row['last']:
+            counter.version = row['last']
+            counter.save(update_fields=['version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0014_resource_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncchange',
+            name='seq',
+            field=models.BigIntegerField(default=0, verbose_name='Sıra'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_seq, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='syncchange',
+            name='sync_clinic_id_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='syncchange',
+            constraint=models.UniqueConstraint(fields=('clinic', 'seq'), name='sync_clinic_seq_unique'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic', '0015_sync_change_seq'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='syncchange',
+            name='sync_clinic_seq_unique',
+        ),
+        migrations.AddIndex(
+            model_name='syncchange',
+            index=models.Index(fields=['clinic', 'seq'], name='sync_clinic_seq_idx'),
+        ),
+    ]
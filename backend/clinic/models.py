@@ -4,6 +4,9 @@ Models for multi-tenant dental clinic SaaS system.
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from . import search
+from .tenancy import ClinicQuerySet, TenantQuerySet
+
 
 # ============================================================================
 # AUTH & USER MODELS
@@ -68,6 +71,8 @@ class Clinic(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ClinicQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Klinik"
         verbose_name_plural = "Klinikler"
@@ -114,6 +119,52 @@ class ClinicSubscription(models.Model):
         return f"{self.clinic.name} - {self.get_plan_display()}"
 
 
+class QuotaCounter(models.Model):
+    """
+    Abonelik kotaları için klinik bazlı kullanım sayaçları.
+
+    Aylık randevu sayısı (randevunun başladığı yerel ay) ve aktif hekim
+    sayısı tutulur. Sayaçlar randevu/hekim oluşturulurken F() ifadeleriyle
+    atomik olarak artırılır; böylece kota kontrolü COUNT sorgusu gerektirmez.
+    `reconcile_quota_counters` komutu sayaçları gerçek verilerle eşitler
+    (bkz. quotas.py).
+    """
+    RESOURCE_CHOICES = [
+        ('appointments', 'Aylık Randevu'),
+        ('dentists', 'Aktif Hekim'),
+    ]
+
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='quota_counters',
+        verbose_name="Klinik"
+    )
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES, verbose_name="Kaynak")
+    # Aylık sayaçlarda ayın ilk günü (yerel saat); dönemsiz sayaçlarda boş
+    period_start = models.DateField(null=True, blank=True, verbose_name="Dönem Başlangıcı")
+    value = models.IntegerField(default=0, verbose_name="Değer")
+
+    class Meta:
+        verbose_name = "Kota Sayacı"
+        verbose_name_plural = "Kota Sayaçları"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['clinic', 'resource', 'period_start'],
+                condition=models.Q(period_start__isnull=False),
+                name='quota_counter_period_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['clinic', 'resource'],
+                condition=models.Q(period_start__isnull=True),
+                name='quota_counter_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.clinic_id} {self.resource} {self.period_start or ''}: {self.value}"
+
+
 # ============================================================================
 # DENTIST & PATIENT MODELS
 # ============================================================================
@@ -134,9 +185,21 @@ class Dentist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Diş Hekimi"
         verbose_name_plural = "Diş Hekimleri"
+        indexes = [
+            models.Index(fields=['clinic', 'is_active', 'name'], name='dentist_clinic_active_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Aktif hekim kotası sayacının (quotas.py) güncellenmesi için
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
     def __str__(self):
         return f"Dr. {self.name} - {self.specialty}"
@@ -188,14 +251,152 @@ class Patient(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Arama alanları (bkz. search.py) - save() sırasında doldurulur
+    search_name = models.CharField(max_length=200, blank=True, default='', editable=False)
+    phone_key = models.CharField(max_length=20, blank=True, default='', editable=False)
+
+    objects = TenantQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Hasta"
         verbose_name_plural = "Hastalar"
+        indexes = [
+            models.Index(fields=['clinic', 'name'], name='patient_clinic_name_idx'),
+            # Hasta arama: telefon öneki ve ada göre sıralı tarama (bkz. search.py)
+            models.Index(fields=['clinic', 'phone_key'], name='patient_clinic_phone_key_idx'),
+            models.Index(fields=['clinic', 'search_name'], name='patient_clinic_search_idx'),
+        ]
+
+    def refresh_search_fields(self):
+        self.search_name = search.fold_text(self.name)
+        self.phone_key = search.phone_key(self.phone)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'phone'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'search_name', 'phone_key'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
+# ============================================================================
+# SCHEDULE MODELS
+# ============================================================================
+
+WEEKDAY_CHOICES = [
+    (0, 'Pazartesi'),
+    (1, 'Salı'),
+    (2, 'Çarşamba'),
+    (3, 'Perşembe'),
+    (4, 'Cuma'),
+    (5, 'Cumartesi'),
+    (6, 'Pazar'),
+]
+
+
+class DentistScheduleQuerySet(TenantQuerySet):
+    tenant_field = 'dentist__clinic_id'
+
+
+class WorkingHours(models.Model):
+    """
+    Hekimin haftalık çalışma saatleri. Bir gün için birden fazla aralık
+    tanımlanabilir (örn. 09:00-12:00 ve 14:00-18:00). Hiç kaydı olmayan
+    hekim varsayılan saatlerle çalışır (bkz. schedules.py).
+    """
+    dentist = models.ForeignKey(
+        Dentist,
+        on_delete=models.CASCADE,
+        related_name='working_hours',
+        verbose_name="Diş Hekimi"
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, verbose_name="Gün")
+    start_time = models.TimeField(verbose_name="Başlangıç")
+    end_time = models.TimeField(verbose_name="Bitiş")
+    slot_minutes = models.PositiveSmallIntegerField(default=30, verbose_name="Slot Süresi (dk)")
+
+    objects = DentistScheduleQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Çalışma Saati"
+        verbose_name_plural = "Çalışma Saatleri"
+        ordering = ['dentist', 'weekday', 'start_time']
+
+    def __str__(self):
+        return f"{self.dentist_id} {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class ScheduleBreak(models.Model):
+    """Hekimin tekrarlayan molası (örn. öğle arası). Gün boşsa her gün uygulanır."""
+    dentist = models.ForeignKey(
+        Dentist,
+        on_delete=models.CASCADE,
+        related_name='schedule_breaks',
+        verbose_name="Diş Hekimi"
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, null=True, blank=True, verbose_name="Gün")
+    start_time = models.TimeField(verbose_name="Başlangıç")
+    end_time = models.TimeField(verbose_name="Bitiş")
+
+    objects = DentistScheduleQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Mola"
+        verbose_name_plural = "Molalar"
+
+    def __str__(self):
+        return f"{self.dentist_id} mola {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class DentistLeave(models.Model):
+    """Hekim izni (başlangıç ve bitiş günleri dahil)."""
+    dentist = models.ForeignKey(
+        Dentist,
+        on_delete=models.CASCADE,
+        related_name='leaves',
+        verbose_name="Diş Hekimi"
+    )
+    start_date = models.DateField(verbose_name="Başlangıç Tarihi")
+    end_date = models.DateField(verbose_name="Bitiş Tarihi")
+    reason = models.CharField(max_length=200, blank=True, verbose_name="Açıklama")
+
+    objects = DentistScheduleQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Hekim İzni"
+        verbose_name_plural = "Hekim İzinleri"
+
+    def __str__(self):
+        return f"{self.dentist_id} izin {self.start_date} - {self.end_date}"
+
+
+class Holiday(models.Model):
+    """Kliniğin kapalı olduğu gün (resmi tatil vb.); tüm hekimler için geçerlidir."""
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='holidays',
+        verbose_name="Klinik"
+    )
+    date = models.DateField(verbose_name="Tarih")
+    name = models.CharField(max_length=200, blank=True, verbose_name="Ad")
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Tatil"
+        verbose_name_plural = "Tatiller"
+        constraints = [
+            models.UniqueConstraint(fields=['clinic', 'date'], name='holiday_clinic_date_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.name}"
+
+
 # ============================================================================
 # APPOINTMENT MODEL
 # ============================================================================
@@ -210,6 +411,15 @@ class Appointment(models.Model):
         ('no_show', 'Gelmedi'),
     ]
 
+    # Hekimin kliniğinden türetilir (save sırasında); tenant sorguları
+    # Dentist tablosuna join yapmadan filtrelenebilsin diye tutulur.
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='appointments',
+        verbose_name="Klinik",
+        editable=False
+    )
     dentist = models.ForeignKey(
         Dentist, 
         on_delete=models.CASCADE, 
@@ -242,10 +452,338 @@ class Appointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Randevu"
         verbose_name_plural = "Randevular"
         ordering = ['start_time']
+        indexes = [
+            # Çakışma kontrolü ve hekim bazlı müsaitlik sorguları
+            models.Index(fields=['dentist', 'start_time', 'status'], name='appt_dentist_start_status_idx'),
+            # Durum + tarih aralığı (müsaitlik, dashboard)
+            models.Index(fields=['status', 'start_time'], name='appt_status_start_idx'),
+            # Sadece tarih aralığı (randevu listesi, dashboard)
+            models.Index(fields=['start_time'], name='appt_start_idx'),
+            # Klinik bazlı liste ve dashboard sorguları
+            models.Index(fields=['clinic', 'start_time', 'status'], name='appt_clinic_start_status_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Rapor özetlerinin (rollups.py) artımlı güncellenmesi için
+        # kaydın veritabanından okunduğu hali saklanır
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.dentist_id:
+            self.clinic_id = self.dentist.clinic_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.patient.name} - Dr. {self.dentist.name} ({self.start_time.strftime('%d.%m.%Y %H:%M')})"
+
+
+# ============================================================================
+# WAITLIST MODEL
+# ============================================================================
+
+class WaitlistEntry(models.Model):
+    """
+    Bekleme listesi kaydı: hastanın tercih ettiği hekim (boşsa kliniğin
+    herhangi bir hekimi), kabul edebileceği zaman penceresi ve tedavi süresi.
+    İptal edilen randevuların boşalttığı slotlar bu kayıtlara SMS ile
+    teklif edilir (bkz. waitlist.py).
+    """
+    STATUS_CHOICES = [
+        ('waiting', 'Bekliyor'),
+        ('offered', 'Teklif Edildi'),
+        ('booked', 'Randevu Verildi'),
+        ('cancelled', 'İptal Edildi'),
+    ]
+
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name="Klinik"
+    )
+    patient = models.ForeignKey(
+        Patient,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name="Hasta"
+    )
+    dentist = models.ForeignKey(
+        Dentist,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name="Tercih Edilen Hekim",
+        null=True,
+        blank=True
+    )
+    treatment_type = models.CharField(max_length=100, blank=True, verbose_name="Tedavi Türü")
+    duration_minutes = models.PositiveSmallIntegerField(default=30, verbose_name="Süre (dk)")
+    window_start = models.DateTimeField(verbose_name="Pencere Başlangıcı")
+    window_end = models.DateTimeField(verbose_name="Pencere Bitişi")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting', verbose_name="Durum")
+    # Son teklif (teklif edildiğinde dolar)
+    offer_dentist = models.ForeignKey(
+        Dentist,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name="Teklif Edilen Hekim",
+        null=True,
+        blank=True
+    )
+    offer_start = models.DateTimeField(null=True, blank=True, verbose_name="Teklif Başlangıcı")
+    offer_end = models.DateTimeField(null=True, blank=True, verbose_name="Teklif Bitişi")
+    offered_at = models.DateTimeField(null=True, blank=True, verbose_name="Teklif Zamanı")
+    appointment = models.ForeignKey(
+        Appointment,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name="Randevu",
+        null=True,
+        blank=True
+    )
+    notes = models.TextField(blank=True, verbose_name="Notlar")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Bekleme Listesi Kaydı"
+        verbose_name_plural = "Bekleme Listesi"
+        ordering = ['created_at']
+        indexes = [
+            # Boşalan slot eşleştirmesi: hekime özel kayıtlar
+            models.Index(fields=['dentist', 'status', 'window_start'], name='waitlist_dentist_window_idx'),
+            # Boşalan slot eşleştirmesi: hekim tercihi olmayan kayıtlar ve klinik listesi
+            models.Index(fields=['clinic', 'status', 'window_start'], name='waitlist_clinic_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.patient_id} bekleme ({self.get_status_display()})"
+
+
+# ============================================================================
+# MESSAGING MODELS
+# ============================================================================
+
+class OutboundMessage(models.Model):
+    """
+    Giden SMS kuyruğu (outbox).
+    Mesajlar istek içinde sadece kuyruğa yazılır; gönderimi
+    `send_sms_outbox` komutu (worker) toplu olarak yapar.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Bekliyor'),
+        ('sending', 'Gönderiliyor'),
+        ('sent', 'Gönderildi'),
+        ('failed', 'Başarısız'),
+    ]
+    KIND_CHOICES = [
+        ('confirmation', 'Randevu Onayı'),
+        ('reminder', 'Hatırlatma'),
+        ('cancellation', 'İptal'),
+        ('waitlist', 'Bekleme Listesi Teklifi'),
+        ('other', 'Diğer'),
+    ]
+
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='outbound_messages',
+        verbose_name="Klinik",
+        null=True,
+        blank=True
+    )
+    patient = models.ForeignKey(
+        Patient,
+        on_delete=models.SET_NULL,
+        related_name='outbound_messages',
+        verbose_name="Hasta",
+        null=True,
+        blank=True
+    )
+    appointment = models.ForeignKey(
+        Appointment,
+        on_delete=models.SET_NULL,
+        related_name='outbound_messages',
+        verbose_name="Randevu",
+        null=True,
+        blank=True
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='other', verbose_name="Tür")
+    provider = models.CharField(max_length=50, verbose_name="Sağlayıcı")
+    phone = models.CharField(max_length=20, verbose_name="Telefon")
+    body = models.TextField(verbose_name="Mesaj")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name="Durum"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Deneme Sayısı")
+    next_attempt_at = models.DateTimeField(verbose_name="Sonraki Deneme")
+    last_error = models.TextField(blank=True, verbose_name="Son Hata")
+    provider_message_id = models.CharField(max_length=100, blank=True, verbose_name="Sağlayıcı Mesaj ID")
+    # Aynı mesajın iki kez kuyruğa girmesini engeller (örn. hatırlatmalar)
+    dedupe_key = models.CharField(max_length=100, unique=True, null=True, blank=True, verbose_name="Tekillik Anahtarı")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Gönderilme Zamanı")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Giden Mesaj"
+        verbose_name_plural = "Giden Mesajlar"
+        indexes = [
+            # Worker'ın sıradaki mesajları alma sorgusu
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} → {self.phone} ({self.get_status_display()})"
+
+
+# ============================================================================
+# REPORTING MODELS
+# ============================================================================
+
+class DentistStatRollup(models.Model):
+    """
+    Hekim raporları için önceden hesaplanmış günlük ve aylık özetler.
+
+    Her satır (hekim, dönem, tedavi türü, durum) için randevu sayısını,
+    tedavi ücreti toplamını ve randevu dakikalarını tutar. Randevu
+    değişikliklerinde rollups.py tarafından artımlı olarak güncellenir;
+    `backfill_rollups` komutu ile yeniden hesaplanabilir.
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Günlük'),
+        ('month', 'Aylık'),
+    ]
+
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='stat_rollups',
+        verbose_name="Klinik"
+    )
+    dentist = models.ForeignKey(
+        Dentist,
+        on_delete=models.CASCADE,
+        related_name='stat_rollups',
+        verbose_name="Diş Hekimi"
+    )
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES, verbose_name="Dönem")
+    # Günlük özetlerde gün, aylık özetlerde ayın ilk günü (yerel saat)
+    period_start = models.DateField(verbose_name="Dönem Başlangıcı")
+    treatment_type = models.CharField(max_length=100, blank=True, verbose_name="Tedavi Türü")
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES, verbose_name="Durum")
+    appointment_count = models.IntegerField(default=0, verbose_name="Randevu Sayısı")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Tedavi Ücreti Toplamı")
+    booked_minutes = models.IntegerField(default=0, verbose_name="Randevu Süresi (dk)")
+
+    class Meta:
+        verbose_name = "Hekim İstatistik Özeti"
+        verbose_name_plural = "Hekim İstatistik Özetleri"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dentist', 'period', 'period_start', 'treatment_type', 'status'],
+                name='rollup_unique_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['clinic', 'period', 'period_start'], name='rollup_clinic_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dentist_id} {self.period} {self.period_start} {self.status}"
+
+
+# ============================================================================
+# VERSION MODELS
+# ============================================================================
+
+class ResourceVersion(models.Model):
+    """
+    Klinik bazlı kaynak sürümleri (koşullu GET doğrulayıcıları, takvim
+    önbelleği anahtarı).
+
+    Her (klinik, kaynak) için tek satır tutulur ve kayıt değişikliği commit
+    edildikten sonra ilerletilir; böylece tüm worker'lar sürümü
+    veritabanından tutarlı olarak okur. resource='sequence' satırı
+    kliniğin değişiklik sayacıdır (bkz. sync.py).
+    """
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='resource_versions',
+        verbose_name="Klinik"
+    )
+    resource = models.CharField(max_length=20, verbose_name="Kaynak")
+    version = models.BigIntegerField(default=0, verbose_name="Sürüm")
+    changed_at = models.DateTimeField(verbose_name="Değişiklik Zamanı")
+
+    class Meta:
+        verbose_name = "Kaynak Sürümü"
+        verbose_name_plural = "Kaynak Sürümleri"
+        constraints = [
+            models.UniqueConstraint(fields=['clinic', 'resource'], name='resource_version_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.clinic_id} {self.resource}: {self.version}"
+
+
+# ============================================================================
+# SYNC MODELS
+# ============================================================================
+
+class SyncChange(models.Model):
+    """
+    Mobil uygulamanın artımlı senkronizasyonu için değişiklik günlüğü.
+
+    Her randevu, hasta ve hekim için tek satır tutulur: kayıt her
+    değiştiğinde eski satırı silinip yenisi eklenir, böylece günlük kayıt
+    sayısıyla sınırlı kalır. Silinen kayıtlar deleted=True satırı
+    (tombstone) olarak kalır. `seq` kliniğin değişiklik sayacından alınır
+    ve commit sırasını izler; aynı transaction'ın satırları aynı seq'i
+    paylaşır. İstemcinin imleci (cursor) aldığı son satırın seq değeridir
+    (bkz. sync.py).
+    """
+    KIND_CHOICES = [
+        ('appointment', 'Randevu'),
+        ('patient', 'Hasta'),
+        ('dentist', 'Diş Hekimi'),
+    ]
+
+    clinic = models.ForeignKey(
+        Clinic,
+        on_delete=models.CASCADE,
+        related_name='sync_changes',
+        verbose_name="Klinik"
+    )
+    seq = models.BigIntegerField(verbose_name="Sıra")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Kayıt Türü")
+    object_id = models.BigIntegerField(verbose_name="Kayıt ID")
+    deleted = models.BooleanField(default=False, verbose_name="Silindi")
+    changed_at = models.DateTimeField(auto_now=True, verbose_name="Değişiklik Zamanı")
+
+    class Meta:
+        verbose_name = "Senkronizasyon Değişikliği"
+        verbose_name_plural = "Senkronizasyon Değişiklikleri"
+        indexes = [
+            # İmleçten sonraki değişiklikler (klinik bazlı, seq sıralı)
+            models.Index(fields=['clinic', 'seq'], name='sync_clinic_seq_idx'),
+            # Kaydın önceki günlük satırını silmek için
+            models.Index(fields=['kind', 'object_id'], name='sync_kind_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}{' (silindi)' if self.deleted else ''}"
@@ -0,0 +1,127 @@
+"""
+Sayfalama sınıfları.
+
+KeysetPagination, OFFSET ve COUNT(*) kullanmadan (sıralama alanı, id)
+çifti üzerinden sayfalar; sayfa derinliğinden bağımsız olarak sabit maliyetlidir.
+Mobil uygulamanın sonsuz kaydırma listeleri için tasarlanmıştır.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    (alan, id) anahtarıyla ileri yönlü sayfalama.
+
+    View'da `keyset_ordering = ('start_time', 'id')` gibi tanımlanır; son
+    alan benzersiz olmalıdır. İlk sayfa `?cursor=` ile istenir, sonraki
+    sayfaların adresi yanıttaki `next` alanındadır. Toplam sayı hesaplanmaz.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Geçersiz cursor.'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return api_settings.PAGE_SIZE
+
+    def encode_cursor(self, values):
+        # isoformat: DjangoJSONEncoder mikro saniyeleri kırptığı için kullanılmaz
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        data = json.dumps(values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, queryset, fields, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if len(values) != len(fields):
+                raise ValueError
+            opts = queryset.model._meta
+            return [opts.get_field(field).to_python(value) for field, value in zip(fields, values)]
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def keyset_filter(fields, values):
+        """(f1, f2, ...) > (v1, v2, ...) karşılaştırmasını Q nesnesine çevirir."""
+        condition = Q()
+        for index in range(len(fields)):
+            equal = {field: value for field, value in zip(fields[:index], values[:index])}
+            condition |= Q(**equal, **{f'{fields[index]}__gt': values[index]})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        fields = list(view.keyset_ordering)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*fields)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            queryset = queryset.filter(self.keyset_filter(fields, self.decode_cursor(queryset, fields, token)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        self.next_values = [getattr(page[-1], field) for field in fields] if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetOrPageNumberPagination(PageNumberPagination):
+    """
+    Varsayılan olarak sayfa numaralı (COUNT'lu) sayfalama yapar; istekte
+    `cursor` parametresi varsa (boş olsa bile) KeysetPagination kullanır.
+    Mevcut web paneli değişmeden çalışır, mobil uygulama keyset moduna geçebilir.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
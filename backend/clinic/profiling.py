@@ -0,0 +1,318 @@
+"""
+İstek profilleme - endpoint (view) ve klinik bazında gecikme, SQL sorgu
+sayısı/süresi, renderer süresi ve kalan Python süresi.
+
+RequestProfilingMiddleware her isteğin toplam süresini kaydeder (iki
+perf_counter çağrısı ve bir kilit; istek başına birkaç mikrosaniye).
+Ayrıntılı ölçüm örneklemeyle yapılır: REQUEST_PROFILING['SAMPLE_RATE']
+oranındaki isteklerde tüm veritabanı bağlantılarına execute_wrapper takılır
+ve sorgular tek tek zamanlanır; renderer süresi (DRF renderer'ının yanıt
+gövdesini JSON'a/şablona çevirmesi) post-render callback'iyle ölçülür.
+Serializer'ın veriyi hazırlaması (serializer.data) görünümün içinde
+olduğundan Python süresine dahildir. Varsayılan oranda (%5) ek yük %1'in
+çok altındadır.
+
+Histogramlar Prometheus'un beklediği gibi süreç başladığından beri
+kümülatiftir (sayılar hiç azalmaz) ve /api/metrics/ üzerinden Prometheus
+metin formatında sunulur; zaman penceresi sorguda verilir, örn.
+rate(clinic_request_duration_seconds_bucket[5m]). SLOW_REQUEST_MS'i aşan
+istekler loglanır; örneklenmiş isteklerde en yavaş SQL de loga eklenir.
+
+Not: Metrikler süreç içidir; birden fazla worker ile her worker ayrı
+kazınmalıdır (veya toplayıcıda birleştirilmelidir).
+"""
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import empty
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Sınır aşıldığında yeni klinikler bu etiketle toplanır
+OTHER_CLINIC = 'other'
+
+HISTOGRAMS = {
+    'clinic_request_duration_seconds': ('İstek süresi (tüm istekler)', LATENCY_BUCKETS),
+    'clinic_request_db_seconds': ('SQL süresi (örneklenmiş istekler)', LATENCY_BUCKETS),
+    'clinic_request_db_queries': ('SQL sorgu sayısı (örneklenmiş istekler)', QUERY_BUCKETS),
+    'clinic_request_renderer_seconds': (
+        'Yanıt gövdesinin renderer süresi, serializer hariç (örneklenmiş istekler)', LATENCY_BUCKETS),
+    'clinic_request_python_seconds': (
+        'SQL ve renderer dışındaki süre, serializer dahil (örneklenmiş istekler)', LATENCY_BUCKETS),
+}
+
+
+# ============================================================================
+# HİSTOGRAM VE KAYIT
+# ============================================================================
+
+class Histogram:
+    """Kümülatif Prometheus histogramı: kova sayıları, toplam ve adet."""
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Kova başına (+Inf dahil) gözlem sayısı
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self):
+        """(kümülatif kova sayıları, toplam, adet)."""
+        cumulative, running = [], 0
+        for value in self.counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, self.total, self.count
+
+
+class MetricsRegistry:
+    """Süreç içi metrik kaydı (thread-safe)."""
+
+    def __init__(self, max_clinics):
+        self.max_clinics = max_clinics
+        self._lock = threading.Lock()
+        self.clinics = set()
+        self.requests = {}
+        self.slow_requests = {}
+        self.histograms = {}
+
+    def clinic_label(self, clinic_id):
+        """Etiket sayısını sınırlar: MAX_CLINICS'ten sonra gelen klinikler 'other' olur."""
+        label = str(clinic_id) if clinic_id else 'none'
+        if label in self.clinics or label == 'none':
+            return label
+        with self._lock:
+            if len(self.clinics) < self.max_clinics:
+                self.clinics.add(label)
+                return label
+        return OTHER_CLINIC
+
+    def record(self, view, clinic, method, status, observations, slow=False):
+        """
+        Args:
+            observations: {histogram adı: değer}
+        """
+        request_key = (view, clinic, method, str(status))
+        with self._lock:
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+            if slow:
+                self.slow_requests[(view, clinic)] = self.slow_requests.get((view, clinic), 0) + 1
+            for name, value in observations.items():
+                histogram = self.histograms.get((name, view, clinic))
+                if histogram is None:
+                    histogram = self.histograms[(name, view, clinic)] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+
+    def render(self):
+        """Prometheus metin formatı (exposition format 0.0.4)."""
+        lines = [
+            '# HELP clinic_requests_total İstek sayısı (süreç başladığından beri)',
+            '# TYPE clinic_requests_total counter',
+        ]
+        with self._lock:
+            requests = sorted(self.requests.items())
+            slow_requests = sorted(self.slow_requests.items())
+            histograms = sorted(self.histograms.items())
+            snapshots = [(key, histogram.snapshot()) for key, histogram in histograms]
+
+        for (view, clinic, method, status), value in requests:
+            labels = _labels(view=view, clinic=clinic, method=method, status=status)
+            lines.append(f'clinic_requests_total{{{labels}}} {value}')
+
+        lines += [
+            '# HELP clinic_slow_requests_total SLOW_REQUEST_MS eşiğini aşan istek sayısı',
+            '# TYPE clinic_slow_requests_total counter',
+        ]
+        for (view, clinic), value in slow_requests:
+            lines.append(f'clinic_slow_requests_total{{{_labels(view=view, clinic=clinic)}}} {value}')
+
+        current = None
+        for (name, view, clinic), (counts, total, count) in snapshots:
+            if name != current:
+                current = name
+                lines += [
+                    f'# HELP {name} {HISTOGRAMS[name][0]}',
+                    f'# TYPE {name} histogram',
+                ]
+            labels = _labels(view=view, clinic=clinic)
+            for bound, value in zip(HISTOGRAMS[name][1] + ('+Inf',), counts):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {value}')
+            lines.append(f'{name}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry(settings.REQUEST_PROFILING['MAX_CLINICS'])
+    return _registry
+
+
+def reset_registry():
+    """Kaydı sıfırlar (testler ve ayar değişiklikleri için)."""
+    global _registry
+    _registry = None
+
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+
+class QueryRecorder:
+    """execute_wrapper: sorgu sayısı, toplam süre ve en yavaş sorgu; renderer süresi."""
+    __slots__ = ('count', 'duration', 'worst_sql', 'worst_duration', 'renderer')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.worst_sql = None
+        self.worst_duration = 0.0
+        self.renderer = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if elapsed > self.worst_duration:
+                self.worst_duration = elapsed
+                self.worst_sql = sql
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+def _request_clinic(request):
+    """Kullanıcının kliniği; henüz yüklenmemiş (tembel) kullanıcı için sorgu yapılmaz."""
+    user = request.__dict__.get('user')
+    user = getattr(user, '_wrapped', user)
+    if user is None or user is empty:
+        return None
+    return getattr(user, 'clinic_id', None)
+
+
+class RequestProfilingMiddleware:
+    """
+    İstekleri view adı ve klinik etiketiyle ölçer (bkz. modül açıklaması).
+    Async görünümlerde (SSE) sorgular başka thread'lerde çalıştığı için
+    sadece toplam süre kaydedilir.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.REQUEST_PROFILING
+        self.enabled = config['ENABLED']
+        self.sample_rate = config['SAMPLE_RATE']
+        self.slow_seconds = config['SLOW_REQUEST_MS'] / 1000
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        if random.random() < self.sample_rate:
+            recorder = request._profiling = QueryRecorder()
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                response = self.get_response(request)
+        else:
+            recorder = None
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, None)
+        return response
+
+    def process_template_response(self, request, response):
+        recorder = getattr(request, '_profiling', None)
+        if recorder is not None:
+            render_start = time.perf_counter()
+
+            def rendered(response):
+                recorder.renderer += time.perf_counter() - render_start
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, duration, recorder):
+        registry = get_registry()
+        view = _view_name(request)
+        clinic_id = _request_clinic(request)
+        clinic = registry.clinic_label(clinic_id)
+        slow = duration >= self.slow_seconds
+        observations = {'clinic_request_duration_seconds': duration}
+        if recorder is not None:
+            observations.update({
+                'clinic_request_db_seconds': recorder.duration,
+                'clinic_request_db_queries': recorder.count,
+                'clinic_request_renderer_seconds': recorder.renderer,
+                'clinic_request_python_seconds': max(duration - recorder.duration - recorder.renderer, 0.0),
+            })
+        registry.record(view, clinic, request.method, response.status_code, observations, slow=slow)
+
+        if slow:
+            if recorder is not None:
+                logger.warning(
+                    "Slow request %s %s (view=%s clinic=%s): %.0f ms, %d queries in %.0f ms, "
+                    "renderer %.0f ms; slowest query %.0f ms: %s",
+                    request.method, request.path, view, clinic_id, duration * 1000,
+                    recorder.count, recorder.duration * 1000, recorder.renderer * 1000,
+                    recorder.worst_duration * 1000, (recorder.worst_sql or '')[:1000],
+                )
+            else:
+                logger.warning(
+                    "Slow request %s %s (view=%s clinic=%s): %.0f ms (not sampled, no SQL details)",
+                    request.method, request.path, view, clinic_id, duration * 1000,
+                )
@@ -0,0 +1,228 @@
+"""
+Abonelik kotaları (ClinicSubscription.max_appointments_per_month, max_dentists).
+
+Kullanım QuotaCounter satırlarında tutulur. Oluşturma yolunda kota kontrolü
+ve sayacın artırılması tek bir koşullu UPDATE'tir:
+
+    UPDATE ... SET value = value + 1
+    WHERE clinic = ? AND resource = ? AND period_start = ?
+      AND value < COALESCE((SELECT limit FROM subscription WHERE clinic = ?), ∞)
+
+Güncellenen satır yoksa ya kota dolmuştur ya da sayaç henüz oluşturulmamıştır;
+sayaç yalnızca bu durumda (ayda bir kez) COUNT ile başlatılır. Aboneliği
+olmayan kliniklerde sınır yoktur.
+
+Diğer değişiklikler (başka aya taşınan veya silinen randevu, pasife alınan
+hekim, toplu aktarım) sayaçlara signals.py üzerinden koşulsuz yansıtılır.
+queryset.update() gibi sinyalsiz yollarla oluşabilecek sapmaları
+`reconcile_quota_counters` komutu düzeltir (örn. gece cron ile).
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Subquery, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .availability import day_range_bounds
+from .models import Clinic, ClinicSubscription, Dentist, Appointment, QuotaCounter
+
+
+APPOINTMENTS = 'appointments'
+DENTISTS = 'dentists'
+
+# Aboneliği olmayan klinikler için sınır
+NO_LIMIT = 2 ** 31 - 1
+
+
+class QuotaExceeded(Exception):
+    """Kliniğin abonelik kotası doldu."""
+
+    def __init__(self, resource, limit):
+        self.resource = resource
+        self.limit = limit
+        if resource == APPOINTMENTS:
+            message = f"Aylık randevu kotanız doldu ({limit}). Planınızı yükseltebilirsiniz."
+        else:
+            message = f"Aktif hekim kotanız doldu ({limit}). Planınızı yükseltebilirsiniz."
+        super().__init__(message)
+
+
+LIMIT_FIELDS = {
+    APPOINTMENTS: 'max_appointments_per_month',
+    DENTISTS: 'max_dentists',
+}
+
+
+def month_start(value):
+    """Zaman damgasının yerel ayının ilk günü."""
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def _counters(clinic_id, resource, period):
+    return QuotaCounter.objects.filter(clinic_id=clinic_id, resource=resource, period_start=period)
+
+
+def _current_usage(clinic_id, resource, period):
+    """Sayaç yokken kullanımı kaynak tablodan sayar (sadece ilk kullanımda)."""
+    if resource == DENTISTS:
+        return Dentist.objects.filter(clinic_id=clinic_id, is_active=True).count()
+    next_month = (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+    start, end = day_range_bounds(period, next_month - timedelta(days=1))
+    return Appointment.objects.filter(clinic_id=clinic_id, start_time__gte=start, start_time__lt=end).count()
+
+
+def reserve(clinic_id, resource, period=None):
+    """
+    Kotadan bir birim ayırır (sayaç + 1). Çağıran transaction geri alınırsa
+    ayırma da geri alınır.
+
+    Raises:
+        QuotaExceeded: Kota doluysa
+    """
+    limit = ClinicSubscription.objects.filter(clinic_id=clinic_id).values(LIMIT_FIELDS[resource])
+    within_limit = _counters(clinic_id, resource, period).filter(
+        value__lt=Coalesce(Subquery(limit), Value(NO_LIMIT))
+    )
+    if within_limit.update(value=F('value') + 1):
+        return
+
+    # Yavaş yol: sayaç yok (ayın ilk randevusu) veya kota dolu. Sayacı
+    # eşzamanlı bir çağrı oluşturmuş olabilir (created=False); koşullu
+    # UPDATE her durumda yeniden denenir.
+    QuotaCounter.objects.get_or_create(
+        clinic_id=clinic_id, resource=resource, period_start=period,
+        defaults={'value': _current_usage(clinic_id, resource, period)},
+    )
+    if within_limit.update(value=F('value') + 1):
+        return
+    max_value = limit.first()
+    raise QuotaExceeded(resource, max_value[LIMIT_FIELDS[resource]] if max_value else NO_LIMIT)
+
+
+def adjust(clinic_id, resource, period=None, delta=1):
+    """Sayacı kontrol yapmadan değiştirir; sayaç yoksa bir şey yapılmaz."""
+    if delta:
+        _counters(clinic_id, resource, period).update(value=F('value') + delta)
+
+
+def reserve_appointment(appointment):
+    """Yeni randevu için aylık kotadan ayırır (Appointment.save'den önce)."""
+    reserve(appointment.dentist.clinic_id, APPOINTMENTS, month_start(appointment.start_time))
+    appointment._quota_reserved = True
+
+
+def reserve_dentist(dentist):
+    """Yeni veya yeniden aktifleştirilen hekim için kotadan ayırır (Dentist.save'den önce)."""
+    reserve(dentist.clinic_id, DENTISTS)
+    dentist._quota_reserved = True
+
+
+# ============================================================================
+# SİNYALLER
+# ============================================================================
+
+def appointment_saved(instance, created, previous):
+    """Kota ayrılmadan oluşturulan veya başka aya taşınan randevuyu sayaçlara yansıtır."""
+    current = month_start(instance.start_time)
+    if created:
+        if not getattr(instance, '_quota_reserved', False):
+            adjust(instance.clinic_id, APPOINTMENTS, current)
+        instance._quota_reserved = False
+    elif previous is not None:
+        old = month_start(previous['start_time'])
+        if (previous['clinic_id'], old) != (instance.clinic_id, current):
+            adjust(previous['clinic_id'], APPOINTMENTS, old, -1)
+            adjust(instance.clinic_id, APPOINTMENTS, current)
+
+
+def appointment_deleted(instance, previous):
+    values = previous or {'clinic_id': instance.clinic_id, 'start_time': instance.start_time}
+    adjust(values['clinic_id'], APPOINTMENTS, month_start(values['start_time']), -1)
+
+
+def _was_active(instance):
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is not None and 'is_active' in loaded:
+        return loaded['is_active']
+    return Dentist.objects.filter(pk=instance.pk).values_list('is_active', flat=True).first()
+
+
+def dentist_saved(instance, created):
+    """
+    Kota ayrılmadan oluşturulan, pasife alınan veya yeniden aktifleşen
+    hekimi yansıtır. Kaydetmeden önce kotası ayrılmış hekim (yeni veya
+    yeniden aktifleştirilen) zaten sayılmıştır.
+    """
+    reserved = getattr(instance, '_quota_reserved', False)
+    instance._quota_reserved = False
+    counted = reserved or (not created and bool(_was_active(instance)))
+    adjust(instance.clinic_id, DENTISTS, delta=int(instance.is_active) - int(counted))
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), 'is_active': instance.is_active}
+
+
+def dentist_deleted(instance):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if loaded.get('is_active', instance.is_active):
+        adjust(instance.clinic_id, DENTISTS, delta=-1)
+
+
+def apply_appointments(appointments):
+    """Sinyal tetiklemeyen toplu oluşturmalardan (importer) sonra aylık sayaçları artırır."""
+    deltas = {}
+    for appointment in appointments:
+        key = (appointment.clinic_id, month_start(appointment.start_time))
+        deltas[key] = deltas.get(key, 0) + 1
+    for (clinic_id, period), delta in deltas.items():
+        adjust(clinic_id, APPOINTMENTS, period, delta)
+
+
+# ============================================================================
+# MUTABAKAT
+# ============================================================================
+
+def _recount(clinic_id):
+    """Kliniğin sayaçlarını randevu ve hekim tablolarından hesaplar."""
+    monthly = (
+        Appointment.objects.filter(clinic_id=clinic_id).order_by()
+        .values(month=TruncMonth('start_time', tzinfo=timezone.get_current_timezone()))
+        .annotate(total=Count('id'))
+    )
+    counters = [
+        QuotaCounter(clinic_id=clinic_id, resource=APPOINTMENTS, period_start=row['month'].date(), value=row['total'])
+        for row in monthly
+    ]
+    dentists = Dentist.objects.filter(clinic_id=clinic_id, is_active=True).count()
+    if dentists:
+        counters.append(QuotaCounter(clinic_id=clinic_id, resource=DENTISTS, value=dentists))
+    return counters
+
+
+def reconcile_counters(clinic_ids=None):
+    """
+    Sayaçları randevu ve hekim tablolarından yeniden hesaplar.
+
+    Her klinik kendi transaction'ında işlenir: önce kliniğin sayaç satırları
+    kilitlenir (select_for_update), sayımlar kilit altında yapılır, sonra
+    eski sayaçlar silinip yenileri yazılır. Sayacı artırmak isteyen
+    eşzamanlı bir ayırma kilidin bırakılmasını bekler ve yeni sayacı
+    artırır; kilitten önce ayrılmış birimin randevusu ise sayıma girer.
+    Bu yüzden komut çalışırken trafik durdurulmak zorunda değildir.
+
+    Returns:
+        int: Güncellenen (klinik, kaynak, dönem) sayaç sayısı
+    """
+    clinics = Clinic.objects.order_by('id')
+    if clinic_ids is not None:
+        clinics = clinics.filter(id__in=clinic_ids)
+
+    updated = 0
+    for clinic_id in clinics.values_list('id', flat=True):
+        with transaction.atomic():
+            stale = QuotaCounter.objects.filter(clinic_id=clinic_id)
+            list(stale.select_for_update().values_list('id', flat=True))
+            counters = _recount(clinic_id)
+            stale.delete()
+            QuotaCounter.objects.bulk_create(counters)
+        updated += len(counters)
+    return updated
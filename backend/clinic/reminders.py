@@ -0,0 +1,98 @@
+"""
+Ertesi gün randevuları için toplu hatırlatma planlayıcı.
+
+Randevular tek bir select_related sorgusuyla, .iterator() ile parça parça
+okunur; mesajlar parça başına bulk_create ile kuyruğa (outbox) eklenir.
+Bellek kullanımı toplam randevu sayısından bağımsız, parça boyutuyla sınırlıdır.
+
+Her hatırlatmanın bir tekillik anahtarı (randevu + başlangıç saati) vardır;
+komut tekrar çalıştırıldığında aynı hatırlatma ikinci kez kuyruğa girmez.
+Randevu başka bir saate taşınırsa yeni saat için yeni hatırlatma oluşur.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .availability import ACTIVE_STATUSES, day_range_bounds
+from .models import Appointment, OutboundMessage
+from .utils import reminder_dedupe_key, render_reminder
+
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def reminder_queryset(target_date):
+    """Hedef gündeki, SMS izni olan hastaların aktif randevuları (tüm klinikler)."""
+    day_start, day_end = day_range_bounds(target_date, target_date)
+    return (
+        Appointment.objects
+        .filter(
+            start_time__gte=day_start,
+            start_time__lt=day_end,
+            status__in=ACTIVE_STATUSES,
+            patient__sms_consent=True,
+        )
+        .select_related('patient', 'dentist')
+        .only(
+            'id', 'clinic_id', 'start_time',
+            'patient__id', 'patient__name', 'patient__phone',
+            'dentist__id', 'dentist__name',
+        )
+        .order_by()
+    )
+
+
+def queue_reminders(target_date=None, chunk_size=DEFAULT_CHUNK_SIZE, provider=None):
+    """
+    Hedef gün (varsayılan yarın) için hatırlatmaları kuyruğa ekler.
+
+    Args:
+        target_date: Hatırlatılacak randevuların günü
+        chunk_size: Okuma ve bulk_create parça boyutu
+        provider: (opsiyonel) SMS sağlayıcısı
+
+    Returns:
+        dict: scanned (okunan randevu) ve queued (yeni eklenen mesaj) sayıları
+    """
+    target_date = target_date or timezone.localdate() + timedelta(days=1)
+    provider = provider or settings.SMS_DEFAULT_PROVIDER
+    tz = timezone.get_current_timezone()
+    now = timezone.now()
+
+    scanned = queued = 0
+    batch = []
+
+    def flush():
+        nonlocal queued
+        keys = [message.dedupe_key for message in batch]
+        existing = set(
+            OutboundMessage.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True)
+        )
+        new_messages = [message for message in batch if message.dedupe_key not in existing]
+        # Eşzamanlı çalışan başka bir planlayıcıya karşı ignore_conflicts
+        OutboundMessage.objects.bulk_create(new_messages, ignore_conflicts=True)
+        queued += len(new_messages)
+        batch.clear()
+
+    for appointment in reminder_queryset(target_date).iterator(chunk_size=chunk_size):
+        scanned += 1
+        patient = appointment.patient
+        batch.append(OutboundMessage(
+            clinic_id=appointment.clinic_id,
+            patient_id=patient.id,
+            appointment_id=appointment.id,
+            kind='reminder',
+            provider=provider,
+            phone=patient.phone,
+            body=render_reminder(patient.name, appointment.start_time.astimezone(tz), appointment.dentist.name),
+            next_attempt_at=now,
+            dedupe_key=reminder_dedupe_key(appointment.id, appointment.start_time),
+        ))
+        if len(batch) >= chunk_size:
+            flush()
+
+    if batch:
+        flush()
+
+    return {'scanned': scanned, 'queued': queued}
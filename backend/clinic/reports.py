@@ -0,0 +1,226 @@
+"""
+Hekim performans raporu - sadece özet (DentistStatRollup) tablosundan okunur.
+
+Rapor, geçmişin uzunluğundan bağımsız olarak iki küçük sorguyla üretilir:
+seçilen aylara ait aylık özet satırları ve son ayın günlük satırları.
+PDF çıktısı harici kütüphane kullanmadan, standart Helvetica fontuyla
+tek sayfa olarak yazılır.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import DentistStatRollup
+
+
+DEFAULT_REPORT_MONTHS = 12
+MAX_REPORT_MONTHS = 24
+
+MONTH_NAMES = ['Oca', 'Şub', 'Mar', 'Nis', 'May', 'Haz', 'Tem', 'Ağu', 'Eyl', 'Eki', 'Kas', 'Ara']
+
+
+def add_months(month_start, count):
+    index = month_start.year * 12 + month_start.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _empty_bucket():
+    return {
+        'appointments': 0, 'completed': 0, 'cancelled': 0, 'no_show': 0,
+        'revenue': Decimal('0'), 'booked_minutes': 0,
+    }
+
+
+def _add_row(bucket, row):
+    if row.status == 'cancelled':
+        bucket['cancelled'] += row.appointment_count
+        return
+    bucket['appointments'] += row.appointment_count
+    bucket['booked_minutes'] += row.booked_minutes
+    if row.status == 'completed':
+        bucket['completed'] += row.appointment_count
+        bucket['revenue'] += row.revenue
+    elif row.status == 'no_show':
+        bucket['no_show'] += row.appointment_count
+
+
+def build_dentist_report(dentist, end_month=None, months=DEFAULT_REPORT_MONTHS):
+    """
+    Hekimin son `months` aylık performans raporunu oluşturur.
+
+    Randevu sayıları ve süreleri iptal edilenler hariç hesaplanır; gelir
+    sadece tamamlanan randevuların tedavi ücretlerinin toplamıdır.
+
+    Args:
+        dentist: Dentist
+        end_month: (opsiyonel) Son ay (herhangi bir gün), varsayılan bu ay
+        months: Rapordaki ay sayısı
+
+    Returns:
+        dict: dentist, start, end, months, daily, treatments, totals
+    """
+    end_month = (end_month or timezone.localdate()).replace(day=1)
+    start_month = add_months(end_month, -(months - 1))
+    after_end = add_months(end_month, 1)
+
+    monthly = {add_months(start_month, i): _empty_bucket() for i in range(months)}
+    treatments = {}
+    totals = _empty_bucket()
+    month_rows = DentistStatRollup.objects.filter(
+        dentist=dentist, period='month',
+        period_start__gte=start_month, period_start__lt=after_end,
+    )
+    for row in month_rows:
+        _add_row(monthly[row.period_start], row)
+        _add_row(totals, row)
+        _add_row(treatments.setdefault(row.treatment_type or '-', _empty_bucket()), row)
+
+    daily = {}
+    day_rows = DentistStatRollup.objects.filter(
+        dentist=dentist, period='day',
+        period_start__gte=end_month, period_start__lt=after_end,
+    )
+    for row in day_rows:
+        _add_row(daily.setdefault(row.period_start, _empty_bucket()), row)
+
+    return {
+        'dentist': {'id': dentist.id, 'name': dentist.name, 'specialty': dentist.specialty},
+        'start': start_month.strftime('%Y-%m'),
+        'end': end_month.strftime('%Y-%m'),
+        'months': [{'month': month.strftime('%Y-%m'), **bucket} for month, bucket in monthly.items()],
+        'daily': [
+            {'date': day, 'appointments': bucket['appointments'], 'booked_minutes': bucket['booked_minutes']}
+            for day, bucket in sorted(daily.items())
+        ],
+        'treatments': sorted(
+            ({'treatment_type': name, 'appointments': bucket['appointments'], 'revenue': bucket['revenue']}
+             for name, bucket in treatments.items()),
+            key=lambda item: (-item['appointments'], item['treatment_type']),
+        ),
+        'totals': totals,
+    }
+
+
+# ============================================================================
+# PDF
+# ============================================================================
+
+# Standart PDF fontları (WinAnsi) Türkçe'ye özgü bu harfleri içermez
+_PDF_FOLD = str.maketrans('şŞğĞıİ', 'sSgGiI')
+
+
+def _pdf_text(value):
+    text = str(value).translate(_PDF_FOLD).encode('cp1252', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _money(value):
+    return f"{value:,.2f} TL".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+class _PdfPage:
+    """A4 sayfaya metin, çizgi ve dikdörtgen çizen basit içerik akışı."""
+    width, height = 595, 842
+
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, value, size=10, bold=False):
+        font = 'F2' if bold else 'F1'
+        self.ops.append(f'BT /{font} {size} Tf {x:.1f} {y:.1f} Td ({_pdf_text(value)}) Tj ET')
+
+    def rect(self, x, y, w, h, gray=0.3):
+        self.ops.append(f'{gray:.2f} g {x:.1f} {y:.1f} {w:.1f} {h:.1f} re f 0 g')
+
+    def line(self, x1, y1, x2, y2):
+        self.ops.append(f'0.5 w {x1:.1f} {y1:.1f} m {x2:.1f} {y2:.1f} l S')
+
+    def render(self):
+        content = '\n'.join(self.ops).encode('latin-1')
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+            (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.width} {self.height}] '
+             f'/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>').encode(),
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+            b'<< /Length ' + str(len(content)).encode() + b' >>\nstream\n' + content + b'\nendstream',
+        ]
+        output = bytearray(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+        xref = len(output)
+        output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+        output += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+        output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+        return bytes(output)
+
+
+def render_dentist_report_pdf(report):
+    """build_dentist_report çıktısını tek sayfalık PDF'e çevirir."""
+    page = _PdfPage()
+    totals = report['totals']
+    y = 800
+
+    page.text(40, y, f"Dr. {report['dentist']['name']} - Performans Raporu", size=16, bold=True)
+    y -= 18
+    page.text(40, y, f"{report['dentist']['specialty']}  |  {report['start']} - {report['end']}", size=9)
+    y -= 28
+
+    summary = [
+        ('Randevu', totals['appointments']),
+        ('Tamamlanan', totals['completed']),
+        ('İptal', totals['cancelled']),
+        ('Gelmedi', totals['no_show']),
+        ('Kazanç', _money(totals['revenue'])),
+        ('Süre', f"{totals['booked_minutes'] // 60} saat"),
+    ]
+    for index, (label, value) in enumerate(summary):
+        x = 40 + index * 88
+        page.text(x, y, label, size=8)
+        page.text(x, y - 14, value, size=11, bold=True)
+    y -= 44
+
+    # Aylık randevu grafiği
+    page.text(40, y, 'Aylık randevu sayısı', size=11, bold=True)
+    chart_bottom, chart_height = y - 150, 120
+    peak = max((month['appointments'] for month in report['months']), default=0) or 1
+    bar_space = 515 / max(len(report['months']), 1)
+    for index, month in enumerate(report['months']):
+        x = 40 + index * bar_space
+        height = chart_height * month['appointments'] / peak
+        page.rect(x + 2, chart_bottom, bar_space - 4, height, gray=0.35)
+        if month['appointments']:
+            page.text(x + 2, chart_bottom + height + 3, month['appointments'], size=7)
+        year, number = month['month'].split('-')
+        page.text(x + 2, chart_bottom - 10, f"{MONTH_NAMES[int(number) - 1]} {year[2:]}", size=6)
+    page.line(40, chart_bottom, 555, chart_bottom)
+    y = chart_bottom - 34
+
+    # Aylık tablo
+    columns = [('Ay', 40), ('Randevu', 130), ('Tamamlanan', 200), ('İptal', 280),
+               ('Gelmedi', 330), ('Saat', 390), ('Kazanç', 450)]
+    for title, x in columns:
+        page.text(x, y, title, size=8, bold=True)
+    y -= 4
+    page.line(40, y, 555, y)
+    for month in report['months']:
+        y -= 12
+        values = [month['month'], month['appointments'], month['completed'], month['cancelled'],
+                  month['no_show'], f"{month['booked_minutes'] / 60:.1f}", _money(month['revenue'])]
+        for (_, x), value in zip(columns, values):
+            page.text(x, y, value, size=8)
+    y -= 26
+
+    # En sık tedaviler
+    page.text(40, y, 'En sık tedaviler', size=11, bold=True)
+    for treatment in report['treatments'][:5]:
+        y -= 13
+        page.text(40, y, treatment['treatment_type'], size=8)
+        page.text(330, y, treatment['appointments'], size=8)
+        page.text(450, y, _money(treatment['revenue']), size=8)
+
+    return page.render()
@@ -0,0 +1,193 @@
+"""
+Hekim raporları için günlük / aylık özet (rollup) tablosu bakımı.
+
+Her randevu, başladığı yerel gün ve ay için iki DentistStatRollup
+satırına katkı yapar: (hekim, dönem, tedavi türü, durum) anahtarıyla
+1 randevu, tedavi ücreti ve randevu süresi (dakika).
+
+Randevu kaydedildiğinde eski katkı çıkarılıp yenisi eklenir (signals.py).
+Eski hal Appointment.from_db'de saklanan değerlerden okunur; bu yüzden
+güncellemeler için ek SELECT gerekmez. queryset.update() ve bulk_create
+sinyal tetiklemediği için bu yollarla yapılan değişikliklerden sonra
+apply_appointments() çağrılmalı veya `backfill_rollups` çalıştırılmalıdır.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .availability import day_range_bounds
+from .models import Appointment, DentistStatRollup
+
+
+ROLLUP_FIELDS = (
+    'clinic_id', 'dentist_id', 'start_time', 'end_time',
+    'status', 'treatment_type', 'treatment_cost',
+)
+PERIODS = ('day', 'month')
+ZERO = Decimal('0')
+
+
+def period_start(period, local_date):
+    return local_date.replace(day=1) if period == 'month' else local_date
+
+
+def contributions(values, sign=1):
+    """
+    Tek bir randevunun özet satırlarına katkısını döndürür.
+
+    Args:
+        values: ROLLUP_FIELDS alanlarını içeren dict
+        sign: Eklemek için 1, çıkarmak için -1
+
+    Returns:
+        dict: {(clinic_id, dentist_id, period, period_start, treatment_type, status):
+               [count, revenue, minutes]}
+    """
+    local_date = timezone.localtime(values['start_time']).date()
+    minutes = int((values['end_time'] - values['start_time']).total_seconds() // 60)
+    revenue = values['treatment_cost'] or ZERO
+    return {
+        (values['clinic_id'], values['dentist_id'], period, period_start(period, local_date),
+         values['treatment_type'] or '', values['status']): [sign, sign * revenue, sign * minutes]
+        for period in PERIODS
+    }
+
+
+def merge(total, delta):
+    """İki katkı dict'ini toplar (yerinde)."""
+    for key, (count, revenue, minutes) in delta.items():
+        current = total.setdefault(key, [0, ZERO, 0])
+        current[0] += count
+        current[1] += revenue
+        current[2] += minutes
+    return total
+
+
+def instance_values(instance):
+    return {field: getattr(instance, field) for field in ROLLUP_FIELDS}
+
+
+def loaded_values(instance):
+    """
+    Randevunun veritabanındaki halini döndürür.
+
+    from_db'de saklanan değerler eksiksizse onlar kullanılır (ek sorgu yok);
+    aksi halde (örn. .only() ile yüklenmiş kayıt) satır okunur.
+    """
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is not None and all(field in loaded for field in ROLLUP_FIELDS):
+        return {field: loaded[field] for field in ROLLUP_FIELDS}
+    return Appointment.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+
+
+def apply_deltas(deltas):
+    """
+    Katkıları özet tablosuna F() ifadeleriyle atomik olarak uygular.
+
+    Satır yoksa sadece pozitif katkılar için oluşturulur; eşzamanlı oluşturma
+    çakışmasında güncellemeye döner. Olmayan satırdan çıkarma yapılmaz
+    (örn. hekim silinirken özetleri randevulardan önce silinmiş olabilir).
+    """
+    for key, (count, revenue, minutes) in deltas.items():
+        if not (count or revenue or minutes):
+            continue
+        clinic_id, dentist_id, period, start, treatment_type, status = key
+        lookup = {
+            'dentist_id': dentist_id, 'period': period, 'period_start': start,
+            'treatment_type': treatment_type, 'status': status,
+        }
+        increments = {
+            'appointment_count': F('appointment_count') + count,
+            'revenue': F('revenue') + revenue,
+            'booked_minutes': F('booked_minutes') + minutes,
+        }
+        if DentistStatRollup.objects.filter(**lookup).update(**increments) or count <= 0:
+            continue
+        try:
+            with transaction.atomic():
+                DentistStatRollup.objects.create(
+                    clinic_id=clinic_id, appointment_count=count,
+                    revenue=revenue, booked_minutes=minutes, **lookup
+                )
+        except IntegrityError:
+            DentistStatRollup.objects.filter(**lookup).update(**increments)
+
+
+def appointment_saved(instance):
+    """Kaydedilen randevunun eski katkısını çıkarıp yenisini ekler."""
+    previous = getattr(instance, '_rollup_previous', None)
+    current = instance_values(instance)
+    deltas = contributions(current)
+    if previous is not None:
+        merge(deltas, contributions(previous, sign=-1))
+    with transaction.atomic():
+        apply_deltas(deltas)
+    instance._loaded_values = current
+    instance._rollup_previous = None
+
+
+def appointment_deleted(instance):
+    values = getattr(instance, '_rollup_previous', None) or instance_values(instance)
+    with transaction.atomic():
+        apply_deltas(contributions(values, sign=-1))
+
+
+def apply_appointments(appointments):
+    """Sinyal tetiklemeyen toplu oluşturmalardan (bulk_create) sonra özetleri günceller."""
+    deltas = {}
+    for appointment in appointments:
+        merge(deltas, contributions(instance_values(appointment)))
+    with transaction.atomic():
+        apply_deltas(deltas)
+
+
+def rebuild_rollups(dentist_ids=None, start_date=None, end_date=None, chunk_size=5000):
+    """
+    Özetleri ham randevulardan yeniden hesaplar (backfill).
+
+    Belirtilen hekim ve (yerel) ay aralığındaki özet satırları tek bir
+    transaction içinde silinip yeniden yazılır. Aylık satırlar tutarlı
+    kalsın diye tarih sınırları ay başına/sonuna genişletilir.
+
+    Returns:
+        int: İşlenen randevu sayısı
+    """
+    appointments = Appointment.objects.all()
+    rollups = DentistStatRollup.objects.all()
+    if dentist_ids is not None:
+        appointments = appointments.filter(dentist_id__in=dentist_ids)
+        rollups = rollups.filter(dentist_id__in=dentist_ids)
+    if start_date is not None:
+        start_date = start_date.replace(day=1)
+        appointments = appointments.filter(start_time__gte=day_range_bounds(start_date, start_date)[0])
+        rollups = rollups.filter(period_start__gte=start_date)
+    if end_date is not None:
+        next_month = (end_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+        appointments = appointments.filter(start_time__lt=day_range_bounds(next_month, next_month)[0])
+        rollups = rollups.filter(period_start__lt=next_month)
+
+    totals = {}
+    processed = 0
+    with transaction.atomic():
+        for values in appointments.values(*ROLLUP_FIELDS).iterator(chunk_size=chunk_size):
+            merge(totals, contributions(values))
+            processed += 1
+
+        rollups.delete()
+        DentistStatRollup.objects.bulk_create(
+            [
+                DentistStatRollup(
+                    clinic_id=clinic_id, dentist_id=dentist_id, period=period,
+                    period_start=start, treatment_type=treatment_type, status=status,
+                    appointment_count=count, revenue=revenue, booked_minutes=minutes,
+                )
+                for (clinic_id, dentist_id, period, start, treatment_type, status), (count, revenue, minutes)
+                in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return processed
+
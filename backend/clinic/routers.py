@@ -0,0 +1,140 @@
+"""
+Okuma replikası yönlendirmesi (DATABASE_ROUTERS).
+
+Güvenli metotlu isteklerin (GET/HEAD/OPTIONS) okumaları - ViewSet list/
+retrieve, müsaitlik, dashboard istatistikleri ve raporlar - settings.
+DATABASE_REPLICAS'taki replikalardan birine gider; istek boyunca aynı
+replika kullanılır. Diğer her şey birincil veritabanındadır:
+
+    - Yazmalar ve yazan isteklerin (POST/PUT/PATCH/DELETE) okumaları
+    - transaction.atomic() bloğu içindeki okumalar (select_for_update dahil)
+    - İstek dışındaki kod (yönetim komutları, SMS worker'ı, sinyaller)
+    - Token ve oturum tabloları (girişten hemen sonraki istek replika
+      gecikmesine takılmasın; okumalar zaten önbellekli)
+
+Kendi yazmasını okuma (read-your-writes): İstek içinde yazma yapıldığında
+isteğin kalan okumaları birincile döner. Yazan istemciye ayrıca
+REPLICA_PIN_SECONDS ömürlü, imzalı bir çerez (PIN_COOKIE) verilir; çerez
+geçerli olduğu sürece istemcinin okumaları birincildedir. Örn. randevu
+oluşturduktan hemen sonraki liste isteği yeni randevuyu görür. Sabitleme
+istemcide taşındığı için worker'lar arasında paylaşılan bir durum gerekmez.
+
+Önbellekler ve doğrulayıcılar: Kaynak sürümleri (conditional.py) de
+veritabanında tutulur ve isteğin gövdesiyle aynı replikadan okunur. Geride
+kalan bir replikadan gelen yanıtın ETag'i, dashboard istatistiklerinin ve
+derlenmiş takvimlerin önbellek anahtarı replikanın gördüğü sürüme aittir;
+eski veri hiçbir zaman yeni sürümle önbelleğe alınmaz ve replika
+yetiştiğinde istemci yeni ETag ile güncel yanıtı alır.
+
+Not: Başka istemciler gecikme süresince eski veriyi görebilir.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Her zaman birincilden okunan uygulamalar
+PRIMARY_ONLY_APPS = {'authtoken', 'sessions'}
+
+PIN_COOKIE = 'replica_pin'
+PIN_COOKIE_SALT = 'clinic.routers.replica_pin'
+
+
+class _RequestState:
+    __slots__ = ('use_replica', 'pinned', 'wrote', 'alias')
+
+    def __init__(self, use_replica, pinned=False):
+        self.use_replica = use_replica
+        self.pinned = pinned
+        self.wrote = False
+        self.alias = None
+
+
+_state = ContextVar('replica_state', default=None)
+
+
+class ReadReplicaRouter:
+    """Okumaları replikalara, yazmaları birincile yönlendirir (bkz. modül açıklaması)."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.pinned:
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if state.alias is None:
+            replicas = settings.DATABASE_REPLICAS
+            if not replicas:
+                return None
+            state.alias = random.choice(replicas)
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replikalar birincilin kopyasıdır; replikadan okunan nesne yazmada kullanılabilir
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        return None
+
+
+def _is_pinned(request):
+    return request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_COOKIE_SALT, max_age=settings.REPLICA_PIN_SECONDS,
+    ) is not None
+
+
+def _stream_with_state(content, state):
+    # Akış yanıtlarının (CSV/XLSX dışa aktarma, senkron) içeriği middleware
+    # döndükten sonra üretilir; okumalar aynı yönlendirmeyle yapılır
+    _state.set(state)
+    try:
+        yield from content
+    finally:
+        _state.set(None)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    İsteğin okuma yönlendirmesini belirler ve yazan istemciyi birincile
+    sabitler. Replika tanımlı değilse hiçbir şey yapmaz.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        state = _RequestState(request.method in SAFE_METHODS)
+        if state.use_replica and _is_pinned(request):
+            state.pinned = True
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = _stream_with_state(response.streaming_content, state)
+        if state.wrote:
+            response.set_signed_cookie(
+                PIN_COOKIE, '1', salt=PIN_COOKIE_SALT, max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,112 @@
+"""
+Hekim çalışma takvimleri - haftalık çalışma saatleri, molalar, tatiller ve izinler.
+
+Bir kliniğin takvim kayıtları hekim başına bir DentistSchedule nesnesine
+derlenir: haftanın her günü için değişmez (tuple) bir slot şablonu ve
+kapalı günler (klinik tatilleri + hekim izinleri). Şablondaki slotlar gün
+başından itibaren dakika olarak tutulur ve "HH:MM" etiketleri hazırdır;
+böylece müsaitlik hesabında datetime aritmetiği yapılmaz (bkz.
+availability.compile_template, compute_availability).
+
+Derlenmiş takvimler süreç içinde kliniğin takvim sürümüyle birlikte
+önbelleğe alınır. Takvim kayıtları değiştiğinde sürüm ilerletilir
+(signals.py → conditional.bump_versions) ve bir sonraki istekte klinik
+yeniden derlenir.
+
+Takvimi tanımlanmamış hekimler her gün WORK_START_HOUR - WORK_END_HOUR
+arasında SLOT_DURATION_MINUTES'lık slotlarla çalışır.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+
+from .authentication import TTLCache
+from .availability import (
+    DEFAULT_HOURS, DEFAULT_TEMPLATE, SLOT_DURATION_MINUTES, ClinicSchedules, DentistSchedule,
+    compile_template,
+)
+from .conditional import bump_versions, get_versions
+from .models import DentistLeave, Holiday, ScheduleBreak, WorkingHours
+
+
+SCHEDULE_RESOURCE = 'schedule'
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _expand_days(start_date, end_date):
+    return {start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)}
+
+
+def compile_schedules(clinic_id=None):
+    """
+    Kliniğin (None ise tüm kliniklerin) takvim kayıtlarını derler (4 sorgu).
+
+    Returns:
+        ClinicSchedules
+    """
+    holidays = {}
+    for holiday_clinic_id, day in Holiday.objects.for_clinic(clinic_id).values_list('clinic_id', 'date'):
+        holidays.setdefault(holiday_clinic_id, set()).add(day)
+
+    # hekim -> (klinik, {gün: [saatler]}, {gün|None: [molalar]}, izin günleri)
+    entries = {}
+
+    def entry(dentist_id, dentist_clinic_id):
+        return entries.setdefault(dentist_id, (dentist_clinic_id, {}, {}, set()))
+
+    hours = WorkingHours.objects.for_clinic(clinic_id).values_list(
+        'dentist_id', 'dentist__clinic_id', 'weekday', 'start_time', 'end_time', 'slot_minutes')
+    for dentist_id, dentist_clinic_id, weekday, start, end, step in hours:
+        entry(dentist_id, dentist_clinic_id)[1].setdefault(weekday, []).append(
+            (_minutes(start), _minutes(end), step or SLOT_DURATION_MINUTES))
+
+    breaks = ScheduleBreak.objects.for_clinic(clinic_id).values_list(
+        'dentist_id', 'dentist__clinic_id', 'weekday', 'start_time', 'end_time')
+    for dentist_id, dentist_clinic_id, weekday, start, end in breaks:
+        entry(dentist_id, dentist_clinic_id)[2].setdefault(weekday, []).append((_minutes(start), _minutes(end)))
+
+    leaves = DentistLeave.objects.for_clinic(clinic_id).values_list(
+        'dentist_id', 'dentist__clinic_id', 'start_date', 'end_date')
+    for dentist_id, dentist_clinic_id, start, end in leaves:
+        entry(dentist_id, dentist_clinic_id)[3].update(_expand_days(start, end))
+
+    dentists = {}
+    for dentist_id, (dentist_clinic_id, weekly, daily_breaks, leave_days) in entries.items():
+        templates = []
+        for weekday in range(7):
+            # Saat tanımı olmayan hekim varsayılan saatlerle çalışır
+            day_hours = weekly.get(weekday, ()) if weekly else DEFAULT_HOURS
+            day_breaks = daily_breaks.get(weekday, []) + daily_breaks.get(None, [])
+            templates.append(compile_template(tuple(sorted(day_hours)), tuple(sorted(day_breaks))))
+        dentists[dentist_id] = DentistSchedule(templates, holidays.get(dentist_clinic_id, set()) | leave_days)
+
+    clinic_defaults = {
+        holiday_clinic_id: DentistSchedule([DEFAULT_TEMPLATE] * 7, days)
+        for holiday_clinic_id, days in holidays.items()
+    }
+    return ClinicSchedules(dentists, clinic_defaults)
+
+
+_compiled = TTLCache(settings.SCHEDULE_CACHE['MAX_SIZE'], settings.SCHEDULE_CACHE['TTL'])
+
+
+def get_schedules(clinic_id=None):
+    """
+    Kliniğin derlenmiş takvimlerini döndürür. Sıcak isteklerde sadece
+    takvim sürümü okunur (tek sorgu).
+    """
+    version = get_versions(clinic_id, [SCHEDULE_RESOURCE])[0]
+    key = (str(clinic_id or ''), version)
+    schedules = _compiled.get(key)
+    if schedules is None:
+        schedules = compile_schedules(clinic_id)
+        _compiled.set(key, schedules)
+    return schedules
+
+
+def schedule_changed(clinic_id):
+    """Takvim kaydı değiştiğinde (commit'ten sonra) kliniğin takvim sürümünü ilerletir."""
+    bump_versions(clinic_id, SCHEDULE_RESOURCE)
@@ -0,0 +1,234 @@
+"""
+Hasta arama - aksan duyarsız ad eşleştirme ve telefon anahtarı.
+
+Patient.save() iki arama alanını doldurur:
+    - search_name: Türkçe karakterleri sadeleştirilmiş, küçük harfli ad
+      kelimeleri ("Ayşe Yılmaz" → "ayse yilmaz")
+    - phone_key: Sadece rakamlardan oluşan, ülke kodu / baştaki 0 atılmış
+      telefon ("0555 111 11 11" → "5551111111")
+
+Aramada sorgudaki her kelime adın bir kelimesinin başıyla eşleşmelidir
+("ays yil" → "Ayşe Yılmaz"); rakamlar telefonun başıyla eşleştirilir.
+
+İndeksler veritabanına göre değişir:
+    - PostgreSQL: search_name ve phone_key üzerinde pg_trgm GIN indeksleri
+      (migration 0009); LIKE sorguları bu indeksleri kullanır.
+    - SQLite: search_name için FTS5 tablosu (clinic_patient_fts), tetikleyicilerle
+      güncel tutulur (install_sqlite_search_index); phone_key için B-tree
+      indeksi üzerinde aralık sorgusu.
+    - Diğerleri: aynı LIKE sorguları, indekssiz.
+
+Patient.objects.bulk_create save() çağırmadığı için toplu eklemelerde
+refresh_search_fields() elle çağrılmalıdır.
+"""
+import re
+import unicodedata
+
+from django.db import OperationalError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# Bundan kısa kelimeler FTS/trigram indeksinden yararlanamaz ve çok fazla eşleşir
+MIN_TOKEN_LENGTH = 2
+MIN_PHONE_DIGITS = 3
+# Sıralanacak en fazla aday; fazlası için ad indeksi sırayla taranır
+CANDIDATE_LIMIT = 500
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+_DIGIT_RE = re.compile(r'[0-9]')
+
+
+def fold_text(value):
+    """Küçük harfe çevirir, aksanları atar ve kelimeleri tek boşlukla birleştirir."""
+    value = (value or '').replace('ı', 'i').replace('İ', 'I')
+    value = unicodedata.normalize('NFKD', value)
+    value = ''.join(char for char in value if not unicodedata.combining(char)).lower()
+    return ' '.join(_TOKEN_RE.findall(value))
+
+
+def phone_key(value):
+    """Telefonun rakamlarını ülke kodu ve baştaki 0 olmadan döndürür."""
+    digits = ''.join(_DIGIT_RE.findall(value or ''))
+    if len(digits) == 12 and digits.startswith('90'):
+        return digits[2:]
+    if len(digits) == 11 and digits.startswith('0'):
+        return digits[1:]
+    return digits
+
+
+def parse_query(query):
+    """
+    Sorguyu ad kelimelerine ve telefon rakamlarına ayırır.
+
+    Returns:
+        tuple: (ad kelimeleri listesi, telefon öneki veya '')
+    """
+    words = fold_text(query).split()
+    tokens = [word for word in words if not word.isdigit() and len(word) >= MIN_TOKEN_LENGTH]
+    digits = ''.join(word for word in words if word.isdigit())
+    if digits.startswith('90') and len(digits) > 10:
+        digits = digits[2:]
+    digits = digits[1:] if digits.startswith('0') else digits
+    return tokens, digits if len(digits) >= MIN_PHONE_DIGITS else ''
+
+
+# ============================================================================
+# SQLITE FTS5
+# ============================================================================
+
+FTS_TABLE = 'clinic_patient_fts'
+_FTS_TRIGGERS = {
+    'clinic_patient_fts_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS clinic_patient_fts_ai AFTER INSERT ON clinic_patient BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, search_name) VALUES (new.id, new.search_name);
+        END""",
+    'clinic_patient_fts_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS clinic_patient_fts_ad AFTER DELETE ON clinic_patient BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_name) VALUES ('delete', old.id, old.search_name);
+        END""",
+    'clinic_patient_fts_au': f"""
+        CREATE TRIGGER IF NOT EXISTS clinic_patient_fts_au AFTER UPDATE OF search_name ON clinic_patient BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_name) VALUES ('delete', old.id, old.search_name);
+            INSERT INTO {FTS_TABLE}(rowid, search_name) VALUES (new.id, new.search_name);
+        END""",
+}
+_fts_databases = {}
+
+
+def install_sqlite_search_index(connection):
+    """
+    FTS5 tablosunu ve tetikleyicilerini (yoksa) oluşturur.
+
+    SQLite'ta bazı migration'lar tabloyu yeniden oluşturup tetikleyicileri
+    siler; bu yüzden her migrate sonrasında çağrılır (signals.py,
+    post_migrate) ve eksik tetikleyici bulunursa indeks baştan oluşturulur.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        if 'clinic_patient' not in existing:
+            return False
+        # 0009'dan önceki bir migration'a geri dönülmüşse search_name sütunu yoktur
+        cursor.execute("SELECT name FROM pragma_table_info('clinic_patient')")
+        if 'search_name' not in {row[0] for row in cursor.fetchall()}:
+            return False
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"search_name, content='clinic_patient', content_rowid='id', prefix='2 3')"
+            )
+        except OperationalError:
+            # SQLite FTS5 olmadan derlenmiş; LIKE sorgularına dönülür
+            return False
+        for sql in _FTS_TRIGGERS.values():
+            cursor.execute(sql)
+        if FTS_TABLE not in existing or not existing.issuperset(_FTS_TRIGGERS):
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _fts_databases[connection.settings_dict['NAME']] = True
+    return True
+
+
+def _has_fts(connection):
+    name = connection.settings_dict['NAME']
+    if name not in _fts_databases:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            _fts_databases[name] = cursor.fetchone() is not None
+    return _fts_databases[name]
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def _word_prefix_filter(queryset, tokens):
+    for token in tokens:
+        queryset = queryset.filter(Q(search_name__startswith=token) | Q(search_name__contains=' ' + token))
+    return queryset
+
+
+def _name_filter(queryset, tokens):
+    connection = connections[queryset.db]
+    if connection.vendor == 'sqlite' and _has_fts(connection):
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        ))
+    return _word_prefix_filter(queryset, tokens)
+
+
+def _prefix_range(prefix):
+    """'555' → ('555', '556'): önek aramasını B-tree ile çalışan aralık sorgusuna çevirir."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _phone_filter(queryset, digits):
+    if connections[queryset.db].vendor == 'postgresql':
+        # pg_trgm GIN indeksi LIKE 'x%' sorgusunu karşılar
+        return queryset.filter(phone_key__startswith=digits)
+    lower, upper = _prefix_range(digits)
+    return queryset.filter(phone_key__gte=lower, phone_key__lt=upper)
+
+
+def filter_patients(queryset, query):
+    """Sorguyla eşleşen hastaları döndürür (sıralama yapmaz)."""
+    tokens, digits = parse_query(query)
+    if not tokens and not digits:
+        return queryset.none()
+    if digits:
+        # Telefon öneki yeterince seçici; adlar bu satırlar üzerinde süzülür
+        # (FTS eşleşme listesinin tamamını oluşturmaktan ucuz)
+        return _word_prefix_filter(_phone_filter(queryset, digits), tokens)
+    return _name_filter(queryset, tokens)
+
+
+def _ordered_ids(matches, limit):
+    return list(matches.order_by('search_name', 'id').values_list('id', flat=True)[:limit])
+
+
+def search_patients(queryset, query, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    Eşleşen hastaları alaka sırasına göre liste olarak döndürür.
+
+    Adının ilk kelimesi sorgunun ilk kelimesiyle başlayanlar önce gelir,
+    her grup kendi içinde ada göre sıralanır.
+
+    Maliyet eşleşme sayısından bağımsız tutulur: önce indeksten en fazla
+    CANDIDATE_LIMIT aday alınır. Daha fazlası varsa sorgu çok yaygındır
+    (örn. "ayse"); bu durumda eşleşmeleri sıralamak yerine (klinik, ad)
+    indeksi sırayla taranır ve `limit` sonuç bulununca durulur. Tam
+    satırlar en sonda sadece `limit` hasta için okunur.
+    """
+    tokens, digits = parse_query(query)
+    matches = filter_patients(queryset, query)
+    if not tokens:
+        ids = _ordered_ids(matches, limit)
+    else:
+        lower, upper = _prefix_range(tokens[0])
+        candidates = list(matches.order_by().values_list('id', flat=True)[:CANDIDATE_LIMIT + 1])
+        if len(candidates) <= CANDIDATE_LIMIT:
+            # Adaylar zaten kliniğe göre süzüldü; klinik filtresi tekrar eklenirse
+            # SQLite id listesi yerine kliniğin tüm ad indeksini taramayı seçiyor
+            rows = sorted(
+                queryset.model.objects.using(queryset.db).filter(id__in=candidates).values_list('search_name', 'id'),
+                key=lambda row: (not lower <= row[0] < upper, row),
+            )
+            ids = [pk for _, pk in rows[:limit]]
+        else:
+            matches = _word_prefix_filter(queryset, tokens)
+            if digits:
+                matches = _phone_filter(matches, digits)
+            first_word = Q(search_name__gte=lower, search_name__lt=upper)
+            ids = _ordered_ids(matches.filter(first_word), limit)
+            if len(ids) < limit:
+                ids += _ordered_ids(matches.exclude(first_word), limit - len(ids))
+
+    if not ids:
+        return []
+    patients = queryset.filter(id__in=ids).order_by().in_bulk()
+    return [patients[pk] for pk in ids]
@@ -1,5 +1,11 @@
+from datetime import timedelta
+
+from django.db import transaction
 from rest_framework import serializers
-from .models import Clinic, Dentist, Patient, Appointment
+from .models import Clinic, Dentist, Patient, Appointment, WorkingHours, ScheduleBreak, WaitlistEntry
+from .availability import ACTIVE_STATUSES
+from .booking import BookingConflict, has_conflict, save_appointment
+from .quotas import QuotaExceeded, reserve_dentist
 
 
 class ClinicSerializer(serializers.ModelSerializer):
@@ -15,6 +21,56 @@ class DentistSerializer(serializers.ModelSerializer):
         model = Dentist
         fields = ['id', 'clinic', 'clinic_name', 'name', 'phone', 'specialty', 'email', 'is_active', 'created_at', 'updated_at']
 
+    def create(self, validated_data):
+        # Aktif hekim kotası kayıtla aynı transaction içinde ayrılır (bkz. quotas.py)
+        dentist = Dentist(**validated_data)
+        try:
+            with transaction.atomic():
+                if dentist.is_active:
+                    reserve_dentist(dentist)
+                dentist.save()
+        except QuotaExceeded as exc:
+            raise serializers.ValidationError(str(exc))
+        return dentist
+
+    def update(self, instance, validated_data):
+        # Pasif hekimin yeniden aktifleştirilmesi de kotadan ayırır
+        if instance.is_active or not validated_data.get('is_active', False):
+            return super().update(instance, validated_data)
+        try:
+            with transaction.atomic():
+                reserve_dentist(instance)
+                return super().update(instance, validated_data)
+        except QuotaExceeded as exc:
+            raise serializers.ValidationError(str(exc))
+
+
+class _TimeRangeSerializer(serializers.ModelSerializer):
+    def validate(self, data):
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError("Bitiş saati başlangıç saatinden sonra olmalıdır.")
+        return data
+
+
+class WorkingHoursSerializer(_TimeRangeSerializer):
+    slot_minutes = serializers.IntegerField(min_value=5, max_value=240, default=30)
+
+    class Meta:
+        model = WorkingHours
+        fields = ['weekday', 'start_time', 'end_time', 'slot_minutes']
+
+
+class ScheduleBreakSerializer(_TimeRangeSerializer):
+    class Meta:
+        model = ScheduleBreak
+        fields = ['weekday', 'start_time', 'end_time']
+
+
+class DentistScheduleSerializer(serializers.Serializer):
+    """Hekimin haftalık takvimi; kaydedilirken mevcut saatler ve molalar değiştirilir."""
+    working_hours = WorkingHoursSerializer(many=True)
+    breaks = ScheduleBreakSerializer(many=True)
+
 
 class PatientSerializer(serializers.ModelSerializer):
     clinic_name = serializers.CharField(source='clinic.name', read_only=True)
@@ -50,21 +106,87 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         fields = ['dentist', 'patient', 'start_time', 'end_time', 'status', 'treatment_type', 'treatment_cost', 'notes']
 
     def validate(self, data):
+        # Kısmi güncellemede (PATCH) eksik alanlar mevcut randevudan alınır
+        def value(field):
+            return data.get(field, getattr(self.instance, field, None))
+        
+        start_time, end_time, dentist = value('start_time'), value('end_time'), value('dentist')
+        appointment_status = value('status') or Appointment._meta.get_field('status').default
+        
         # Başlangıç saati bitiş saatinden önce olmalı
-        if data['start_time'] >= data['end_time']:
+        if start_time >= end_time:
             raise serializers.ValidationError("Başlangıç saati bitiş saatinden önce olmalıdır.")
         
-        # Çakışan randevu kontrolü
-        overlapping = Appointment.objects.filter(
-            dentist=data['dentist'],
-            status__in=['scheduled', 'confirmed'],
-            start_time__lt=data['end_time'],
-            end_time__gt=data['start_time']
-        )
-        if self.instance:
-            overlapping = overlapping.exclude(pk=self.instance.pk)
+        # Hekim ve hasta aynı klinikte olmalı
+        if value('patient').clinic_id != dentist.clinic_id:
+            raise serializers.ValidationError("Hasta ve hekim aynı kliniğe ait olmalıdır.")
+        
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and user.clinic_id and user.clinic_id != dentist.clinic_id:
+            raise serializers.ValidationError("Sadece kendi kliniğinizde randevu oluşturabilirsiniz.")
         
-        if overlapping.exists():
-            raise serializers.ValidationError("Bu zaman aralığında başka bir randevu mevcut.")
+        # Çakışan randevu ön kontrolü (kilit almadan hızlı hata için)
+        if appointment_status in ACTIVE_STATUSES and has_conflict(
+            dentist.id, start_time, end_time, exclude_pk=getattr(self.instance, 'pk', None)
+        ):
+            raise serializers.ValidationError(BookingConflict.default_message)
         
         return data
+    
+    def create(self, validated_data):
+        # Kesin çakışma kontrolü hekim kilidi altında yapılır (bkz. booking.py)
+        try:
+            return save_appointment(Appointment(**validated_data))
+        except (BookingConflict, QuotaExceeded) as exc:
+            raise serializers.ValidationError(str(exc))
+    
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        try:
+            return save_appointment(instance)
+        except BookingConflict as exc:
+            raise serializers.ValidationError(str(exc))
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    patient_name = serializers.CharField(source='patient.name', read_only=True)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'patient', 'patient_name', 'dentist', 'treatment_type', 'duration_minutes',
+            'window_start', 'window_end', 'status', 'offer_dentist', 'offer_start', 'offer_end',
+            'offered_at', 'appointment', 'notes', 'created_at', 'updated_at',
+        ]
+        read_only_fields = [
+            'status', 'offer_dentist', 'offer_start', 'offer_end', 'offered_at', 'appointment',
+        ]
+
+    def validate(self, data):
+        def value(field):
+            return data.get(field, getattr(self.instance, field, None))
+
+        patient, dentist = value('patient'), value('dentist')
+        if dentist is not None and dentist.clinic_id != patient.clinic_id:
+            raise serializers.ValidationError("Hasta ve hekim aynı kliniğe ait olmalıdır.")
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and user.clinic_id and user.clinic_id != patient.clinic_id:
+            raise serializers.ValidationError("Sadece kendi kliniğinizin hastalarını ekleyebilirsiniz.")
+        duration = timedelta(minutes=value('duration_minutes') or 0)
+        if not duration or value('window_start') + duration > value('window_end'):
+            raise serializers.ValidationError("Tedavi süresi zaman penceresine sığmalıdır.")
+        return data
+
+    def create(self, validated_data):
+        # Klinik hastadan türetilir
+        validated_data['clinic'] = validated_data['patient'].clinic
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        # Hasta değişirse klinik de yeni hastanınkidir
+        if 'patient' in validated_data:
+            validated_data['clinic'] = validated_data['patient'].clinic
+        return super().update(instance, validated_data)
@@ -0,0 +1,126 @@
+"""
+Model sinyalleri - token önbelleği geçersizleştirme, kaynak sürümleri
+(koşullu GET, dashboard önbelleği, takvim), rapor özetlerinin
+güncellenmesi, randevu olaylarının yayınlanması, boşalan slotların
+bekleme listesine teklifi, mobil senkron günlüğü ve arama indeksinin
+kurulumu.
+"""
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .conditional import bump_versions
+from . import events, quotas, rollups, schedules, sync, waitlist
+from .models import (
+    Clinic, ClinicUser, Dentist, DentistLeave, Holiday, Patient, Appointment, ResourceVersion,
+    ScheduleBreak, SyncChange, WorkingHours,
+)
+from .search import install_sqlite_search_index
+
+
+@receiver([post_save, post_delete], sender=Appointment)
+def appointment_changed(sender, instance, **kwargs):
+    bump_versions(instance.clinic_id, 'appointment')
+
+
+@receiver(pre_save, sender=Appointment)
+@receiver(pre_delete, sender=Appointment)
+def appointment_before_change(sender, instance, **kwargs):
+    # Özetlerden çıkarılacak eski hal (yeni kayıtlarda yok)
+    instance._rollup_previous = None if instance._state.adding else rollups.loaded_values(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, created, **kwargs):
+    # rollups.appointment_saved eski hali sıfırladığı için önce alınır
+    previous = getattr(instance, '_rollup_previous', None)
+    quotas.appointment_saved(instance, created, previous)
+    rollups.appointment_saved(instance)
+    events.publish_appointment(instance, created=created, previous=previous)
+    waitlist.appointment_saved(instance, previous)
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    quotas.appointment_deleted(instance, getattr(instance, '_rollup_previous', None))
+    rollups.appointment_deleted(instance)
+    events.publish_appointment(instance, deleted=True)
+
+
+@receiver([post_save, post_delete], sender=Dentist)
+@receiver([post_save, post_delete], sender=Patient)
+def clinic_member_changed(sender, instance, **kwargs):
+    bump_versions(instance.clinic_id, sender._meta.model_name)
+
+
+@receiver(post_save, sender=Dentist)
+def dentist_saved(sender, instance, created, **kwargs):
+    quotas.dentist_saved(instance, created)
+
+
+@receiver(post_delete, sender=Dentist)
+def dentist_deleted(sender, instance, **kwargs):
+    quotas.dentist_deleted(instance)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_save, sender=Dentist)
+@receiver(post_save, sender=Patient)
+def sync_record_saved(sender, instance, created, **kwargs):
+    sync.record_change(instance, created=created)
+
+
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=Dentist)
+@receiver(post_delete, sender=Patient)
+def sync_record_deleted(sender, instance, **kwargs):
+    sync.record_change(instance, deleted=True)
+
+
+@receiver(post_delete, sender=Clinic)
+def clinic_deleted(sender, instance, **kwargs):
+    # Bağlı kayıtlar silinirken eklenen tombstone'lar ve sürümler klinikle birlikte temizlenir
+    SyncChange.objects.filter(clinic_id=instance.pk).delete()
+    ResourceVersion.objects.filter(clinic_id=instance.pk).delete()
+
+
+@receiver([post_save, post_delete], sender=WorkingHours)
+@receiver([post_save, post_delete], sender=ScheduleBreak)
+@receiver([post_save, post_delete], sender=DentistLeave)
+def dentist_schedule_changed(sender, instance, **kwargs):
+    schedules.schedule_changed(instance.dentist.clinic_id)
+
+
+@receiver([post_save, post_delete], sender=Holiday)
+def holiday_changed(sender, instance, **kwargs):
+    schedules.schedule_changed(instance.clinic_id)
+
+
+@receiver([post_save, post_delete], sender=Clinic)
+def clinic_changed(sender, instance, **kwargs):
+    if kwargs['signal'] is post_save:
+        bump_versions(instance.pk, 'clinic')
+    if kwargs.get('created'):
+        return
+    invalidate_tokens(Token.objects.filter(user__clinic_id=instance.pk).values_list('key', flat=True))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=ClinicUser)
+def user_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_tokens(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+
+
+@receiver(post_migrate)
+def install_search_index(sender, app_config=None, using='default', **kwargs):
+    # SQLite FTS5 tablosu migration'larla yeniden oluşturulan tablolarda
+    # tetikleyicilerini kaybedebilir; her migrate sonrası kontrol edilir
+    if app_config is not None and app_config.label == 'clinic':
+        install_sqlite_search_index(connections[using])
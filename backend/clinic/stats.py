@@ -0,0 +1,78 @@
+"""
+Dashboard istatistikleri - tek sorguluk hesaplama ve klinik bazlı önbellek.
+
+İstatistikler (klinik, gün, kaynak sürümleri) anahtarıyla önbelleğe alınır.
+Randevu, hekim, hasta veya klinik değiştiğinde kliniğin sürümleri
+ilerletilir (signals.py; sinyal üretmeyen toplu yazmalarda importer ve
+loadgen, bkz. conditional.bump_versions); anahtar değiştiği için eski
+istatistik bir daha okunmaz ve süresi dolunca önbellekten düşer. Sıcak
+okumalar sadece sürüm satırlarını okur.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .availability import ACTIVE_STATUSES, day_range_bounds
+from .conditional import RESOURCES, get_versions
+from .models import Clinic, Dentist, Patient, Appointment
+
+
+# Tüm klinikleri kapsayan istatistikler için anahtar parçası
+ALL_CLINICS = 'all'
+
+
+def dashboard_cache_key(clinic_id, day, versions):
+    digest = hashlib.md5(repr(versions).encode(), usedforsecurity=False).hexdigest()
+    return f'dashboard_stats:{clinic_id or ALL_CLINICS}:{day.isoformat()}:{digest}'
+
+
+def compute_dashboard_stats(clinic_id=None, day=None):
+    """
+    Dashboard istatistiklerini veritabanından hesaplar.
+
+    Günün randevu sayıları tek bir koşullu aggregate sorgusuyla alınır.
+
+    Args:
+        clinic_id: (opsiyonel) Sadece bu klinik için hesapla
+        day: (opsiyonel) Gün, varsayılan bugün
+
+    Returns:
+        dict: Dashboard istatistikleri
+    """
+    day = day or timezone.localdate()
+    day_start, day_end = day_range_bounds(day, day)
+
+    clinics = Clinic.objects.for_clinic(clinic_id)
+    dentists = Dentist.objects.for_clinic(clinic_id).filter(is_active=True)
+    patients = Patient.objects.for_clinic(clinic_id)
+    today_appointments = Appointment.objects.for_clinic(clinic_id).filter(
+        start_time__gte=day_start, start_time__lt=day_end
+    )
+
+    today_counts = today_appointments.aggregate(
+        today_appointments=Count('id'),
+        today_completed=Count('id', filter=Q(status='completed')),
+        today_pending=Count('id', filter=Q(status__in=ACTIVE_STATUSES)),
+        today_cancelled=Count('id', filter=Q(status='cancelled')),
+    )
+
+    return {
+        'total_clinics': clinics.count(),
+        'total_dentists': dentists.count(),
+        'total_patients': patients.count(),
+        **today_counts,
+    }
+
+
+def get_dashboard_stats(clinic_id=None):
+    """Önbellekteki istatistikleri döndürür; yoksa hesaplayıp önbelleğe yazar."""
+    today = timezone.localdate()
+    key = dashboard_cache_key(clinic_id, today, get_versions(clinic_id, RESOURCES))
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats(clinic_id, today)
+        cache.set(key, stats, settings.DASHBOARD_STATS_CACHE_TIMEOUT)
+    return stats
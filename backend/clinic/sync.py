@@ -0,0 +1,236 @@
+"""
+Mobil uygulama için artımlı (delta) senkronizasyon.
+
+Randevu, hasta ve hekim değişiklikleri SyncChange günlüğüne yazılır
+(signals.py; toplu aktarımlarda change_entries). İstemci son aldığı imleci
+(cursor) gönderir ve sadece o andan sonra oluşturulan, değişen veya silinen
+kayıtları alır. İmleç 0 ise klinikteki tüm veri gönderilir (ilk senkron).
+
+Yanıt parça parça (chunk) akış olarak üretilir; her parça kendi imlecini
+taşır, böylece yarıda kesilen ilk senkron kaldığı yerden sürdürülebilir.
+Satırlar alan adları başlıkta bir kez verilen diziler olarak gönderilir:
+
+    {"cursor": 1234, "reset": false,
+     "fields": {"appointment": ["id", "dentist", ...], ...},
+     "chunks": [{"cursor": 500, "appointment": [[1, 2, ...]], "deleted": {"patient": [7]}}, ...]}
+
+İmleç günlük satırının id'si değil, kliniğin değişiklik sayacından
+(ResourceVersion, resource='sequence') alınan seq değeridir. Sayaç her
+transaction'da klinik başına bir kez ilerletilir ve transaction'ın günlük
+satırları aynı seq'i paylaşır (toplu aktarımlar ardışık bir blok ayırır).
+Sayaç satırı commit'e kadar kilitli kalır; bu yüzden bir klinikte daha
+küçük seq'li bir satır, daha büyük seq'li bir satırdan sonra görünür hale
+gelemez ve imleci geçmiş bir değişiklik atlanmaz. Bedeli, aynı kliniğin
+günlüğe yazan transaction'larının sayacı aldıkları andan commit'e kadar
+sıraya girmesidir; günlük kaydın sonunda (post_save) yazıldığı için bu
+süre kısadır.
+"""
+from functools import partial
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import Dentist, Patient, Appointment, ResourceVersion, SyncChange
+
+
+SYNC_CHUNK_SIZE = 500
+
+# Kliniğin değişiklik sayacı (ResourceVersion satırı)
+SEQUENCE = 'sequence'
+
+SYNC_MODELS = {
+    'appointment': Appointment,
+    'patient': Patient,
+    'dentist': Dentist,
+}
+
+# İstemciye gönderilen alanlar (ilişkiler id olarak)
+SYNC_FIELDS = {
+    'appointment': (
+        'id', 'dentist', 'patient', 'start_time', 'end_time', 'status',
+        'treatment_type', 'treatment_cost', 'notes', 'updated_at',
+    ),
+    'patient': (
+        'id', 'name', 'phone', 'email', 'date_of_birth', 'blood_type', 'allergies',
+        'chronic_diseases', 'current_medications', 'emergency_contact_name',
+        'emergency_contact_phone', 'notes', 'sms_consent', 'updated_at',
+    ),
+    'dentist': ('id', 'name', 'phone', 'specialty', 'email', 'is_active', 'updated_at'),
+}
+
+
+# ============================================================================
+# SIRA
+# ============================================================================
+
+def next_sequence(clinic_id, count=1):
+    """
+    Kliniğin değişiklik sayacından `count` değer ayırır ve sonuncusunu
+    döndürür. Sayaç satırı çağıran transaction commit olana kadar kilitli
+    kalır. Transaction içinde çağrılmalıdır.
+    """
+    counter = ResourceVersion.objects.filter(clinic_id=clinic_id, resource=SEQUENCE)
+    if not counter.update(version=F('version') + count, changed_at=timezone.now()):
+        ResourceVersion.objects.bulk_create(
+            [ResourceVersion(clinic_id=clinic_id, resource=SEQUENCE, changed_at=timezone.now())],
+            ignore_conflicts=True,
+        )
+        counter.update(version=F('version') + count)
+    return counter.values_list('version', flat=True).get()
+
+
+def transaction_sequence(clinic_id):
+    """
+    Çağıran transaction'ın kliniğe ait seq değeri. Sayaç transaction başına
+    bir kez ilerletilir; sonraki çağrılar aynı değeri döndürür.
+
+    Ayrılan değer bağlantıda, commit'te silinen bir on_commit geri
+    çağrısıyla birlikte tutulur. Transaction (veya değeri ayıran savepoint)
+    geri alınırsa Django bu geri çağrıyı bekleyenlerden çıkarır; değer o
+    durumda geçersiz sayılır ve sayaç yeniden ilerletilir.
+    """
+    connection = transaction.get_connection()
+    taken = connection.__dict__.setdefault('_sync_sequences', {})
+    seq, marker = taken.get(clinic_id, (None, None))
+    if marker is None or not any(callback is marker for _, callback, _ in connection.run_on_commit):
+        seq = next_sequence(clinic_id)
+        marker = partial(taken.pop, clinic_id, None)
+        taken[clinic_id] = (seq, marker)
+        transaction.on_commit(marker)
+    return seq
+
+
+# ============================================================================
+# GÜNLÜĞE YAZMA
+# ============================================================================
+
+def record_change(instance, created=False, deleted=False):
+    """Kaydın günlük satırını yeniler (yeni kayıtlarda silinecek satır yoktur)."""
+    kind = instance._meta.model_name
+    with transaction.atomic(savepoint=False):
+        seq = transaction_sequence(instance.clinic_id)
+        if not created:
+            SyncChange.objects.filter(kind=kind, object_id=instance.pk).delete()
+        SyncChange.objects.create(
+            clinic_id=instance.clinic_id, seq=seq, kind=kind, object_id=instance.pk, deleted=deleted,
+        )
+
+
+def insert_change_rows(connection, source_table, kind, clinic_id):
+    """
+    Kliniğin `source_table` tablosundaki satırları için tek bir
+    INSERT ... SELECT ile günlük satırı ekler; seq değerleri sayaçtan blok
+    olarak ayrılır. Transaction içinde çağrılmalıdır.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {quote(source_table)} WHERE clinic_id = %s", [clinic_id])
+        count = cursor.fetchone()[0]
+        if not count:
+            return
+        first = next_sequence(clinic_id, count) - count
+        changed_at = SyncChange._meta.get_field('changed_at').get_db_prep_save(timezone.now(), connection)
+        cursor.execute(
+            f"INSERT INTO {quote(SyncChange._meta.db_table)} (clinic_id, seq, kind, object_id, deleted, changed_at) "
+            f"SELECT clinic_id, %s + ROW_NUMBER() OVER (ORDER BY id), %s, id, %s, %s "
+            f"FROM {quote(source_table)} WHERE clinic_id = %s",
+            [first, kind, False, changed_at, clinic_id],
+        )
+
+
+def change_entries(objs):
+    """
+    Sinyal üretmeyen toplu INSERT'lerle yazılmış yeni kayıtlar için günlük
+    satırları (importer.insert_objects ile yazılır; kayıtların id'si dolu
+    olmalıdır). seq değerleri ayrıldığı için satırları yazacak transaction
+    içinde çağrılmalıdır.
+    """
+    by_clinic = {}
+    for obj in objs:
+        by_clinic.setdefault(obj.clinic_id, []).append(obj)
+    entries = []
+    for clinic_id, group in by_clinic.items():
+        first = next_sequence(clinic_id, len(group)) - len(group)
+        entries += [
+            SyncChange(clinic_id=clinic_id, seq=first + index, kind=obj._meta.model_name, object_id=obj.pk)
+            for index, obj in enumerate(group, start=1)
+        ]
+    return entries
+
+
+def record_inserted(model, clinic_id, using=DEFAULT_DB_ALIAS):
+    """
+    Kliniğin tüm kayıtlarını tek sorguyla günlüğe yazar. Toplu olarak
+    oluşturulan yeni klinikler (loadgen) için kullanılır.
+    """
+    with transaction.atomic(using=using, savepoint=False):
+        insert_change_rows(connections[using], model._meta.db_table, model._meta.model_name, clinic_id)
+
+
+# ============================================================================
+# OKUMA
+# ============================================================================
+
+def sync_snapshot(clinic_id, cursor):
+    """
+    Senkronun üst sınırını belirler.
+
+    Returns:
+        (cursor, upto, reset): Bu yanıtta (cursor, upto] aralığındaki
+        değişiklikler gönderilir. İmleç günlükte olamayacak kadar ileriyse
+        (ör. veritabanı sıfırlanmış) reset=True ile baştan senkron yapılır.
+    """
+    upto = SyncChange.objects.filter(clinic_id=clinic_id).aggregate(last=Max('seq'))['last'] or 0
+    if cursor > upto:
+        return 0, upto, True
+    return cursor, upto, False
+
+
+def build_chunk(clinic_id, entries):
+    """Günlük satırlarını (seq, kind, object_id, deleted) yanıt parçasına çevirir."""
+    upserts, deleted = {}, {}
+    for _, kind, object_id, is_deleted in entries:
+        (deleted if is_deleted else upserts).setdefault(kind, []).append(object_id)
+
+    chunk = {'cursor': entries[-1][0]}
+    for kind, ids in upserts.items():
+        # Okuma sırasında silinmiş kayıtlar atlanır; tombstone'ları sonraki senkronda gelir
+        chunk[kind] = list(
+            SYNC_MODELS[kind].objects.filter(clinic_id=clinic_id, id__in=ids)
+            .order_by().values_list(*SYNC_FIELDS[kind])
+        )
+    if deleted:
+        chunk['deleted'] = deleted
+    return chunk
+
+
+def iter_sync_chunks(clinic_id, cursor, upto, chunk_size=SYNC_CHUNK_SIZE):
+    """
+    (cursor, upto] aralığındaki değişiklikleri parça parça üretir (keyset).
+    Aynı seq'i paylaşan satırlar (tek transaction) aynı parçada gönderilir.
+    """
+    changes = SyncChange.objects.filter(clinic_id=clinic_id).values_list('seq', 'kind', 'object_id', 'deleted')
+    while cursor < upto:
+        entries = list(changes.filter(seq__gt=cursor, seq__lte=upto).order_by('seq', 'id')[:chunk_size])
+        if not entries:
+            return
+        cursor = entries[-1][0]
+        if len(entries) == chunk_size:
+            entries = [entry for entry in entries if entry[0] < cursor]
+            entries += changes.filter(seq=cursor).order_by('id')
+        yield build_chunk(clinic_id, entries)
+
+
+def stream_sync(clinic_id, cursor, chunk_size=SYNC_CHUNK_SIZE):
+    """Senkron yanıtını JSON parçaları halinde üretir."""
+    cursor, upto, reset = sync_snapshot(clinic_id, cursor)
+    header = {'cursor': upto, 'reset': reset, 'fields': SYNC_FIELDS}
+    yield json.dumps(header, separators=(',', ':'))[:-1] + ',"chunks":['
+    for index, chunk in enumerate(iter_sync_chunks(clinic_id, cursor, upto, chunk_size)):
+        if index:
+            yield ','
+        yield json.dumps(chunk, cls=DjangoJSONEncoder, separators=(',', ':'))
+    yield ']}'
@@ -0,0 +1,61 @@
+"""
+Klinik (tenant) bazlı veri kapsamı.
+
+Giriş yapmış ve bir kliniğe bağlı kullanıcılar yalnızca kendi kliniklerinin
+verisini görür; bu durumda ?clinic= parametresi yok sayılır. Kliniğe bağlı
+olmayan istekler (anonim, süper kullanıcı) için ?clinic= filtresi geçerlidir.
+"""
+from django.db import models
+
+
+def get_request_clinic_id(request):
+    """
+    İsteğin kapsamındaki klinik ID'sini döndürür (yoksa None).
+
+    Args:
+        request: DRF Request nesnesi
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.clinic_id:
+        return user.clinic_id
+    return request.query_params.get('clinic') or None
+
+
+class TenantQuerySet(models.QuerySet):
+    """`clinic` alanı üzerinden filtrelenebilen QuerySet."""
+    tenant_field = 'clinic_id'
+
+    def for_clinic(self, clinic_id):
+        if not clinic_id:
+            return self
+        return self.filter(**{self.tenant_field: clinic_id})
+
+
+class ClinicQuerySet(TenantQuerySet):
+    tenant_field = 'id'
+
+
+class TenantScopedMixin:
+    """
+    ViewSet'lerin queryset'ini isteğin kliniğiyle sınırlar ve kliniğe bağlı
+    kullanıcıların oluşturduğu/güncellediği kayıtları kendi kliniklerine
+    atar; gövdedeki clinic alanıyla kayıt başka bir kliniğe taşınamaz.
+    """
+    # Oluşturma ve güncelleme sırasında kliniği zorlanacak alan (None: zorlanmaz)
+    tenant_create_field = 'clinic'
+
+    def get_queryset(self):
+        return super().get_queryset().for_clinic(get_request_clinic_id(self.request))
+
+    def _save_in_tenant(self, serializer):
+        user = self.request.user
+        if self.tenant_create_field and user.is_authenticated and user.clinic_id:
+            serializer.save(**{self.tenant_create_field: user.clinic})
+        else:
+            serializer.save()
+
+    def perform_create(self, serializer):
+        self._save_in_tenant(serializer)
+
+    def perform_update(self, serializer):
+        self._save_in_tenant(serializer)
@@ -1,3 +1,1750 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import zipfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from .authentication import local_cache
+from .booking import save_appointment
+from .events import InMemoryBroker, set_broker
+from .importer import import_records, iter_csv_records, iter_json_records
+from .loadgen import generate_dataset
+from .profiling import reset_registry
+from .quotas import reserve
+from .messaging import FakeGateway, dispatch_pending
+from .models import (
+    Clinic, ClinicSubscription, ClinicUser, Dentist, Patient, Appointment, OutboundMessage,
+    DentistStatRollup, QuotaCounter, SyncChange, DentistLeave, Holiday, WorkingHours, WaitlistEntry,
+    ResourceVersion,
+)
+from .reminders import queue_reminders
+from .rollups import rebuild_rollups
+from .search import fold_text, phone_key
+from .sync import SYNC_FIELDS, stream_sync
+from .waitlist import OFFER_TTL, FreedSlot, candidate_entries, match_freed_slots
+from .serializers import AppointmentCreateSerializer, DentistSerializer
+from .management.commands.loadtest_booking import hammer_dentist
+
+
+def make_clinic_data(appointment_count=3):
+    """Testler için klinik, iki hekim, hasta ve randevular oluşturur."""
+    clinic = Clinic.objects.create(name="Test Klinik", address="İstanbul")
+    dentist = Dentist.objects.create(clinic=clinic, name="Ahmet Yılmaz", phone="1", specialty="Ortodonti")
+    other = Dentist.objects.create(clinic=clinic, name="Ayşe Kaya", phone="2", specialty="Endodonti")
+    patient = Patient.objects.create(clinic=clinic, name="Ali Veli", phone="0555 111 11 11")
+    start = timezone.make_aware(datetime(2026, 1, 5, 9, 0))
+    for i in range(appointment_count):
+        Appointment.objects.create(
+            dentist=dentist if i % 2 == 0 else other,
+            patient=patient,
+            start_time=start + timedelta(minutes=30 * i),
+            end_time=start + timedelta(minutes=30 * i + 30),
+        )
+    return clinic, dentist, patient
+
+
+class AppointmentQueryPlanTests(TestCase):
+    """Sık kullanılan randevu sorgularının indeks kullandığını doğrular (SQLite)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clinic, cls.dentist, cls.patient = make_clinic_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def assertAppointmentQueriesUseIndex(self, queries):
+        appointment_queries = [
+            q['sql'] for q in queries
+            if 'FROM "clinic_appointment"' in q['sql'] and 'WHERE' in q['sql']
+        ]
+        self.assertTrue(appointment_queries)
+        with connection.cursor() as cursor:
+            for sql in appointment_queries:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' | '.join(row[-1] for row in cursor.fetchall())
+                self.assertRegex(plan, r'SEARCH (clinic_appointment|U\d) USING (COVERING )?INDEX appt_', msg=sql)
+
+    def _capture(self, func):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Sorgu planı testi SQLite içindir.')
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return ctx.captured_queries
+
+    def test_check_availability_uses_index(self):
+        queries = self._capture(lambda: self.client.get('/api/check-availability/?date=2026-01-05'))
+        self.assertAppointmentQueriesUseIndex(queries)
+
+    def test_check_availability_for_dentist_uses_index(self):
+        queries = self._capture(
+            lambda: self.client.get(f'/api/check-availability/?date=2026-01-05&dentist_id={self.dentist.id}')
+        )
+        self.assertAppointmentQueriesUseIndex(queries)
+
+    def test_appointment_list_date_filter_uses_index(self):
+        queries = self._capture(lambda: self.client.get('/api/appointments/?date=2026-01-05'))
+        self.assertAppointmentQueriesUseIndex(queries)
+
+    def test_overlap_check_uses_index(self):
+        start = timezone.make_aware(datetime(2026, 1, 5, 12, 0))
+        serializer = AppointmentCreateSerializer(data={
+            'dentist': self.dentist.id,
+            'patient': self.patient.id,
+            'start_time': start,
+            'end_time': start + timedelta(minutes=30),
+        })
+        queries = self._capture(serializer.is_valid)
+        self.assertAppointmentQueriesUseIndex(queries)
+
+    def test_dashboard_stats_uses_index(self):
+        queries = self._capture(lambda: self.client.get('/api/dashboard-stats/'))
+        self.assertAppointmentQueriesUseIndex(queries)
+
+    def test_invalid_date_filter_returns_400(self):
+        response = self.client.get('/api/appointments/?date=05.01.2026')
+        self.assertEqual(response.status_code, 400)
+
+
+class AvailabilityEndpointTests(TestCase):
+    """check_availability'nin hekim bazlı slot haritası (gerçek uç üzerinden)."""
+
+    def setUp(self):
+        cache.clear()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.other = Dentist.objects.get(clinic=self.clinic, name="Ayşe Kaya")
+        self.client = APIClient()
+
+    def _book(self, dentist, start, minutes=30, **fields):
+        return Appointment.objects.create(
+            dentist=dentist, patient=self.patient, start_time=start,
+            end_time=start + timedelta(minutes=minutes), **fields,
+        )
+
+    def _get(self, day, **params):
+        response = self.client.get('/api/check-availability/', {'date': day, 'clinic': self.clinic.id, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def _booked(self, data, dentist):
+        result = next(item for item in data['dentists'] if item['dentist_id'] == dentist.id)
+        return [slot['start_time'] for slot in result['booked_slots']]
+
+    def test_overlapping_bookings_mark_only_their_dentist(self):
+        # Slot sınırına oturmayan randevu kesiştiği her slotu doldurur
+        self._book(self.dentist, timezone.make_aware(datetime(2026, 1, 5, 9, 15)), minutes=60)
+        self._book(self.other, timezone.make_aware(datetime(2026, 1, 5, 9, 0)))
+        data = self._get('2026-01-05')
+
+        self.assertEqual(self._booked(data, self.dentist), ['09:00', '09:30', '10:00'])
+        self.assertEqual(self._booked(data, self.other), ['09:00'])
+        # Klinik özeti: iki hekim de doluysa slot doludur, biri boşsa müsaittir
+        self.assertEqual([slot['start_time'] for slot in data['booked_slots']], ['09:00'])
+        self.assertEqual((data['total_slots'], data['available_count']), (16, 15))
+        booking = data['booked_slots'][0]['booking']
+        self.assertEqual((booking['patient_name'], booking['treatment_type']), ("Ali Veli", 'Belirtilmemiş'))
+
+        data = self._get('2026-01-05', dentist_id=self.other.id)
+        self.assertEqual([item['dentist_id'] for item in data['dentists']], [self.other.id])
+
+    def test_cancelled_and_no_show_bookings_free_the_slot(self):
+        start = timezone.make_aware(datetime(2026, 1, 5, 11, 0))
+        for status in ('cancelled', 'no_show', 'confirmed'):
+            self._book(self.dentist, start, status=status)
+        self._book(self.dentist, start + timedelta(hours=1), status='cancelled')
+        self.assertEqual(self._booked(self._get('2026-01-05'), self.dentist), ['11:00'])
+
+    def test_day_boundaries_follow_istanbul_time(self):
+        # Pazar ve pazartesi 00:00-01:00 arası çalışma
+        with self.captureOnCommitCallbacks(execute=True):
+            for weekday in (6, 0):
+                WorkingHours.objects.create(
+                    dentist=self.dentist, weekday=weekday, start_time='00:00', end_time='01:00',
+                )
+        # Pazartesi 00:15 yerel saat, UTC'de hâlâ pazar (21:15)
+        monday = self._book(self.dentist, timezone.make_aware(datetime(2026, 1, 5, 0, 15)))
+        self.assertEqual(monday.start_time.astimezone(dt_timezone.utc).day, 4)
+        # Pazar 23:45 yerel saat ertesi güne taşmaz
+        self._book(self.dentist, timezone.make_aware(datetime(2026, 1, 4, 23, 45)), minutes=10)
+
+        self.assertEqual(self._booked(self._get('2026-01-05'), self.dentist), ['00:00', '00:30'])
+        self.assertEqual(self._booked(self._get('2026-01-04'), self.dentist), [])
+
+
+class AvailabilityRangeTests(TestCase):
+    """check_availability aralık modu (start/end)."""
+
+    def setUp(self):
+        cache.clear()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.client = APIClient()
+
+    def _get(self, **params):
+        return self.client.get('/api/check-availability/', {'clinic': self.clinic.id, **params})
+
+    def test_range_streams_each_day_with_one_appointment_query(self):
+        for day in (5, 7):
+            start = timezone.make_aware(datetime(2026, 1, day, 9, 0))
+            Appointment.objects.create(dentist=self.dentist, patient=self.patient,
+                                       start_time=start, end_time=start + timedelta(minutes=30))
+        with CaptureQueriesContext(connection) as queries:
+            response = self._get(start='2026-01-04', end='2026-01-10')
+            data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((data['start'], data['end']), ('2026-01-04', '2026-01-10'))
+        self.assertEqual([day['date'] for day in data['days']], [f'2026-01-{day:02d}' for day in range(4, 11)])
+        self.assertEqual([day['booked_count'] for day in data['days']], [0, 0, 0, 0, 0, 0, 0])
+        dentist_booked = [
+            next(item for item in day['dentists'] if item['dentist_id'] == self.dentist.id)['booked_count']
+            for day in data['days']
+        ]
+        self.assertEqual(dentist_booked, [0, 1, 0, 1, 0, 0, 0])
+        appointment_reads = [q['sql'] for q in queries if 'FROM "clinic_appointment"' in q['sql']]
+        self.assertEqual(len(appointment_reads), 1)
+
+    def test_range_validation(self):
+        cases = {
+            'reversed': {'start': '2026-01-10', 'end': '2026-01-04'},
+            'too long': {'start': '2026-01-01', 'end': '2026-02-01'},
+            'missing end': {'start': '2026-01-01'},
+            'missing start': {'end': '2026-01-01'},
+            'invalid': {'start': '2026-01-01', 'end': '2026-02-30'},
+            'no date': {},
+        }
+        for name, params in cases.items():
+            with self.subTest(name):
+                response = self._get(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+        # En fazla MAX_RANGE_DAYS (31) gün, tek gün aralığı da geçerli
+        for end in ('2026-01-31', '2026-01-01'):
+            response = self._get(start='2026-01-01', end=end)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(b''.join(response.streaming_content))['days'][-1]['date'], end)
+
+
+class ViewSetQueryCountTests(TestCase):
+    """Liste ve detay uçlarının sorgu sayısı satır sayısından bağımsız olmalı (N+1 yok)."""
+
+    # Sayfalı liste: sürüm (koşullu GET) + COUNT + SELECT, detay: sürüm + SELECT
+    LIST_QUERIES = 3
+    DETAIL_QUERIES = 2
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _seed(self, count):
+        clinic, dentist, patient = make_clinic_data(appointment_count=count)
+        for i in range(count):
+            Dentist.objects.create(clinic=clinic, name=f"Hekim {i}", phone="3", specialty="Genel")
+            Patient.objects.create(clinic=clinic, name=f"Hasta {i}", phone=f"0555 000 00 {i:02d}")
+        return {
+            '/api/dentists/': dentist.id,
+            '/api/patients/': patient.id,
+            '/api/appointments/': Appointment.objects.values_list('id', flat=True).first(),
+            '/api/clinics/': clinic.id,
+        }
+
+    def _assert_fixed_query_counts(self, count):
+        detail_ids = self._seed(count)
+        for url, pk in detail_ids.items():
+            with self.subTest(url=url, rows=count):
+                with self.assertNumQueries(self.LIST_QUERIES):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                with self.assertNumQueries(self.DETAIL_QUERIES):
+                    response = self.client.get(f'{url}{pk}/')
+                self.assertEqual(response.status_code, 200)
+
+    def test_query_counts_small_dataset(self):
+        self._assert_fixed_query_counts(2)
+
+    def test_query_counts_full_page(self):
+        self._assert_fixed_query_counts(25)
+
+
+class DashboardStatsCacheTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.today = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0)
+
+    def test_cold_read_uses_single_appointment_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/dashboard-stats/')
+        appointment_queries = [q for q in ctx.captured_queries if 'clinic_appointment' in q['sql']]
+        self.assertEqual(len(appointment_queries), 1)
+
+    def test_warm_read_only_reads_versions(self):
+        self.client.get(f'/api/dashboard-stats/?clinic={self.clinic.id}')
+        # Koşullu GET doğrulayıcısı ve önbellek anahtarı için sürümler
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/dashboard-stats/?clinic={self.clinic.id}')
+        self.assertEqual(response.data['total_dentists'], 2)
+
+    def test_appointment_changes_invalidate_cache(self):
+        url = f'/api/dashboard-stats/?clinic={self.clinic.id}'
+        self.assertEqual(self.client.get(url).data['today_pending'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                dentist=self.dentist, patient=self.patient,
+                start_time=self.today, end_time=self.today + timedelta(minutes=30),
+            )
+        stats = self.client.get(url).data
+        self.assertEqual((stats['today_appointments'], stats['today_pending']), (1, 1))
+        self.assertEqual(self.client.get('/api/dashboard-stats/').data['today_appointments'], 1)
+
+        appointment.status = 'completed'
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.save()
+        stats = self.client.get(url).data
+        self.assertEqual((stats['today_pending'], stats['today_completed']), (0, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.get(pk=appointment.pk).delete()
+        self.assertEqual(self.client.get(url).data['today_appointments'], 0)
+
+    def test_bulk_import_and_other_days_do_not_serve_stale_stats(self):
+        url = f'/api/dashboard-stats/?clinic={self.clinic.id}'
+        self.assertEqual(self.client.get(url).data['total_patients'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_records('patients', self.clinic, [{'name': "Aktarılan", 'phone': "0555 444 44 44"}])
+        self.assertEqual(self.client.get(url).data['total_patients'], 2)
+
+        # Başka bir gün için önbelleğe alınmış istatistik, bugün yapılan değişiklikle eskimez
+        tomorrow = self.today + timedelta(days=1)
+        next_day = mock.patch('django.utils.timezone.localdate', return_value=tomorrow.date())
+        with next_day:
+            self.assertEqual(self.client.get(url).data['today_appointments'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.create(
+                dentist=self.dentist, patient=self.patient,
+                start_time=tomorrow, end_time=tomorrow + timedelta(minutes=30),
+            )
+        with next_day:
+            self.assertEqual(self.client.get(url).data['today_appointments'], 1)
+
+
+class TenantScopingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=2)
+        self.other_clinic, self.other_dentist, _ = make_clinic_data(appointment_count=3)
+        self.user = ClinicUser.objects.create_user('asistan', clinic=self.clinic)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_appointment_clinic_is_denormalized_from_dentist(self):
+        self.assertEqual(
+            set(Appointment.objects.filter(dentist=self.dentist).values_list('clinic_id', flat=True)),
+            {self.clinic.id}
+        )
+
+    def test_viewsets_are_scoped_to_user_clinic(self):
+        # ?clinic= başka bir kliniği gösteremez
+        url_counts = {
+            f'/api/clinics/?clinic={self.other_clinic.id}': 1,
+            f'/api/dentists/?clinic={self.other_clinic.id}': 2,
+            f'/api/patients/?clinic={self.other_clinic.id}': 1,
+            f'/api/appointments/?clinic={self.other_clinic.id}': 2,
+        }
+        for url, count in url_counts.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).data['count'], count)
+        response = self.client.get(f'/api/patients/{Patient.objects.filter(clinic=self.other_clinic).first().id}/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_dashboard_and_availability_are_scoped(self):
+        stats = self.client.get('/api/dashboard-stats/').data
+        self.assertEqual((stats['total_clinics'], stats['total_dentists']), (1, 2))
+        availability = self.client.get('/api/check-availability/?date=2026-01-05').data
+        self.assertEqual(
+            {d['dentist_id'] for d in availability['dentists']},
+            set(Dentist.objects.filter(clinic=self.clinic).values_list('id', flat=True))
+        )
+
+    def test_created_patient_is_assigned_to_user_clinic(self):
+        response = self.client.post('/api/patients/', {
+            'clinic': self.other_clinic.id, 'name': 'Yeni Hasta', 'phone': '0555'
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Patient.objects.get(pk=response.data['id']).clinic_id, self.clinic.id)
+
+    def test_update_cannot_move_record_to_other_clinic(self):
+        response = self.client.patch(f'/api/patients/{self.patient.id}/', {'clinic': self.other_clinic.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['clinic'], self.clinic.id)
+        response = self.client.put(f'/api/dentists/{self.dentist.id}/', {
+            'clinic': self.other_clinic.id, 'name': self.dentist.name, 'phone': '0555', 'specialty': 'Ortodonti',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (Patient.objects.get(pk=self.patient.pk).clinic_id, Dentist.objects.get(pk=self.dentist.pk).clinic_id),
+            (self.clinic.id, self.clinic.id),
+        )
+
+    def test_cannot_book_other_clinic_dentist(self):
+        start = timezone.make_aware(datetime(2026, 1, 6, 9, 0))
+        other_patient = Patient.objects.filter(clinic=self.other_clinic).first()
+        response = self.client.post('/api/appointments/', {
+            'dentist': self.other_dentist.id, 'patient': other_patient.id,
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(minutes=30)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+
+    def test_no_double_booking_under_concurrency(self):
+        clinic, dentist, patient = make_clinic_data(appointment_count=0)
+        start = timezone.make_aware(datetime(2026, 2, 2, 9, 0))
+        slot_starts = [start + timedelta(minutes=30 * i) for i in range(5)]
+
+        result = hammer_dentist(dentist, [patient], slot_starts, threads=8)
+
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(result['booked'], len(slot_starts))
+        self.assertEqual(Appointment.objects.filter(dentist=dentist).count(), len(slot_starts))
+
+
+@override_settings(SMS_GATEWAYS={'mock': 'clinic.messaging.FakeGateway'}, SMS_MAX_ATTEMPTS=2)
+class SmsOutboxTests(TestCase):
+
+    def setUp(self):
+        FakeGateway.reset()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.client = APIClient()
+        self.start = timezone.make_aware(datetime(2026, 3, 2, 10, 0))
+
+    def _book(self, patient):
+        return self.client.post('/api/appointments/', {
+            'dentist': self.dentist.id, 'patient': patient.id,
+            'start_time': self.start.isoformat(),
+            'end_time': (self.start + timedelta(minutes=30)).isoformat(),
+        })
+
+    def test_booking_queues_confirmation_without_sending(self):
+        self.assertEqual(self._book(self.patient).status_code, 201)
+        message = OutboundMessage.objects.get()
+        self.assertEqual((message.kind, message.status, message.phone), ('confirmation', 'pending', self.patient.phone))
+        self.assertIn('10:00', message.body)
+        self.assertEqual(FakeGateway.sent, [])
+
+    def test_patient_without_consent_gets_no_message(self):
+        self.patient.sms_consent = False
+        self.patient.save()
+        self.assertEqual(self._book(self.patient).status_code, 201)
+        self.assertFalse(OutboundMessage.objects.exists())
+
+    def test_dispatch_batches_and_retries(self):
+        failing = Patient.objects.create(clinic=self.clinic, name="Hata", phone="0000")
+        for i in range(5):
+            OutboundMessage.objects.create(provider='mock', phone=f'555{i}', body='x', next_attempt_at=timezone.now())
+        OutboundMessage.objects.create(
+            provider='mock', phone=failing.phone, body='x', patient=failing, next_attempt_at=timezone.now()
+        )
+        FakeGateway.fail_phones = {failing.phone}
+
+        result = dispatch_pending(batch_size=2, max_workers=2)
+        self.assertEqual((result['sent'], result['retried']), (5, 1))
+        self.assertEqual(sorted(len(batch) for batch in FakeGateway.batches), [2, 2, 2])
+
+        # Yeniden deneme zamanı gelmeden mesaj alınmaz
+        self.assertEqual(dispatch_pending()['claimed'], 0)
+        OutboundMessage.objects.filter(status='pending').update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_pending()['failed'], 1)
+        self.assertEqual(OutboundMessage.objects.get(phone=failing.phone).attempts, 2)
+
+
+class ReminderSchedulerTests(TestCase):
+
+    def setUp(self):
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.day = datetime(2026, 4, 1).date()
+        start = timezone.make_aware(datetime(2026, 4, 1, 9, 0))
+        self.appointments = [
+            Appointment.objects.create(
+                dentist=self.dentist, patient=self.patient, status=status,
+                start_time=start + timedelta(hours=i), end_time=start + timedelta(hours=i, minutes=30),
+            )
+            for i, status in enumerate(['scheduled', 'confirmed', 'cancelled'])
+        ]
+
+    def test_queues_active_appointments_in_single_query(self):
+        # Okuma + var olan anahtarlar + bulk insert
+        with self.assertNumQueries(3):
+            result = queue_reminders(self.day, chunk_size=100)
+        self.assertEqual(result, {'scanned': 2, 'queued': 2})
+        self.assertEqual(
+            set(OutboundMessage.objects.values_list('appointment_id', flat=True)),
+            {self.appointments[0].id, self.appointments[1].id}
+        )
+
+    def test_rerun_does_not_double_send(self):
+        queue_reminders(self.day, chunk_size=1)
+        self.assertEqual(queue_reminders(self.day, chunk_size=1)['queued'], 0)
+        self.assertEqual(OutboundMessage.objects.filter(kind='reminder').count(), 2)
+
+    def test_rescheduled_appointment_gets_new_reminder(self):
+        queue_reminders(self.day)
+        appointment = self.appointments[0]
+        appointment.start_time += timedelta(minutes=15)
+        appointment.end_time += timedelta(minutes=15)
+        appointment.save()
+        self.assertEqual(queue_reminders(self.day)['queued'], 1)
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        start = timezone.make_aware(datetime(2026, 5, 4, 9, 0))
+        # Aynı başlangıç saatine sahip randevular id ile ayrışmalı
+        for i in range(7):
+            dentist = Dentist.objects.create(clinic=self.clinic, name=f"Hekim {i}", phone="1", specialty="-")
+            Appointment.objects.create(
+                dentist=dentist, patient=self.patient,
+                start_time=start + timedelta(hours=i // 2), end_time=start + timedelta(hours=i // 2, minutes=30),
+            )
+        for name in ['Zeynep', 'Ali', 'Ali', 'Mehmet']:
+            Patient.objects.create(clinic=self.clinic, name=name, phone="1")
+
+    def _walk(self, url):
+        ids, pages = [], 0
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+            # Koşullu GET sürümleri + sayfa
+            self.assertEqual(len(ctx.captured_queries), 2)
+            ids.extend(row['id'] for row in response.data['results'])
+            url, pages = response.data['next'], pages + 1
+        return ids, pages
+
+    def test_appointments_keyset_walk(self):
+        ids, pages = self._walk('/api/appointments/?cursor=&page_size=3')
+        expected = list(Appointment.objects.order_by('start_time', 'id').values_list('id', flat=True))
+        self.assertEqual((ids, pages), (expected, 3))
+
+    def test_patients_keyset_walk(self):
+        ids, _ = self._walk('/api/patients/?cursor=&page_size=2')
+        self.assertEqual(ids, list(Patient.objects.order_by('name', 'id').values_list('id', flat=True)))
+
+    def test_page_number_mode_unchanged(self):
+        response = self.client.get('/api/appointments/')
+        self.assertEqual(response.data['count'], 7)
+
+    def test_invalid_cursor_returns_404(self):
+        self.assertEqual(self.client.get('/api/appointments/?cursor=bozuk').status_code, 404)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        local_cache.clear()
+        self.clinic = Clinic.objects.create(name="Test Klinik", address="İstanbul")
+        self.user = ClinicUser.objects.create_user('doktor', clinic=self.clinic, role='doctor')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_warm_request_runs_no_auth_queries(self):
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.data['clinic']['name'], "Test Klinik")
+
+    def test_logout_invalidates_token(self):
+        self.client.get('/api/auth/me/')
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+    def test_user_and_clinic_edits_invalidate_cache(self):
+        self.client.get('/api/auth/me/')
+        self.clinic.name = "Yeni Ad"
+        self.clinic.save()
+        self.assertEqual(self.client.get('/api/auth/me/').data['clinic']['name'], "Yeni Ad")
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+
+class PatientExportTests(TestCase):
+
+    def setUp(self):
+        local_cache.clear()
+        self.clinic, _, _ = make_clinic_data(appointment_count=0)
+        other = Clinic.objects.create(name="Diğer Klinik", address="Ankara")
+        Patient.objects.create(clinic=other, name="Başka Hasta", phone="2")
+        Patient.objects.bulk_create([
+            Patient(clinic=self.clinic, name=f'Hasta {i:03d}', phone=str(i)) for i in range(25)
+        ])
+        user = ClinicUser.objects.create_user('sekreter', clinic=self.clinic, role='assistant')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def _download(self, file_type):
+        response = self.client.get(f'/api/patients/export/?type={file_type}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_is_scoped_and_ordered(self):
+        content = self._download('csv').decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0][:3], ['ID', 'Ad Soyad', 'Telefon'])
+        names = [row[1] for row in rows[1:]]
+        self.assertEqual(names, list(Patient.objects.for_clinic(self.clinic.id).order_by('name', 'id').values_list('name', flat=True)))
+        self.assertNotIn("Başka Hasta", names)
+
+    def test_xlsx_is_valid_workbook(self):
+        archive = zipfile.ZipFile(io.BytesIO(self._download('xlsx')))
+        self.assertIsNone(archive.testzip())
+        sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(sheet.count('<row>'), 27)
+        self.assertIn('Hasta 024', sheet)
+
+    def test_query_count_is_flat(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._download('csv')
+        self.assertEqual(len(queries), 1)
+
+    def test_invalid_type(self):
+        self.assertEqual(self.client.get('/api/patients/export/?type=pdf').status_code, 400)
+
+    def test_requires_authentication_and_clinic_scope(self):
+        url = f'/api/patients/export/?clinic={self.clinic.id}'
+        self.assertIn(APIClient().get(url).status_code, (401, 403))
+
+        # ?clinic= sadece kliniğe bağlı olmayan yöneticiler içindir
+        client = APIClient()
+        client.force_authenticate(ClinicUser.objects.create_user('kullanici'))
+        self.assertEqual(client.get(url).status_code, 400)
+        client.force_authenticate(ClinicUser.objects.create_user('yonetici', is_staff=True))
+        self.assertEqual(client.get('/api/patients/export/').status_code, 400)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Başka Hasta", b''.join(response.streaming_content).decode('utf-8-sig'))
+
+    def test_csv_formula_cells_are_escaped(self):
+        Patient.objects.create(clinic=self.clinic, name='=HYPERLINK("http://x")', phone='+905551112233')
+        rows = list(csv.reader(io.StringIO(self._download('csv').decode('utf-8-sig'))))
+        row = next(row for row in rows if 'HYPERLINK' in row[1])
+        self.assertEqual(row[1:3], ['\'=HYPERLINK("http://x")', "'+905551112233"])
+
+
+class DentistRollupTests(TestCase):
+
+    def setUp(self):
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.start = timezone.make_aware(datetime(2026, 3, 2, 9, 0))
+        for i, (status, cost) in enumerate([('completed', 500), ('completed', 250), ('cancelled', 900)]):
+            Appointment.objects.create(
+                dentist=self.dentist, patient=self.patient, status=status,
+                treatment_type='Dolgu', treatment_cost=Decimal(cost),
+                start_time=self.start + timedelta(hours=i), end_time=self.start + timedelta(hours=i, minutes=30),
+            )
+
+    def snapshot(self):
+        # Artımlı güncellemede sıfırlanan satırlar kalır, backfill onları yazmaz
+        return sorted(DentistStatRollup.objects.exclude(appointment_count=0).values_list(
+            'dentist_id', 'period', 'period_start', 'treatment_type', 'status',
+            'appointment_count', 'revenue', 'booked_minutes',
+        ))
+
+    def test_incremental_updates_match_backfill(self):
+        appointment = Appointment.objects.filter(status='cancelled').get()
+        appointment.status = 'completed'
+        appointment.start_time += timedelta(days=31)
+        appointment.end_time += timedelta(days=31)
+        appointment.save()
+        Appointment.objects.filter(treatment_cost=250).get().delete()
+
+        incremental = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_update_reads_no_previous_row(self):
+        appointment = Appointment.objects.get(treatment_cost=500)
+        appointment.status = 'no_show'
+        with CaptureQueriesContext(connection) as queries:
+            appointment.save()
+        self.assertFalse([
+            q for q in queries if q['sql'].startswith('SELECT') and 'FROM "clinic_appointment"' in q['sql']
+        ])
+        self.assertEqual(
+            DentistStatRollup.objects.get(period='month', status='no_show').revenue, Decimal('500')
+        )
+
+    def test_report_reads_only_rollups(self):
+        user = ClinicUser.objects.create_user('hekim', clinic=self.clinic, role='doctor')
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/dentists/{self.dentist.id}/report/?end=2026-03&months=3'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if 'clinic_appointment' in q['sql']])
+        self.assertEqual([m['month'] for m in response.data['months']], ['2026-01', '2026-02', '2026-03'])
+        totals = response.data['totals']
+        self.assertEqual((totals['appointments'], totals['completed'], totals['cancelled']), (2, 2, 1))
+        self.assertEqual(totals['revenue'], Decimal('750'))
+        self.assertEqual(response.data['daily'][0]['booked_minutes'], 60)
+
+        pdf = client.get(url + '&type=pdf')
+        self.assertEqual(pdf['Content-Type'], 'application/pdf')
+        self.assertTrue(pdf.content.startswith(b'%PDF-1.4'))
+
+
+class PatientSearchTests(TestCase):
+
+    def setUp(self):
+        self.clinic, _, self.ali = make_clinic_data(appointment_count=0)
+        other = Clinic.objects.create(name="Diğer Klinik", address="Ankara")
+        Patient.objects.create(clinic=other, name="Ayşe Yıldız", phone="0532 000 00 00")
+        self.ayse = Patient.objects.create(clinic=self.clinic, name="Ayşe Yılmaz", phone="+90 532 123 45 67")
+        self.gul = Patient.objects.create(clinic=self.clinic, name="Gülşen Ayşegül Öztürk", phone="0533 765 43 21")
+        self.client = APIClient()
+        self.client.force_authenticate(ClinicUser.objects.create_user('sekreter', clinic=self.clinic))
+
+    def search(self, q):
+        response = self.client.get('/api/patients/search/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.data['results']]
+
+    def test_normalization(self):
+        self.assertEqual(fold_text("  İsmail ŞAHİN-Çağlar "), "ismail sahin caglar")
+        self.assertEqual(phone_key("+90 (532) 123 45 67"), "5321234567")
+        self.assertEqual(phone_key("0532 123 45 67"), "5321234567")
+
+    def test_ascii_query_matches_turkish_names_ranked(self):
+        self.assertEqual(self.search("ayse"), ["Ayşe Yılmaz", "Gülşen Ayşegül Öztürk"])
+        self.assertEqual(self.search("YIL ays"), ["Ayşe Yılmaz"])
+        self.assertEqual(self.search("oztu"), ["Gülşen Ayşegül Öztürk"])
+        self.assertEqual(self.search("lmaz"), [])
+
+    def test_phone_prefix_and_rename(self):
+        self.assertEqual(self.search("0532 12"), ["Ayşe Yılmaz"])
+        self.assertEqual(self.search("ali 555"), ["Ali Veli"])
+        self.ayse.name = "Zeynep Kara"
+        self.ayse.save(update_fields=['name'])
+        self.assertEqual(self.search("ayse"), ["Gülşen Ayşegül Öztürk"])
+        self.assertEqual(self.search("kara"), ["Zeynep Kara"])
+
+    def test_lookup_uses_search_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Sorgu planı kontrolü SQLite içindir')
+        for term in ["ays", "ays 532", "532"]:
+            with CaptureQueriesContext(connection) as queries:
+                self.search(term)
+            sql = next(q['sql'] for q in queries if 'FROM "clinic_patient"' in q['sql'])
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' | '.join(row[-1] for row in cursor.fetchall())
+            self.assertNotRegex(plan, r"SCAN clinic_patient\b(?!_fts)", msg=term)
+
+
+class BulkImportTests(TestCase):
+
+    def setUp(self):
+        self.clinic, self.dentist, self.ali = make_clinic_data(appointment_count=1)
+
+    def test_patient_import_dedupes_by_phone(self):
+        data = (
+            "\ufeffName,Phone,Email,Date_of_birth,Sms_consent\n"
+            "Ayşe Yılmaz,0532 123 45 67,ayse@example.com,05.03.1990,evet\n"
+            "Ayşe Y.,+90 532 123 4567,,,\n"          # dosya içi tekrar
+            "Ali Veli (eski),555-111-11-11,,,\n"     # klinikte zaten var
+            ",0533 000 00 00,,,\n"                   # ad eksik
+            "Can Öz,0534 000 00 00,hatali,1990-13-01,belki\n"
+        ).encode('utf-8')
+        result = import_records('patients', self.clinic, iter_csv_records(io.BytesIO(data)), chunk_size=2)
+
+        self.assertEqual(
+            {key: result[key] for key in ('processed', 'created', 'duplicates', 'failed')},
+            {'processed': 5, 'created': 1, 'duplicates': 2, 'failed': 2},
+        )
+        self.assertEqual([error['row'] for error in result['errors']], [4, 5])
+        self.assertEqual(set(result['errors'][1]['errors']), {'email', 'date_of_birth', 'sms_consent'})
+        ayse = Patient.objects.get(clinic=self.clinic, name="Ayşe Yılmaz")
+        self.assertEqual((ayse.phone_key, ayse.search_name), ("5321234567", "ayse yilmaz"))
+        self.assertEqual(str(ayse.date_of_birth), "1990-03-05")
+
+    def test_patient_import_query_count_is_per_chunk(self):
+        rows = [{'name': f'Hasta {i}', 'phone': f'0530 {i:07d}'} for i in range(300)]
+        with CaptureQueriesContext(connection) as queries:
+            result = import_records('patients', self.clinic, rows, chunk_size=300)
+        self.assertEqual(result['created'], 300)
+        # parça başına tek tekrar kontrolü; INSERT'ler veritabanının parametre sınırına göre bölünür
+        selects = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'clinic_patient' in q['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertLess(len(queries), 20)
+
+    def test_appointment_import_checks_overlaps_in_bulk(self):
+        Patient.objects.create(clinic=self.clinic, name="Ayşe Yılmaz", phone="0532 123 45 67")
+        rows = [
+            # make_clinic_data: Ahmet Yılmaz 09:00-09:30 dolu
+            {'patient_phone': '05551111111', 'dentist_id': self.dentist.id, 'start_time': '2026-01-05T09:15:00'},
+            {'patient_phone': '0532 123 45 67', 'dentist': 'Dr. Ahmet Yilmaz', 'start_time': '05.01.2026 10:00',
+             'duration_minutes': '60', 'treatment_type': 'Dolgu', 'treatment_cost': '1500,50'},
+            {'patient_phone': '0555 111 11 11', 'dentist_id': self.dentist.id, 'start_time': '2026-01-05T10:30:00'},
+            {'patient_phone': '0555 111 11 11', 'dentist_id': self.dentist.id, 'start_time': '2026-01-05T10:30:00',
+             'status': 'cancelled'},
+            {'patient_phone': '0500 000 00 00', 'dentist': 'Ayşe Kaya', 'start_time': '2026-01-05T11:00:00'},
+            {'patient_phone': '0555 111 11 11', 'dentist': 'Ayşe Kaya', 'start_time': '2026-01-05T11:00:00',
+             'status': 'completed'},
+        ]
+        result = import_records('appointments', self.clinic, rows)
+
+        self.assertEqual((result['created'], result['failed']), (3, 3))
+        self.assertEqual(
+            {error['row']: set(error['errors']) for error in result['errors']},
+            {1: {'start_time'}, 3: {'start_time'}, 5: {'patient_phone'}},
+        )
+        imported = Appointment.objects.get(treatment_type='Dolgu')
+        self.assertEqual(imported.clinic_id, self.clinic.id)
+        self.assertEqual(imported.end_time - imported.start_time, timedelta(minutes=60))
+        self.assertEqual(imported.treatment_cost, Decimal('1500.50'))
+        # bulk_create sinyal tetiklemez; özetler aktarım sırasında güncellenir
+        day_rows = DentistStatRollup.objects.filter(period='day', clinic=self.clinic)
+        self.assertEqual(sum(day_rows.values_list('appointment_count', flat=True)), 4)
+
+    def test_json_reader_handles_arrays_and_lines_across_reads(self):
+        array = io.StringIO(' [ {"name": "A", "note": "x]y"}, {"name": "B"} ] ')
+        lines = io.BytesIO('{"name": "Ç"}\n\n{"name": "D"}\n'.encode('utf-8'))
+        self.assertEqual([row['name'] for row in iter_json_records(array, read_size=5)], ['A', 'B'])
+        self.assertEqual([row['name'] for row in iter_json_records(lines, read_size=5)], ['Ç', 'D'])
+
+    def test_import_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(ClinicUser.objects.create_user('sekreter', clinic=self.clinic))
+        upload = io.BytesIO(b'[{"name": "Zeynep Kara", "phone": "0536 111 22 33"}, {"name": "Eksik"}]')
+        upload.name = 'hastalar.json'
+        response = client.post('/api/import/patients/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertTrue(Patient.objects.filter(clinic=self.clinic, name="Zeynep Kara").exists())
+
+        upload = io.BytesIO(b'x')
+        upload.name = 'hastalar.txt'
+        response = client.post('/api/import/patients/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_endpoint_requires_clinic_user(self):
+        other = Clinic.objects.create(name="Diğer Klinik", address="Ankara")
+        superuser = ClinicUser.objects.create_superuser('yonetici', password='x')
+        for user, expected in ((None, 401), (superuser, 403)):
+            client = APIClient()
+            if user:
+                client.force_authenticate(user)
+            upload = io.BytesIO(b'[{"name": "Zeynep Kara", "phone": "0536 111 22 33"}]')
+            upload.name = 'hastalar.json'
+            response = client.post(f'/api/import/patients/?clinic={other.id}', {'file': upload}, format='multipart')
+            self.assertEqual(response.status_code, expected)
+        self.assertFalse(Patient.objects.filter(name="Zeynep Kara").exists())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoadDatasetBenchmarkTests(TestCase):
+
+    def test_generator_is_deterministic_and_consistent(self):
+        summaries, names = [], []
+        for _ in range(2):
+            summary = generate_dataset(clinics=2, dentists=2, patients=30, years=0.1, seed=7)
+            summaries.append({key: value for key, value in summary.items() if key != 'clinic_ids'})
+            names.append(list(
+                Patient.objects.filter(clinic_id__in=summary['clinic_ids']).order_by('id').values_list('name', 'phone')
+            ))
+        self.assertEqual(summaries[0], summaries[1])
+        self.assertEqual(names[0], names[1])
+        self.assertEqual((summaries[0]['dentists'], summaries[0]['patients']), (4, 60))
+
+        clinic_id = summary['clinic_ids'][0]
+        appointments = Appointment.objects.filter(clinic_id=clinic_id)
+        self.assertGreater(appointments.count(), 0)
+        self.assertFalse(appointments.exclude(dentist__clinic_id=clinic_id).exists())
+        self.assertEqual(Patient.objects.get(id=appointments.first().patient_id).clinic_id, clinic_id)
+        rolled = DentistStatRollup.objects.filter(clinic_id=clinic_id, period='month')
+        self.assertEqual(sum(rolled.values_list('appointment_count', flat=True)), appointments.count())
+
+    def test_bench_api_reports_json(self):
+        clinic_id = generate_dataset(dentists=2, patients=20, years=0.05, seed=1)['clinic_ids'][0]
+        output = io.StringIO()
+        call_command('bench_api', requests=3, stdout=output)
+        report = json.loads(output.getvalue())
+
+        self.assertEqual(report['dataset']['clinic_id'], clinic_id)
+        self.assertEqual(set(report['scenarios']), {
+            'login', 'check_availability', 'dashboard_stats', 'appointment_list', 'appointment_create',
+        })
+        for name, result in report['scenarios'].items():
+            self.assertEqual(result['errors'], 0, msg=name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertGreater(report['scenarios']['appointment_create']['queries_avg'], 0)
+        # Benchmark verisi geri alınır
+        self.assertFalse(Appointment.objects.filter(clinic_id=clinic_id, treatment_type='Kontrol',
+                                                    start_time__gt=timezone.now() + timedelta(days=32)).exists())
+
+
+class AppointmentEventTests(TestCase):
+
+    def setUp(self):
+        self.broker = InMemoryBroker(history=3)
+        self.previous_broker = set_broker(self.broker)
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.other = Dentist.objects.get(clinic=self.clinic, name="Ayşe Kaya")
+        self.client = APIClient()
+        self.client.force_authenticate(ClinicUser.objects.create_user('sekreter', clinic=self.clinic))
+
+    def tearDown(self):
+        set_broker(self.previous_broker)
+
+    def test_api_changes_publish_deltas_after_commit(self):
+        clinic_feed = self.broker.subscribe(self.clinic.id)
+        other_feed = self.broker.subscribe(self.clinic.id, dentist_id=self.other.id)
+        start = timezone.make_aware(datetime(2026, 3, 2, 10, 0))
+        payload = {
+            'dentist': self.dentist.id, 'patient': self.patient.id,
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(minutes=30)).isoformat(),
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/appointments/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        appointment = Appointment.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/appointments/{appointment.id}/', {'dentist': self.other.id}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/appointments/{appointment.id}/', {'status': 'cancelled'}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/appointments/{appointment.id}/')
+
+        events = clinic_feed.drain()
+        self.assertEqual([event['type'] for event in events], [
+            'appointment.created', 'appointment.updated', 'appointment.cancelled', 'appointment.deleted',
+        ])
+        created = events[0]['appointment']
+        self.assertEqual((created['id'], created['patient_name'], created['dentist_name'], created['status']),
+                         (appointment.id, "Ali Veli", "Ahmet Yılmaz", 'scheduled'))
+        self.assertEqual(events[1]['previous']['dentist'], self.dentist.id)
+        self.assertEqual(events[2]['previous']['status'], 'scheduled')
+        # Hekim filtresi: taşınan randevu yeni hekimin akışına da düşer
+        self.assertEqual([event['type'] for event in other_feed.drain()], [
+            'appointment.updated', 'appointment.cancelled', 'appointment.deleted',
+        ])
+
+        # Commit olmayan değişiklik yayınlanmaz
+        with self.captureOnCommitCallbacks() as callbacks:
+            Appointment.objects.create(dentist=self.dentist, patient=self.patient,
+                                       start_time=start, end_time=start + timedelta(minutes=30))
+        self.assertEqual(clinic_feed.drain(), [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual([event['type'] for event in clinic_feed.drain()], ['appointment.created'])
+
+    def test_replay_and_resync(self):
+        for index in range(5):
+            self.broker.publish(self.clinic.id, {'type': 'test', 'n': index})
+        self.broker.publish(self.clinic.id + 1, {'type': 'test', 'n': 99})
+        history = list(self.broker._history[self.clinic.id])
+        self.assertEqual([event['n'] for event in history], [2, 3, 4])
+
+        replay = self.broker.subscribe(self.clinic.id, last_event_id=history[0]['id'])
+        self.assertEqual([event['n'] for event in replay.drain()], [3, 4])
+        # Geçmişten düşmüş olay veya başka bir sunucu örneğinin kimliği
+        for stale in (f'{self.broker.epoch}-1', 'eski-3'):
+            self.assertEqual(self.broker.subscribe(self.clinic.id, last_event_id=stale).drain(), [{'type': 'resync'}])
+
+    def test_sse_endpoint_streams_scoped_events(self):
+        token = Token.objects.create(user=ClinicUser.objects.get(username='sekreter'))
+        response = APIClient().get('/api/events/', {'token': token.key, 'dentist': self.other.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        self.assertEqual(next(stream), b'retry: 3000\n\n')
+
+        self.broker.publish(self.clinic.id, {'type': 'appointment.created', 'appointment': {'dentist': self.dentist.id}})
+        self.broker.publish(self.clinic.id, {'type': 'appointment.created', 'appointment': {'dentist': self.other.id}})
+        chunk = next(stream).decode()
+        self.assertRegex(chunk, r'^id: \S+-2\ndata: \{"type":"appointment.created"')
+        self.assertEqual(self.broker.subscriber_count(self.clinic.id), 1)
+        response.close()
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+        self.assertEqual(APIClient().get('/api/events/').status_code, 401)
+        self.assertEqual(APIClient().get('/api/events/', {'clinic': self.clinic.id}).status_code, 401)
+        self.assertEqual(APIClient().get('/api/events/', {'token': 'yok'}).status_code, 401)
+        # Kliniğe bağlı olmayan, yönetici olmayan kullanıcı ?clinic= ile akış açamaz
+        outsider = Token.objects.create(user=ClinicUser.objects.create_user('disaridan'))
+        response = APIClient().get('/api/events/', {'token': outsider.key, 'clinic': self.clinic.id})
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=2)
+        self.client = APIClient()
+        self.client.force_authenticate(ClinicUser.objects.create_user('sekreter', clinic=self.clinic))
+
+    def _revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_resource_returns_304_after_version_read(self):
+        urls = [
+            '/api/appointments/?date=2026-01-05', f'/api/patients/{self.patient.id}/',
+            '/api/check-availability/?date=2026-01-05', '/api/dashboard-stats/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('W/"'))
+                self.assertIn('Last-Modified', response)
+                with self.assertNumQueries(1):
+                    cached = self._revalidate(url, response)
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached.content, b'')
+                self.assertEqual(cached['ETag'], response['ETag'])
+
+    def test_changes_invalidate_only_dependent_resources(self):
+        appointments = self.client.get('/api/appointments/')
+        patients = self.client.get('/api/patients/')
+        other_clinic = Clinic.objects.create(name="Diğer Klinik", address="Ankara")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.filter(clinic=self.clinic).first().delete()
+        self.assertEqual(self._revalidate('/api/appointments/', appointments).status_code, 200)
+        self.assertEqual(self._revalidate('/api/patients/', patients).status_code, 304)
+
+        # Başka kliniğin değişikliği bu kliniğin önbelleğini bozmaz
+        with self.captureOnCommitCallbacks(execute=True):
+            Patient.objects.create(clinic=other_clinic, name="Veli Ali", phone="0555 222 22 22")
+        self.assertEqual(self._revalidate('/api/patients/', patients).status_code, 304)
+
+        # Hasta adı randevu listesinde de yer alır
+        appointments = self.client.get('/api/appointments/')
+        with self.captureOnCommitCallbacks(execute=True):
+            import_records('patients', self.clinic, [{'name': "Yeni Hasta", 'phone': "0555 333 33 33"}])
+        self.assertEqual(self._revalidate('/api/patients/', patients).status_code, 200)
+        self.assertEqual(self._revalidate('/api/appointments/', appointments).status_code, 200)
+
+    def test_rolled_back_change_keeps_validators(self):
+        response = self.client.get('/api/dentists/')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Dentist.objects.create(clinic=self.clinic, name="Yeni Hekim", phone="3", specialty="Genel")
+            Dentist.objects.create(clinic_id=None, name="Geçersiz", phone="4", specialty="Genel")
+        self.assertEqual(self._revalidate('/api/dentists/', response).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Dentist.objects.create(clinic=self.clinic, name="Yeni Hekim", phone="3", specialty="Genel")
+        self.assertEqual(self._revalidate('/api/dentists/', response).status_code, 200)
+
+    def test_bookings_for_different_dentists_do_not_lock_version_rows(self):
+        other = Dentist.objects.filter(clinic=self.clinic).exclude(pk=self.dentist.pk).get()
+        start = timezone.make_aware(datetime(2026, 2, 2, 9, 0))
+        versions = ResourceVersion.objects.filter(clinic=self.clinic).exclude(resource='sequence')
+
+        for dentist in (self.dentist, other):
+            before = list(versions.values_list('resource', 'version'))
+            with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+                save_appointment(Appointment(dentist=dentist, patient=self.patient,
+                                             start_time=start, end_time=start + timedelta(minutes=30)))
+                # Commit'e kadar sürüm satırlarına yazılmaz; kilit yalnızca bu hekimin satırındadır
+                self.assertEqual(list(versions.values_list('resource', 'version')), before)
+                locks = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "clinic_dentist"')]
+                self.assertEqual(len(locks), 1)
+                self.assertTrue(locks[0].endswith(f'WHERE "clinic_dentist"."id" = {dentist.id}'))
+                self.assertFalse([q['sql'] for q in queries if q['sql'].startswith('UPDATE "clinic_resourceversion"')
+                                  and "'sequence'" not in q['sql']])
+            self.assertNotEqual(list(versions.values_list('resource', 'version')), before)
+
+
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        # Test transaction'ı commit edilmez; seq'ler transaction başına ayrıldığı
+        # için commit sonrası geri çağrılar her yazmadan sonra çalıştırılır
+        with self.captureOnCommitCallbacks(execute=True):
+            self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=3)
+        self.client = APIClient()
+        self.client.force_authenticate(ClinicUser.objects.create_user('mobil', clinic=self.clinic))
+
+    def _sync(self, cursor=0):
+        response = self.client.get('/api/sync/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def _rows(self, payload, kind):
+        fields = payload['fields'][kind]
+        return {
+            row[0]: dict(zip(fields, row))
+            for chunk in payload['chunks'] for row in chunk.get(kind, [])
+        }
+
+    def _deleted(self, payload, kind):
+        return {pk for chunk in payload['chunks'] for pk in chunk.get('deleted', {}).get(kind, [])}
+
+    def test_initial_sync_streams_all_rows_in_chunks(self):
+        for index in range(4):
+            with self.captureOnCommitCallbacks(execute=True):
+                Patient.objects.create(clinic=self.clinic, name=f"Hasta {index}", phone=f"0555 000 00 1{index}")
+        chunks = json.loads(''.join(stream_sync(self.clinic.id, 0, chunk_size=2)))['chunks']
+        # setUp'ın tek transaction'da yazdığı 6 kayıt bölünmeden ilk parçadadır
+        self.assertEqual([sum(len(chunk.get(kind, [])) for kind in SYNC_FIELDS) for chunk in chunks], [6, 2, 2])
+        self.assertEqual(len({chunk['cursor'] for chunk in chunks}), 3)
+
+        payload = self._sync()
+        self.assertFalse(payload['reset'])
+        self.assertEqual(payload['cursor'], payload['chunks'][-1]['cursor'])
+        appointments = self._rows(payload, 'appointment')
+        self.assertEqual(len(appointments), 3)
+        self.assertEqual(next(iter(appointments.values()))['patient'], self.patient.id)
+        self.assertEqual(len(self._rows(payload, 'patient')), 5)
+        self.assertEqual(self._rows(payload, 'patient')[self.patient.id]['name'], "Ali Veli")
+        self.assertEqual(len(self._rows(payload, 'dentist')), 2)
+
+    def test_delta_sync_returns_only_changes_and_tombstones(self):
+        cursor = self._sync()['cursor']
+        other_clinic, _, _ = make_clinic_data(appointment_count=1)
+
+        self.assertEqual(self._sync(cursor), {
+            'cursor': cursor, 'reset': False, 'fields': json.loads(json.dumps(SYNC_FIELDS)), 'chunks': [],
+        })
+
+        appointment_ids = set(Appointment.objects.filter(clinic=self.clinic).values_list('id', flat=True))
+        first = Appointment.objects.filter(clinic=self.clinic).first()
+        first.status = 'confirmed'
+        first.save()
+        first.save()
+        Dentist.objects.create(clinic=self.clinic, name="Yeni Hekim", phone="3", specialty="Genel")
+        import_records('patients', self.clinic, [{'name': "Yeni Hasta", 'phone': "0555 999 99 99"}])
+        patient_id = self.patient.id
+        self.patient.delete()
+
+        payload = self._sync(cursor)
+        self.assertEqual(self._rows(payload, 'appointment'), {})
+        # Hastayla birlikte silinen randevular (değişiklikleri de) tombstone olarak gelir
+        self.assertEqual(self._deleted(payload, 'appointment'), appointment_ids)
+        self.assertEqual(self._deleted(payload, 'patient'), {patient_id})
+        self.assertEqual([row['name'] for row in self._rows(payload, 'patient').values()], ["Yeni Hasta"])
+        self.assertEqual([row['name'] for row in self._rows(payload, 'dentist').values()], ["Yeni Hekim"])
+        # Her kayıt günlükte tek satırdır
+        self.assertEqual(SyncChange.objects.filter(kind='appointment', object_id=first.id).count(), 1)
+
+        self.assertEqual(self._sync(payload['cursor'])['chunks'], [])
+        other_clinic.delete()
+        self.assertFalse(SyncChange.objects.filter(clinic_id=other_clinic.id).exists())
+
+    def test_cursor_follows_clinic_sequence(self):
+        cursor = self._sync()['cursor']
+        other_clinic, _, _ = make_clinic_data(appointment_count=2)
+        import_records('patients', self.clinic, [
+            {'name': f"Aktarılan {i}", 'phone': f"0555 000 00 0{i}"} for i in range(3)
+        ])
+        # Aynı transaction'ın kayıtları sayacı bir kez ilerletir ve aynı seq'i paylaşır
+        with CaptureQueriesContext(connection) as queries, transaction.atomic():
+            self.dentist.save()
+            self.patient.save()
+        counter_updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "clinic_resourceversion"')]
+        self.assertEqual(len(counter_updates), 1)
+
+        seqs = list(SyncChange.objects.filter(clinic=self.clinic, seq__gt=cursor)
+                    .order_by('seq').values_list('seq', flat=True))
+        self.assertEqual(len(seqs), 5)
+        # Toplu aktarım ardışık bir blok ayırır
+        self.assertEqual(seqs[:3], list(range(seqs[0], seqs[0] + 3)))
+        self.assertEqual(seqs[3:], [seqs[2] + 1] * 2)
+        payload = self._sync(cursor)
+        self.assertEqual(payload['cursor'], seqs[-1])
+        self.assertEqual(len(self._rows(payload, 'patient')), 4)
+        self.assertEqual(list(self._rows(payload, 'dentist')), [self.dentist.id])
+        self.assertTrue(SyncChange.objects.filter(clinic=other_clinic).exists())
+
+    def test_rolled_back_sequence_is_not_reused(self):
+        counter = ResourceVersion.objects.filter(clinic=self.clinic, resource='sequence')
+        last = counter.get().version
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.dentist.save()
+            Dentist.objects.create(clinic_id=None, name="Geçersiz", phone="4", specialty="Genel")
+        self.assertEqual(counter.get().version, last)
+        self.dentist.save()
+        self.assertEqual(SyncChange.objects.get(kind='dentist', object_id=self.dentist.id).seq, last + 1)
+        self.assertEqual(counter.get().version, last + 1)
+
+    def test_unknown_cursor_resets(self):
+        payload = self._sync(10 ** 9)
+        self.assertTrue(payload['reset'])
+        self.assertEqual(len(self._rows(payload, 'appointment')), 3)
+        self.assertEqual(self.client.get('/api/sync/', {'cursor': '-1'}).status_code, 400)
+
+    def test_requires_authentication_and_clinic_scope(self):
+        params = {'clinic': self.clinic.id, 'cursor': 0}
+        self.assertIn(APIClient().get('/api/sync/', params).status_code, (401, 403))
+
+        # ?clinic= sadece kliniğe bağlı olmayan yöneticiler içindir
+        client = APIClient()
+        client.force_authenticate(ClinicUser.objects.create_user('kullanici'))
+        self.assertEqual(client.get('/api/sync/', params).status_code, 400)
+        client.force_authenticate(ClinicUser.objects.create_user('yonetici', is_staff=True))
+        response = client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(self._rows(payload, 'appointment')), 3)
+
+
+class SubscriptionQuotaTests(TestCase):
+
+    def setUp(self):
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.subscription = ClinicSubscription.objects.create(
+            clinic=self.clinic, max_dentists=3, max_appointments_per_month=2,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(ClinicUser.objects.create_user('sekreter', clinic=self.clinic))
+        self.start = timezone.make_aware(datetime(2026, 3, 2, 9, 0))
+
+    def _book(self, start):
+        return self.client.post('/api/appointments/', {
+            'dentist': self.dentist.id, 'patient': self.patient.id,
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(minutes=30)).isoformat(),
+        }, format='json')
+
+    def _counter(self, resource, period=None):
+        return QuotaCounter.objects.get(clinic=self.clinic, resource=resource, period_start=period).value
+
+    def test_monthly_appointment_quota_without_count_queries(self):
+        self.assertEqual(self._book(self.start).status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._book(self.start + timedelta(hours=1)).status_code, 201)
+        quota_queries = [q['sql'] for q in queries if 'clinic_quotacounter' in q['sql']]
+        self.assertEqual(len(quota_queries), 1)
+        self.assertTrue(quota_queries[0].startswith('UPDATE'))
+        self.assertFalse([q['sql'] for q in queries if 'COUNT(' in q['sql']])
+
+        response = self._book(self.start + timedelta(hours=2))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("kota", str(response.data))
+        self.assertEqual(Appointment.objects.count(), 2)
+        self.assertEqual(self._counter('appointments', self.start.date().replace(day=1)), 2)
+
+        # Başka ay ayrı sayılır; silinen veya taşınan randevu kotayı boşaltır
+        self.assertEqual(self._book(self.start + timedelta(days=31)).status_code, 201)
+        Appointment.objects.filter(start_time=self.start).get().delete()
+        self.assertEqual(self._book(self.start + timedelta(hours=2)).status_code, 201)
+        moved = Appointment.objects.get(start_time=self.start + timedelta(hours=2))
+        moved.start_time += timedelta(days=60)
+        moved.end_time += timedelta(days=60)
+        moved.save()
+        self.assertEqual(self._counter('appointments', self.start.date().replace(day=1)), 1)
+
+    def test_active_dentist_quota(self):
+        payload = {'clinic': self.clinic.id, 'name': "Yeni Hekim", 'phone': "3", 'specialty': "Genel"}
+        self.assertEqual(self.client.post('/api/dentists/', payload, format='json').status_code, 201)
+        response = self.client.post('/api/dentists/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Dentist.objects.filter(clinic=self.clinic).count(), 3)
+
+        self.client.patch(f'/api/dentists/{self.dentist.id}/', {'is_active': False}, format='json')
+        self.assertEqual(self._counter('dentists'), 2)
+        self.assertEqual(self.client.post('/api/dentists/', payload, format='json').status_code, 201)
+
+    def test_counter_created_concurrently_still_reserves(self):
+        period = self.start.date().replace(day=1)
+        create_counter = QuotaCounter.objects.get_or_create
+
+        def lost_race(**kwargs):
+            # Eşzamanlı çağrı sayacı bizden önce oluşturdu (kullanım sınırın altında)
+            QuotaCounter.objects.create(clinic=self.clinic, resource='appointments', period_start=period, value=1)
+            return create_counter(**kwargs)[0], False
+
+        with mock.patch.object(QuotaCounter.objects, 'get_or_create', side_effect=lost_race):
+            reserve(self.clinic.id, 'appointments', period)
+        self.assertEqual(self._counter('appointments', period), 2)
+
+    def test_reactivating_dentist_respects_quota(self):
+        inactive = Dentist.objects.create(
+            clinic=self.clinic, name="Pasif Hekim", phone="3", specialty="Genel", is_active=False,
+        )
+        payload = {'clinic': self.clinic.id, 'name': "Yeni Hekim", 'phone': "4", 'specialty': "Genel"}
+        self.assertEqual(self.client.post('/api/dentists/', payload, format='json').status_code, 201)
+
+        # Pasif hekimler API listesinde yok; serileştirici doğrudan kullanılır
+        serializer = DentistSerializer(Dentist.objects.get(pk=inactive.pk), data={'is_active': True}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaisesMessage(ValidationError, "kota"):
+            serializer.save()
+        self.assertFalse(Dentist.objects.get(pk=inactive.pk).is_active)
+        self.assertEqual(self._counter('dentists'), 3)
+
+        self.client.patch(f'/api/dentists/{self.dentist.id}/', {'is_active': False}, format='json')
+        serializer = DentistSerializer(Dentist.objects.get(pk=inactive.pk), data={'is_active': True}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.assertTrue(Dentist.objects.get(pk=inactive.pk).is_active)
+        self.assertEqual(self._counter('dentists'), 3)
+
+    def test_reconcile_rebuilds_counters(self):
+        self._book(self.start)
+        Dentist.objects.create(clinic=self.clinic, name="Pasif Hekim", phone="3", specialty="Genel", is_active=False)
+        # Sinyal tetiklemeyen değişiklikler sayaçları bozar
+        moved = self.start + timedelta(days=31)
+        Appointment.objects.update(start_time=moved, end_time=moved + timedelta(minutes=30))
+        QuotaCounter.objects.filter(resource='dentists').update(value=99)
+
+        call_command('reconcile_quota_counters', stdout=io.StringIO())
+        counters = set(QuotaCounter.objects.values_list('resource', 'period_start', 'value'))
+        self.assertEqual(counters, {('appointments', datetime(2026, 4, 1).date(), 1), ('dentists', None, 2)})
+
+
+class ScheduleAvailabilityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.other = Dentist.objects.get(clinic=self.clinic, name="Ayşe Kaya")
+        self.client = APIClient()
+        self.client.force_authenticate(ClinicUser.objects.create_user('sekreter', clinic=self.clinic))
+        self.url = '/api/check-availability/?date=2026-01-05'  # Pazartesi
+
+    def _slots(self, data, dentist):
+        result = next(item for item in data['dentists'] if item['dentist_id'] == dentist.id)
+        return sorted(slot['start_time'] for slot in result['available_slots'] + result['booked_slots'])
+
+    def test_weekly_hours_and_breaks_shape_slots(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f'/api/dentists/{self.dentist.id}/schedule/', {
+                'working_hours': [{'weekday': 0, 'start_time': '10:00', 'end_time': '14:00', 'slot_minutes': 60}],
+                'breaks': [{'weekday': None, 'start_time': '12:00', 'end_time': '13:00'}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['working_hours']), 1)
+
+        data = self.client.get(self.url).data
+        self.assertEqual(self._slots(data, self.dentist), ['10:00', '11:00', '13:00'])
+        # Takvimi olmayan hekim varsayılan saatlerle çalışır
+        self.assertEqual(len(self._slots(data, self.other)), 16)
+        self.assertEqual(data['working_hours'], {'start': '09:00', 'end': '17:00'})
+        hours = {item['dentist_id']: (item['working_hours'], item['slot_minutes']) for item in data['dentists']}
+        self.assertEqual(hours[self.dentist.id], ({'start': '10:00', 'end': '14:00'}, [60]))
+        self.assertEqual(hours[self.other.id], ({'start': '09:00', 'end': '17:00'}, [30]))
+        # Salı için saat tanımı yok: hekim çalışmaz
+        data = self.client.get('/api/check-availability/?date=2026-01-06').data
+        self.assertEqual(self._slots(data, self.dentist), [])
+
+        # Aralık modunda saatler genel varsayılan değil, gün ve hekim bazındadır
+        response = self.client.get(
+            f'/api/check-availability/?start=2026-01-05&end=2026-01-06&dentist_id={self.dentist.id}'
+        )
+        days = json.loads(b''.join(response.streaming_content))['days']
+        self.assertEqual([day['working_hours'] for day in days], [{'start': '10:00', 'end': '14:00'}, None])
+        self.assertEqual(
+            [(day['dentists'][0]['working_hours'], day['dentists'][0]['slot_minutes']) for day in days],
+            [({'start': '10:00', 'end': '14:00'}, [60]), (None, [])],
+        )
+
+        response = self.client.put(f'/api/dentists/{self.dentist.id}/schedule/', {
+            'working_hours': [{'weekday': 0, 'start_time': '14:00', 'end_time': '10:00'}], 'breaks': [],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_holiday_and_leave_close_days(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            DentistLeave.objects.create(
+                dentist=self.dentist, start_date=datetime(2026, 1, 5).date(), end_date=datetime(2026, 1, 6).date(),
+            )
+        data = self.client.get(self.url).data
+        self.assertEqual(self._slots(data, self.dentist), [])
+        self.assertEqual(len(self._slots(data, self.other)), 16)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            holiday = Holiday.objects.create(clinic=self.clinic, date=datetime(2026, 1, 5).date(), name="Tatil")
+        data = self.client.get(self.url).data
+        self.assertEqual(data['total_slots'], 0)
+        self.assertEqual(self._slots(data, self.other), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            holiday.delete()
+        self.assertEqual(self.client.get(self.url).data['total_slots'], 16)
+
+    def test_compiled_schedules_are_reused(self):
+        self.client.get(self.url)
+        schedule_tables = ('clinic_workinghours', 'clinic_schedulebreak', 'clinic_dentistleave', 'clinic_holiday')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertFalse([q['sql'] for q in queries if any(table in q['sql'] for table in schedule_tables)])
+
+
+class NextAvailableTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.other = Dentist.objects.get(clinic=self.clinic, name="Ayşe Kaya")
+        self.client = APIClient()
+        self.client.force_authenticate(ClinicUser.objects.create_user('sekreter', clinic=self.clinic))
+        self.day = timezone.localdate() + timedelta(days=7)
+        self._book(self.dentist, 9, 60)
+
+    def _book(self, dentist, hour, minutes):
+        start = timezone.make_aware(datetime.combine(self.day, datetime.min.time())) + timedelta(hours=hour)
+        Appointment.objects.create(
+            dentist=dentist, patient=self.patient, start_time=start, end_time=start + timedelta(minutes=minutes),
+        )
+
+    def _search(self, **params):
+        params = {'from': self.day.isoformat(), 'limit': 3, **params}
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.get(f'/api/next-available/?{query}')
+
+    def _starts(self, response):
+        return [(slot['dentist_name'], slot['start_time'][11:16]) for slot in response.data['slots']]
+
+    def test_earliest_slots_across_dentists(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._search(duration=30)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._starts(response), [
+            ("Ayşe Kaya", "09:00"), ("Ayşe Kaya", "09:30"), ("Ahmet Yılmaz", "10:00"),
+        ])
+        appointment_queries = [q['sql'] for q in queries if 'FROM "clinic_appointment"' in q['sql']]
+        self.assertEqual(len(appointment_queries), 1)
+
+        response = self._search(duration=30, specialty='ortodonti')
+        self.assertEqual(self._starts(response), [
+            ("Ahmet Yılmaz", "10:00"), ("Ahmet Yılmaz", "10:30"), ("Ahmet Yılmaz", "11:00"),
+        ])
+
+    def test_duration_fits_between_breaks_and_bookings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for start, end in (('09:00', '12:00'), ('13:00', '17:00')):
+                WorkingHours.objects.create(
+                    dentist=self.dentist, weekday=self.day.weekday(), start_time=start, end_time=end,
+                )
+        self._book(self.dentist, 14, 30)
+
+        response = self._search(duration=90, specialty='Ortodonti', limit=4)
+        self.assertEqual(self._starts(response), [
+            ("Ahmet Yılmaz", "10:00"), ("Ahmet Yılmaz", "10:30"), ("Ahmet Yılmaz", "14:30"),
+            ("Ahmet Yılmaz", "15:00"),
+        ])
+        self.assertEqual(self._search(duration=0).status_code, 400)
+        self.assertEqual(self._search(days=90).status_code, 400)
+
+
+class WaitlistMatcherTests(TestCase):
+
+    def setUp(self):
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        self.other = Dentist.objects.get(clinic=self.clinic, name="Ayşe Kaya")
+        self.client = APIClient()
+        self.client.force_authenticate(ClinicUser.objects.create_user('sekreter', clinic=self.clinic))
+        self.day = timezone.localdate() + timedelta(days=7)
+        self.midnight = timezone.make_aware(datetime.combine(self.day, datetime.min.time()))
+        # Hekimin günü dolu: 09:00'dan itibaren 20 ardışık randevu
+        self.appointments = [
+            Appointment.objects.create(
+                dentist=self.dentist, patient=self.patient,
+                start_time=self.at(9, 30 * i), end_time=self.at(9, 30 * i + 30),
+            )
+            for i in range(20)
+        ]
+        self.long_visit = self._entry("Uzun", self.dentist, 60, self.at(9), self.at(12))
+        self.any_dentist = self._entry("Herhangi", None, 30, self.at(0), self.at(23))
+        self.other_dentist = self._entry("Diğer", self.other, 30, self.at(0), self.at(23))
+        self.next_day = self._entry("Yarın", self.dentist, 30, self.at(24 + 9), self.at(24 + 17))
+
+    def at(self, hour, minutes=0):
+        return self.midnight + timedelta(hours=hour, minutes=minutes)
+
+    def _entry(self, name, dentist, duration, window_start, window_end):
+        patient = Patient.objects.create(clinic=self.clinic, name=name, phone=f"0555 {len(name)}")
+        return WaitlistEntry.objects.create(
+            clinic=self.clinic, patient=patient, dentist=dentist, duration_minutes=duration,
+            window_start=window_start, window_end=window_end,
+        )
+
+    def _offer(self, entry):
+        entry.refresh_from_db()
+        return entry.status, entry.offer_start and timezone.localtime(entry.offer_start).strftime('%H:%M')
+
+    def test_single_cancellation_offers_fitting_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/appointments/{self.appointments[0].id}/', {'status': 'cancelled'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        # 60 dakikalık kayıt 30 dakikalık boşluğa sığmaz; sıradaki kayda teklif edilir
+        self.assertEqual(self._offer(self.long_visit), ('waiting', None))
+        self.assertEqual(self._offer(self.any_dentist), ('offered', '09:00'))
+        message = OutboundMessage.objects.get(kind='waitlist')
+        self.assertEqual(message.patient_id, self.any_dentist.patient_id)
+        self.assertIn("09:00", message.body)
+
+    def test_bulk_cancellation_is_matched_in_one_pass(self):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/appointments/bulk-cancel/', {
+                'dentist': self.dentist.id, 'date': self.day.isoformat(),
+            }, format='json')
+        self.assertEqual(len(response.data['cancelled']), 20)
+        waitlist_reads = [
+            q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'clinic_waitlistentry' in q['sql']
+        ]
+        self.assertEqual(len(waitlist_reads), 2)
+
+        self.assertEqual(self._offer(self.long_visit), ('offered', '09:00'))
+        self.assertEqual(self._offer(self.any_dentist), ('offered', '10:00'))
+        self.assertEqual(self._offer(self.other_dentist), ('waiting', None))
+        self.assertEqual(self._offer(self.next_day), ('waiting', None))
+        self.assertEqual(OutboundMessage.objects.filter(kind='cancellation').count(), 20)
+
+    def test_candidate_lookup_uses_window_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Sorgu planı testi SQLite içindir.')
+        sql, params = candidate_entries(
+            self.clinic.id, self.dentist.id, self.at(9), self.at(19)
+        ).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('waitlist_dentist_window_idx', plan)
+        self.assertIn('waitlist_clinic_window_idx', plan)
+
+    def test_accept_and_decline_offers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/appointments/bulk-cancel/', {
+                'ids': [apt.id for apt in self.appointments[:4]],
+            }, format='json')
+        response = self.client.post(f'/api/waitlist/{self.any_dentist.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'booked')
+        booked = Appointment.objects.get(pk=response.data['appointment'])
+        self.assertEqual((booked.patient_id, booked.dentist_id), (self.any_dentist.patient_id, self.dentist.id))
+
+        # Reddedilen aralık sıradaki uygun kayda teklif edilir
+        late = self._entry("Geç Gelen", self.dentist, 60, self.at(9), self.at(12))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/waitlist/{self.long_visit.id}/decline/')
+        self.assertEqual(response.data['status'], 'waiting')
+        self.assertEqual(self._offer(late), ('offered', '09:00'))
+        self.assertEqual(self.client.post(f'/api/waitlist/{self.long_visit.id}/accept/').status_code, 400)
+
+    def _cancel_first_slot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/appointments/{self.appointments[0].id}/', {'status': 'cancelled'}, format='json')
+        self.assertEqual(self._offer(self.any_dentist), ('offered', '09:00'))
+
+    def _expire(self, entry):
+        WaitlistEntry.objects.filter(pk=entry.pk).update(
+            offered_at=timezone.now() - OFFER_TTL - timedelta(minutes=1)
+        )
+
+    def test_expired_offer_is_released_and_reoffered(self):
+        self._cancel_first_slot()
+        self._expire(self.any_dentist)
+        self.assertEqual(self.client.post(f'/api/waitlist/{self.any_dentist.id}/accept/').status_code, 400)
+        self.assertEqual(self._offer(self.any_dentist), ('waiting', None))
+        self.assertFalse(Appointment.objects.filter(patient=self.any_dentist.patient).exists())
+
+        # Zamanlanmış adım: süresi dolan teklifin aralığı sıradaki kayda geçer
+        WaitlistEntry.objects.filter(pk=self.any_dentist.pk).update(
+            status='offered', offer_dentist=self.dentist, offer_start=self.at(9), offer_end=self.at(9, 30),
+        )
+        self._expire(self.any_dentist)
+        fresh = self._entry("Yeni", self.dentist, 30, self.at(9), self.at(12))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('expire_waitlist_offers', stdout=io.StringIO())
+        self.assertEqual(self._offer(self.any_dentist), ('waiting', None))
+        self.assertEqual(self._offer(fresh), ('offered', '09:00'))
+
+    def test_matcher_does_not_keep_gap_for_expired_offer(self):
+        self._cancel_first_slot()
+        self._expire(self.any_dentist)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/appointments/{self.appointments[1].id}/', {'status': 'cancelled'}, format='json')
+            match_freed_slots([FreedSlot(self.clinic.id, self.dentist.id, self.dentist.name, self.at(9), self.at(10))])
+        # Süresi dolan teklif 09:00'ı tutmaz; 60 dakikalık kayıt boşluğa yerleşir
+        self.assertEqual(self._offer(self.long_visit), ('offered', '09:00'))
+        self.assertEqual(self._offer(self.any_dentist), ('waiting', None))
+
+    def test_changing_patient_moves_entry_to_patients_clinic(self):
+        other_clinic = Clinic.objects.create(name="Diğer Klinik", address="Ankara")
+        other_patient = Patient.objects.create(clinic=other_clinic, name="Başka Hasta", phone="2")
+        admin = APIClient()
+        admin.force_authenticate(ClinicUser.objects.create_user('yonetici', is_staff=True))
+        response = admin.patch(f'/api/waitlist/{self.any_dentist.id}/', {'patient': other_patient.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(WaitlistEntry.objects.get(pk=self.any_dentist.pk).clinic_id, other_clinic.id)
+
+    def test_offer_for_deleted_dentist_is_rejected(self):
+        self._cancel_first_slot()
+        self.dentist.appointments.all().delete()
+        self.dentist.delete()
+        for action in ('accept', 'decline'):
+            WaitlistEntry.objects.filter(pk=self.any_dentist.pk).update(status='offered', offered_at=timezone.now())
+            response = self.client.post(f'/api/waitlist/{self.any_dentist.id}/{action}/')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(self._offer(self.any_dentist)[0], 'waiting')
+
+
+PROFILE_ALL = {'ENABLED': True, 'SAMPLE_RATE': 1.0, 'SLOW_REQUEST_MS': 500, 'MAX_CLINICS': 200}
+
+
+@override_settings(REQUEST_PROFILING=PROFILE_ALL)
+class RequestProfilingTests(TestCase):
+
+    def setUp(self):
+        reset_registry()
+        self.addCleanup(reset_registry)
+        self.clinic, self.dentist, self.patient = make_clinic_data()
+        self.user = ClinicUser.objects.create_user('sekreter', clinic=self.clinic)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.admin = APIClient()
+        self.admin.force_authenticate(ClinicUser.objects.create_user('yonetici', is_staff=True))
+
+    def test_metrics_are_admin_only(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        response = self.admin.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_requests_are_tagged_by_view_and_clinic(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/appointments/').status_code, 200)
+        body = self.admin.get('/api/metrics/').content.decode()
+
+        labels = f'view="appointment-list",clinic="{self.clinic.id}"'
+        self.assertIn(f'clinic_requests_total{{{labels},method="GET",status="200"}} 3', body)
+        self.assertIn(f'clinic_request_duration_seconds_count{{{labels}}} 3', body)
+        self.assertIn(f'clinic_request_db_queries_bucket{{{labels},le="+Inf"}} 3', body)
+        self.assertIn(f'clinic_request_renderer_seconds_count{{{labels}}} 3', body)
+
+    def test_histograms_are_cumulative(self):
+        labels = f'view="appointment-list",clinic="{self.clinic.id}"'
+        previous = None
+        for _ in range(3):
+            self.client.get('/api/appointments/')
+            body = self.admin.get('/api/metrics/').content.decode()
+            buckets = [
+                int(line.rsplit(' ', 1)[1]) for line in body.splitlines()
+                if line.startswith(f'clinic_request_duration_seconds_bucket{{{labels},')
+            ]
+            # Kovalar le'ye göre artan, sayılar istekler arasında azalmayan
+            self.assertEqual(buckets, sorted(buckets))
+            if previous is not None:
+                self.assertTrue(all(now >= before for now, before in zip(buckets, previous)))
+                self.assertEqual(buckets[-1], previous[-1] + 1)
+            previous = buckets
+
+    def test_slow_requests_are_logged_with_worst_sql(self):
+        with override_settings(REQUEST_PROFILING={**PROFILE_ALL, 'SLOW_REQUEST_MS': 0}):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            with self.assertLogs('clinic.profiling', level='WARNING') as logs:
+                client.get('/api/appointments/')
+        self.assertIn('view=appointment-list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+        body = self.admin.get('/api/metrics/').content.decode()
+        self.assertIn('clinic_slow_requests_total{view="appointment-list"', body)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReadReplicaRoutingTests(TransactionTestCase):
+    """Birincil ve replika için iki ayrı SQLite veritabanı; replikasyon yok (sonsuz gecikme)."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.clinic, self.dentist, self.patient = make_clinic_data(appointment_count=0)
+        # Replika, hastanın eski adını taşıyan bir kopya
+        Clinic.objects.using('replica').bulk_create([Clinic(id=self.clinic.id, name="Test Klinik")])
+        Dentist.objects.using('replica').bulk_create(list(Dentist.objects.all()))
+        Patient.objects.using('replica').bulk_create([Patient(
+            id=self.patient.id, clinic_id=self.clinic.id, name="Eski Ad", phone=self.patient.phone,
+        )])
+        self.client = self._client('sekreter')
+
+    def _client(self, username):
+        user = ClinicUser.objects.create_user(username, clinic=self.clinic)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client
+
+    def _appointment_ids(self, client):
+        response = client.get('/api/appointments/')
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_safe_requests_read_from_replica(self):
+        response = self.client.get(f'/api/patients/{self.patient.id}/')
+        self.assertEqual(response.data['name'], "Eski Ad")
+        # İstek dışındaki okumalar birincilde
+        self.assertEqual(Patient.objects.get(pk=self.patient.pk).name, "Ali Veli")
+
+    def test_client_reads_its_own_writes_after_booking(self):
+        start = timezone.now().replace(microsecond=0) + timedelta(days=3)
+        response = self.client.post('/api/appointments/', {
+            'dentist': self.dentist.id, 'patient': self.patient.id,
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(minutes=30)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(self._appointment_ids(self.client), [Appointment.objects.get().id])
+        # Diğer istemciler replikadan okumaya devam eder
+        self.assertEqual(self._appointment_ids(self._client('doktor')), [])
+        # Sabitleme süresi dolunca yazan istemci de replikaya döner
+        expired = timezone.now().timestamp() + settings.REPLICA_PIN_SECONDS + 1
+        with mock.patch('django.core.signing.time.time', return_value=expired):
+            self.assertEqual(self._appointment_ids(self.client), [])
+        # Sabitleme paylaşımlı önbellekte değil, imzalı çerezdedir
+        cache.clear()
+        self.assertEqual(self._appointment_ids(self.client), [Appointment.objects.get().id])
+        forged = self._client('asistan')
+        forged.cookies['replica_pin'] = '1'
+        self.assertEqual(self._appointment_ids(forged), [])
+
+    def test_lagging_replica_never_serves_stale_body_under_new_etag(self):
+        url = f'/api/patients/{self.patient.id}/'
+        reader = self._client('doktor')
+        stale = reader.get(url)
+        response = self.client.patch(url, {'name': "Yeni Ad"})
+        self.assertEqual(response.status_code, 200)
+
+        # Replika geride: sürüm de replikadan okunur, eski ETag hâlâ eski veriyi doğrular
+        self.assertEqual(reader.get(url, HTTP_IF_NONE_MATCH=stale['ETag']).status_code, 304)
+        # Yazan istemci birincilden okur ve yeni ETag'i alır
+        fresh = self.client.get(url)
+        self.assertEqual(fresh.data['name'], "Yeni Ad")
+        self.assertNotEqual(fresh['ETag'], stale['ETag'])
+
+        # Replika yetişince eski ETag'li istemci güncel yanıtı alır
+        Patient.objects.using('replica').filter(pk=self.patient.pk).update(name="Yeni Ad")
+        ResourceVersion.objects.using('replica').bulk_create(list(ResourceVersion.objects.all()))
+        response = reader.get(url, HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], "Yeni Ad")
+        self.assertEqual(response['ETag'], fresh['ETag'])
@@ -8,11 +8,17 @@ router.register(r'clinics', views.ClinicViewSet)
 router.register(r'dentists', views.DentistViewSet)
 router.register(r'patients', views.PatientViewSet)
 router.register(r'appointments', views.AppointmentViewSet)
+router.register(r'waitlist', views.WaitlistEntryViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('check-availability/', views.check_availability, name='check-availability'),
+    path('next-available/', views.next_available, name='next-available'),
     path('dashboard-stats/', views.dashboard_stats, name='dashboard-stats'),
+    path('import/<str:kind>/', views.import_data, name='import-data'),
+    path('events/', views.appointment_events, name='appointment-events'),
+    path('sync/', views.sync_changes, name='sync'),
+    path('metrics/', views.metrics, name='metrics'),
     # Auth endpoints
     path('auth/login/', auth_views.login_view, name='auth-login'),
     path('auth/logout/', auth_views.logout_view, name='auth-logout'),
@@ -1,9 +1,16 @@
 """
 Mock SMS fonksiyonları - Gerçek SMS entegrasyonu için 
 daha sonra Twilio, Netgsm vb. ile değiştirilebilir.
+
+Randevu mesajları doğrudan gönderilmez, gönderim kuyruğuna (outbox)
+eklenir; gönderimi `send_sms_outbox` komutu yapar (bkz. messaging.py).
 """
 import logging
 
+from django.utils import timezone
+
+from .messaging import enqueue_sms
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,12 +26,7 @@ def send_sms(phone_number: str, message: str) -> dict:
         dict: Gönderim sonucu
     """
     # Mock implementation - sadece log'a yaz
-    logger.info(f"[MOCK SMS] To: {phone_number}")
-    logger.info(f"[MOCK SMS] Message: {message}")
-    
-    print(f"📱 SMS Gönderildi (Mock)")
-    print(f"   Alıcı: {phone_number}")
-    print(f"   Mesaj: {message}")
+    logger.info("[MOCK SMS] To: %s Message: %s", phone_number, message)
     
     return {
         'success': True,
@@ -34,60 +36,122 @@ def send_sms(phone_number: str, message: str) -> dict:
     }
 
 
-def send_appointment_reminder(appointment) -> dict:
+def _queue_for_patient(appointment, message, kind, dedupe_key=None):
+    return enqueue_sms(
+        appointment.patient.phone, message,
+        patient=appointment.patient, appointment=appointment, kind=kind, dedupe_key=dedupe_key
+    )
+
+
+def reminder_dedupe_key(appointment_id, start_time) -> str:
+    """Bir randevunun belirli bir başlangıç saati için tek hatırlatma anahtarı."""
+    return f"reminder:{appointment_id}:{int(start_time.timestamp())}"
+
+
+def render_reminder(patient_name, local_start, dentist_name) -> str:
+    """
+    Hatırlatma mesajı metnini oluşturur.
+    
+    Args:
+        patient_name: Hasta adı
+        local_start: Yerel saat diliminde randevu başlangıcı
+        dentist_name: Hekim adı
+    """
+    return (
+        f"Sayın {patient_name}, "
+        f"{local_start:%d.%m.%Y} tarihinde saat "
+        f"{local_start:%H:%M}'de "
+        f"Dr. {dentist_name} ile randevunuz bulunmaktadır. "
+        f"Lütfen zamanında geliniz."
+    )
+
+
+def send_appointment_reminder(appointment):
     """
-    Randevu hatırlatma SMS'i gönderir.
+    Randevu hatırlatma SMS'ini kuyruğa ekler.
+    
+    Toplu gönderim için `send_appointment_reminders` komutunu kullanın.
     
     Args:
         appointment: Appointment model instance
     
     Returns:
-        dict: Gönderim sonucu
+        OutboundMessage: Kuyruk kaydı (hastanın SMS izni yoksa None)
     """
-    message = (
-        f"Sayın {appointment.patient.name}, "
-        f"{appointment.start_time.strftime('%d.%m.%Y')} tarihinde saat "
-        f"{appointment.start_time.strftime('%H:%M')}'de "
-        f"Dr. {appointment.dentist.name} ile randevunuz bulunmaktadır. "
-        f"Lütfen zamanında geliniz."
+    message = render_reminder(
+        appointment.patient.name,
+        timezone.localtime(appointment.start_time),
+        appointment.dentist.name,
     )
     
-    return send_sms(appointment.patient.phone, message)
+    return _queue_for_patient(
+        appointment, message, 'reminder',
+        dedupe_key=reminder_dedupe_key(appointment.pk, appointment.start_time)
+    )
 
 
-def send_appointment_confirmation(appointment) -> dict:
+def send_appointment_confirmation(appointment):
     """
-    Randevu onay SMS'i gönderir.
+    Randevu onay SMS'ini kuyruğa ekler.
     
     Args:
         appointment: Appointment model instance
     
     Returns:
-        dict: Gönderim sonucu
+        OutboundMessage: Kuyruk kaydı (hastanın SMS izni yoksa None)
     """
     message = (
         f"Sayın {appointment.patient.name}, randevunuz oluşturulmuştur. "
-        f"Tarih: {appointment.start_time.strftime('%d.%m.%Y %H:%M')} "
+        f"Tarih: {timezone.localtime(appointment.start_time).strftime('%d.%m.%Y %H:%M')} "
         f"Hekim: Dr. {appointment.dentist.name}"
     )
     
-    return send_sms(appointment.patient.phone, message)
+    return _queue_for_patient(appointment, message, 'confirmation')
 
 
-def send_appointment_cancellation(appointment) -> dict:
+def send_appointment_cancellation(appointment):
     """
-    Randevu iptal SMS'i gönderir.
+    Randevu iptal SMS'ini kuyruğa ekler.
     
     Args:
         appointment: Appointment model instance
     
     Returns:
-        dict: Gönderim sonucu
+        OutboundMessage: Kuyruk kaydı (hastanın SMS izni yoksa None)
     """
     message = (
         f"Sayın {appointment.patient.name}, "
-        f"{appointment.start_time.strftime('%d.%m.%Y %H:%M')} tarihli "
+        f"{timezone.localtime(appointment.start_time).strftime('%d.%m.%Y %H:%M')} tarihli "
         f"randevunuz iptal edilmiştir."
     )
     
-    return send_sms(appointment.patient.phone, message)
+    return _queue_for_patient(appointment, message, 'cancellation')
+
+
+def waitlist_offer_dedupe_key(entry_id, start_time) -> str:
+    """Bir bekleme kaydına aynı slotun tek kez teklif edilmesi için anahtar."""
+    return f"waitlist:{entry_id}:{int(start_time.timestamp())}"
+
+
+def send_waitlist_offer(entry, dentist_name):
+    """
+    Bekleme listesindeki hastaya boşalan slotu teklif eden SMS'i kuyruğa ekler.
+    
+    Args:
+        entry: Teklif bilgileri (offer_start) doldurulmuş WaitlistEntry
+        dentist_name: Teklif edilen hekimin adı
+    
+    Returns:
+        OutboundMessage: Kuyruk kaydı (hastanın SMS izni yoksa None)
+    """
+    message = (
+        f"Sayın {entry.patient.name}, "
+        f"{timezone.localtime(entry.offer_start).strftime('%d.%m.%Y %H:%M')} için "
+        f"Dr. {dentist_name} ile randevu imkânı açıldı. "
+        f"Randevuyu almak için kliniğimizi arayınız."
+    )
+    
+    return enqueue_sms(
+        entry.patient.phone, message, patient=entry.patient, kind='waitlist',
+        dedupe_key=waitlist_offer_dedupe_key(entry.pk, entry.offer_start)
+    )
@@ -1,52 +1,225 @@
+import asyncio
+import json
 from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view, parser_classes, permission_classes
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from django.utils import timezone
 
-from .models import Clinic, Dentist, Patient, Appointment
+from .models import Clinic, Dentist, Patient, Appointment, WorkingHours, ScheduleBreak, WaitlistEntry
 from .serializers import (
     ClinicSerializer, DentistSerializer, PatientSerializer,
-    AppointmentSerializer, AppointmentCreateSerializer
+    AppointmentSerializer, AppointmentCreateSerializer, DentistScheduleSerializer,
+    WaitlistEntrySerializer
+)
+from .utils import send_appointment_cancellation, send_appointment_confirmation
+from .authentication import CachedTokenAuthentication
+from .conditional import RESOURCES, ConditionalGetMixin, conditional_get
+from .events import get_broker, stream_events, stream_events_sync
+from .stats import get_dashboard_stats
+from .tenancy import TenantScopedMixin, get_request_clinic_id
+from .pagination import KeysetOrPageNumberPagination
+from .exports import patient_export_rows, stream_csv, stream_xlsx
+from .search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_patients
+from .importer import IMPORT_FORMATS, IMPORTERS, import_records, open_records
+from .sync import stream_sync
+from .profiling import PROMETHEUS_CONTENT_TYPE, get_registry
+from .booking import BookingConflict
+from .quotas import QuotaExceeded
+from .waitlist import OfferUnavailable, accept_offer, collect_freed_slots, decline_offer
+from .reports import (
+    DEFAULT_REPORT_MONTHS, MAX_REPORT_MONTHS, build_dentist_report, render_dentist_report_pdf,
+)
+from .availability import (
+    ACTIVE_STATUSES, MAX_NEXT_AVAILABLE_LIMIT, MAX_RANGE_DAYS, NEXT_AVAILABLE_DAYS,
+    NEXT_AVAILABLE_FIRST_WINDOW_DAYS, NEXT_AVAILABLE_LIMIT, SLOT_DURATION_MINUTES,
+    compute_availability, day_range_bounds, find_next_available,
+    iter_range_availability, working_hours,
 )
-from .utils import send_appointment_confirmation
+from .schedules import SCHEDULE_RESOURCE, get_schedules, schedule_changed
+
+
+EXPORT_TYPES = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
 
 
-class ClinicViewSet(viewsets.ModelViewSet):
+def _bulk_scope_clinic_id(request, user):
+    """
+    Kliniğin tüm verisini döken uçların (dışa aktarma, senkron, olay akışı)
+    klinik ID'si; geçerli bir klinik yoksa None. Kliniğe bağlı kullanıcının
+    kapsamı kendi kliniğidir; ?clinic= sadece kliniğe bağlı olmayan
+    yöneticiler içindir.
+    """
+    clinic_id = user.clinic_id
+    if not clinic_id and user.is_staff:
+        clinic_id = request.GET.get('clinic')
+    return int(clinic_id) if str(clinic_id or '').isdigit() else None
+
+
+class ClinicViewSet(ConditionalGetMixin, TenantScopedMixin, viewsets.ModelViewSet):
     """Klinik CRUD işlemleri"""
     queryset = Clinic.objects.all()
     serializer_class = ClinicSerializer
+    conditional_resources = ('clinic',)
+    tenant_create_field = None
 
 
-class DentistViewSet(viewsets.ModelViewSet):
+class DentistViewSet(ConditionalGetMixin, TenantScopedMixin, viewsets.ModelViewSet):
     """Diş Hekimi CRUD işlemleri"""
-    queryset = Dentist.objects.filter(is_active=True)
+    # DentistSerializer.clinic_name için klinik aynı sorguda yüklenir
+    queryset = Dentist.objects.filter(is_active=True).select_related('clinic')
     serializer_class = DentistSerializer
+    conditional_resources = ('dentist', 'clinic')
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        clinic_id = self.request.query_params.get('clinic')
-        if clinic_id:
-            queryset = queryset.filter(clinic_id=clinic_id)
-        return queryset
+    @action(detail=True, methods=['get'], url_path='report')
+    def report(self, request, pk=None):
+        """
+        Hekim performans raporu (aylık grafik, kazanç, yoğunluk, toplamlar).
+        Sadece önceden hesaplanmış özetlerden okunur (bkz. rollups.py).
+
+        Query Parameters:
+            - months: Rapordaki ay sayısı (varsayılan 12, en fazla MAX_REPORT_MONTHS)
+            - end: (opsiyonel) YYYY-MM formatında son ay, varsayılan bu ay
+            - type: json (varsayılan) veya pdf
+        """
+        dentist = self.get_object()
+        try:
+            months = int(request.query_params.get('months', DEFAULT_REPORT_MONTHS))
+            end = request.query_params.get('end')
+            end_month = datetime.strptime(end, '%Y-%m').date() if end else None
+        except ValueError:
+            return Response(
+                {'error': 'Geçersiz months veya end parametresi (end: YYYY-MM).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= months <= MAX_REPORT_MONTHS:
+            return Response(
+                {'error': f'months 1 ile {MAX_REPORT_MONTHS} arasında olmalıdır.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        report = build_dentist_report(dentist, end_month, months)
+        if request.query_params.get('type') == 'pdf':
+            response = HttpResponse(render_dentist_report_pdf(report), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="hekim_{dentist.id}_{report["end"]}.pdf"'
+            return response
+        return Response(report)
 
-class PatientViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get', 'put'], url_path='schedule')
+    def schedule(self, request, pk=None):
+        """
+        Hekimin haftalık çalışma saatleri ve molaları.
+
+        PUT gövdesi: {"working_hours": [{"weekday", "start_time", "end_time",
+        "slot_minutes"}], "breaks": [{"weekday" (boşsa her gün), "start_time",
+        "end_time"}]}. Mevcut kayıtların yerini alır; boş working_hours
+        hekimi varsayılan saatlere döndürür.
+        """
+        dentist = self.get_object()
+        if request.method == 'PUT':
+            serializer = DentistScheduleSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                dentist.working_hours.all().delete()
+                dentist.schedule_breaks.all().delete()
+                WorkingHours.objects.bulk_create(
+                    WorkingHours(dentist=dentist, **item) for item in serializer.validated_data['working_hours']
+                )
+                ScheduleBreak.objects.bulk_create(
+                    ScheduleBreak(dentist=dentist, **item) for item in serializer.validated_data['breaks']
+                )
+                # bulk_create sinyal üretmez
+                schedule_changed(dentist.clinic_id)
+        return Response(DentistScheduleSerializer({
+            'working_hours': dentist.working_hours.all(),
+            'breaks': dentist.schedule_breaks.order_by('weekday', 'start_time'),
+        }).data)
+
+
+class PatientViewSet(ConditionalGetMixin, TenantScopedMixin, viewsets.ModelViewSet):
     """Hasta CRUD işlemleri"""
-    queryset = Patient.objects.all()
+    # PatientSerializer.clinic_name için klinik aynı sorguda yüklenir
+    queryset = Patient.objects.select_related('clinic').order_by('name', 'id')
     serializer_class = PatientSerializer
+    conditional_resources = ('patient', 'clinic')
+    pagination_class = KeysetOrPageNumberPagination
+    keyset_ordering = ('name', 'id')
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        clinic_id = self.request.query_params.get('clinic')
-        if clinic_id:
-            queryset = queryset.filter(clinic_id=clinic_id)
-        return queryset
+    @action(detail=False, methods=['get'], url_path='export', permission_classes=[IsAuthenticated])
+    def export(self, request):
+        """
+        Hasta listesini dosya olarak indirir (akış halinde, sabit bellekle).
+        Kimlik doğrulaması gerektirir.
+
+        Query Parameters:
+            - type: csv (varsayılan) veya xlsx
+            - clinic: Kliniğe bağlı olmayan yöneticiler için klinik ID'si
+
+        Tüm kliniklerin hastaları tek dosyada dışa aktarılmaz; kapsamda
+        geçerli bir klinik yoksa 400 döner.
+        """
+        clinic_id = _bulk_scope_clinic_id(request, request.user)
+        if clinic_id is None:
+            return Response({'error': 'Geçerli bir klinik gereklidir (clinic parametresi).'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        # 'format' DRF'in içerik anlaşması parametresi olduğu için 'type' kullanılır
+        file_type = request.query_params.get('type', 'csv')
+        if file_type not in EXPORT_TYPES:
+            return Response(
+                {'error': 'type parametresi csv veya xlsx olmalıdır.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        stream, content_type = EXPORT_TYPES[file_type]
+        rows = patient_export_rows(self.filter_queryset(self.get_queryset()).for_clinic(clinic_id))
+        response = StreamingHttpResponse(stream(rows), content_type=content_type)
+        filename = f"hastalar_{timezone.localdate():%Y%m%d}.{file_type}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Ad ve telefonla hızlı hasta arama (aksan duyarsız, alaka sıralı).
+
+        Query Parameters:
+            - q: Aranacak metin, örn. "ays yil" veya "0555 12"
+            - limit: En fazla sonuç (varsayılan 20, en fazla 100)
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+        except ValueError:
+            limit = DEFAULT_SEARCH_LIMIT
+        patients = search_patients(self.get_queryset(), request.query_params.get('q', ''), max(limit, 1))
+        return Response({'results': self.get_serializer(patients, many=True).data})
+
+
+class AppointmentViewSet(ConditionalGetMixin, TenantScopedMixin, viewsets.ModelViewSet):
     """Randevu CRUD işlemleri"""
-    queryset = Appointment.objects.all()
+    # AppointmentSerializer.dentist_name / patient_name için
+    queryset = Appointment.objects.select_related('dentist', 'patient')
+    conditional_resources = ('appointment', 'dentist', 'patient')
+    # Klinik hekimden türetilir (Appointment.save)
+    tenant_create_field = None
+    pagination_class = KeysetOrPageNumberPagination
+    keyset_ordering = ('start_time', 'id')
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -64,7 +237,12 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if dentist_id:
             queryset = queryset.filter(dentist_id=dentist_id)
         if date:
-            queryset = queryset.filter(start_time__date=date)
+            try:
+                target_date = _parse_date(date)
+            except ValueError:
+                raise ValidationError({'date': 'Geçersiz tarih formatı. YYYY-MM-DD formatını kullanın.'})
+            day_start, day_end = day_range_bounds(target_date, target_date)
+            queryset = queryset.filter(start_time__gte=day_start, start_time__lt=day_end)
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         
@@ -72,142 +250,456 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         appointment = serializer.save()
-        # Mock SMS gönder
+        # Onay SMS'i kuyruğa eklenir; gönderimi send_sms_outbox worker'ı yapar
         send_appointment_confirmation(appointment)
 
+    @action(detail=False, methods=['post'], url_path='bulk-cancel')
+    def bulk_cancel(self, request):
+        """
+        Birden fazla aktif randevuyu tek işlemde iptal eder (ör. hekim
+        hastalandığında günün randevuları).
+
+        Gövde: {"ids": [1, 2, ...]} veya {"dentist": 3, "date": "YYYY-MM-DD"}
+
+        Hastalara iptal SMS'i gönderilir; boşalan slotlar commit sonrasında
+        tek seferde bekleme listesine teklif edilir (bkz. waitlist.py).
+        """
+        appointments = super().get_queryset().filter(status__in=ACTIVE_STATUSES)
+        ids, dentist_id, date = request.data.get('ids'), request.data.get('dentist'), request.data.get('date')
+        if ids:
+            appointments = appointments.filter(pk__in=ids)
+        elif dentist_id and date:
+            try:
+                target_date = _parse_date(date)
+            except ValueError:
+                raise ValidationError({'date': 'Geçersiz tarih formatı. YYYY-MM-DD formatını kullanın.'})
+            day_start, day_end = day_range_bounds(target_date, target_date)
+            appointments = appointments.filter(dentist_id=dentist_id, start_time__gte=day_start, start_time__lt=day_end)
+        else:
+            raise ValidationError('ids veya dentist ile date gereklidir.')
+
+        with transaction.atomic(), collect_freed_slots():
+            cancelled = list(appointments.order_by('start_time'))
+            for appointment in cancelled:
+                appointment.status = 'cancelled'
+                appointment.save()
+                send_appointment_cancellation(appointment)
+        return Response({'cancelled': [appointment.id for appointment in cancelled]})
+
+
+class WaitlistEntryViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    """
+    Bekleme listesi. Boşalan slotlar uygun kayıtlara SMS ile teklif edilir;
+    teklif accept ile randevuya çevrilir, decline ile sıradaki kayda geçer.
+    Süresi dolmuş (waitlist.OFFER_TTL) teklifler yanıtlanamaz.
+    """
+    queryset = WaitlistEntry.objects.select_related('patient', 'offer_dentist')
+    serializer_class = WaitlistEntrySerializer
+    # Klinik hastadan türetilir (WaitlistEntrySerializer.create)
+    tenant_create_field = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
+
+    def _offered_entry(self):
+        entry = self.get_object()
+        if entry.status != 'offered':
+            raise ValidationError('Bu kayıt için geçerli bir teklif yok.')
+        return entry
+
+    @action(detail=True, methods=['post'])
+    def accept(self, request, pk=None):
+        """Teklif edilen aralıkta randevu oluşturur."""
+        entry = self._offered_entry()
+        try:
+            appointment = accept_offer(entry)
+        except (OfferUnavailable, BookingConflict, QuotaExceeded) as exc:
+            raise ValidationError(str(exc))
+        send_appointment_confirmation(appointment)
+        return Response(self.get_serializer(entry).data)
+
+    @action(detail=True, methods=['post'])
+    def decline(self, request, pk=None):
+        """Teklifi reddeder; aralık sıradaki uygun kayda teklif edilir."""
+        entry = self._offered_entry()
+        try:
+            decline_offer(entry)
+        except OfferUnavailable as exc:
+            raise ValidationError(str(exc))
+        return Response(self.get_serializer(entry).data)
+
+
+def _stream_range_availability(header, days):
+    """Aralık yanıtını gün gün JSON parçaları halinde üretir."""
+    yield json.dumps(header, cls=DjangoJSONEncoder)[:-1] + ', "days": ['
+    for index, day in enumerate(days):
+        if index:
+            yield ', '
+        yield json.dumps(day, cls=DjangoJSONEncoder)
+    yield ']}'
+
 
 @api_view(['GET'])
+@conditional_get('appointment', 'dentist', 'patient', SCHEDULE_RESOURCE)
 def check_availability(request):
     """
-    Belirtilen tarihteki müsait ve dolu slotları döndürür.
+    Belirtilen tarihteki (veya tarih aralığındaki) müsait ve dolu slotları döndürür.
     
     Query Parameters:
         - date: YYYY-MM-DD formatında tarih
+        - start, end: (date yerine) YYYY-MM-DD formatında tarih aralığı,
+          en fazla MAX_RANGE_DAYS gün. Yanıt gün gün akış (stream) olarak döner.
         - dentist_id: (opsiyonel) Belirli bir hekim için kontrol
+        - clinic: (opsiyonel) Kliniğe bağlı kullanıcılar için otomatik uygulanır
+    
+    Slotlar hekimin haftalık takviminden (çalışma saatleri, molalar)
+    gelir; klinik tatillerinde ve hekimin izin günlerinde slot yoktur.
+    Takvimi tanımlanmamış hekimler 09:00 - 17:00 arası 30 dakikalık
+    slotlarla çalışır.
     
-    Çalışma saatleri: 09:00 - 17:00
-    Slot süresi: 30 dakika
+    Slotlar hekim bazında hesaplanır ('dentists' alanı; her hekimin o günkü
+    working_hours ve slot_minutes değerleriyle). Üst düzeydeki
+    available_slots/booked_slots klinik özetidir: o slotta çalışan en az
+    bir hekim boşsa slot müsait sayılır. Günün working_hours alanı ilk slot
+    başlangıcı ile son slot bitişidir; aralık modunda her günde ayrıca yer alır.
     """
     date_str = request.query_params.get('date')
+    start_str = request.query_params.get('start')
+    end_str = request.query_params.get('end')
     dentist_id = request.query_params.get('dentist_id')
+    range_mode = not date_str and (start_str or end_str)
     
-    if not date_str:
+    if range_mode:
+        if not (start_str and end_str):
+            return Response(
+                {'error': 'start ve end parametreleri birlikte gereklidir (YYYY-MM-DD formatında)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        date_str = start_str
+    elif not date_str:
         return Response(
             {'error': 'date parametresi gereklidir (YYYY-MM-DD formatında)'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
     try:
-        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        start_date = _parse_date(date_str)
+        end_date = _parse_date(end_str) if range_mode else start_date
     except ValueError:
         return Response(
             {'error': 'Geçersiz tarih formatı. YYYY-MM-DD formatını kullanın.'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Çalışma saatleri: 09:00 - 17:00
-    WORK_START_HOUR = 9
-    WORK_END_HOUR = 17
-    SLOT_DURATION_MINUTES = 30
-    
-    # Tüm slotları oluştur
-    all_slots = []
-    current_time = datetime.combine(target_date, datetime.min.time().replace(hour=WORK_START_HOUR))
-    end_time = datetime.combine(target_date, datetime.min.time().replace(hour=WORK_END_HOUR))
-    
-    while current_time < end_time:
-        slot_end = current_time + timedelta(minutes=SLOT_DURATION_MINUTES)
-        all_slots.append({
-            'start_time': current_time.strftime('%H:%M'),
-            'end_time': slot_end.strftime('%H:%M'),
-            'start_datetime': timezone.make_aware(current_time),
-            'end_datetime': timezone.make_aware(slot_end),
-        })
-        current_time = slot_end
-    
-    # Dolu randevuları getir
-    appointments_query = Appointment.objects.filter(
-        start_time__date=target_date,
-        status__in=['scheduled', 'confirmed']
+    if end_date < start_date:
+        return Response(
+            {'error': 'end tarihi start tarihinden önce olamaz.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        return Response(
+            {'error': f'Tarih aralığı en fazla {MAX_RANGE_DAYS} gün olabilir.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    clinic_id = get_request_clinic_id(request)
+    
+    # Hekimler (randevusu olmayanlar da müsaitlik haritasında yer alır)
+    dentists_query = Dentist.objects.for_clinic(clinic_id).filter(is_active=True)
+    
+    # Dolu randevuları getir (yarı açık aralık, indeks kullanılabilir)
+    range_start, range_end = day_range_bounds(start_date, end_date)
+    appointments_query = Appointment.objects.for_clinic(clinic_id).filter(
+        start_time__gte=range_start,
+        start_time__lt=range_end,
+        status__in=ACTIVE_STATUSES
     )
     
     if dentist_id:
+        dentists_query = dentists_query.filter(id=dentist_id)
         appointments_query = appointments_query.filter(dentist_id=dentist_id)
     
+    dentists = list(dentists_query.order_by('name').values_list('id', 'name', 'clinic_id'))
     booked_appointments = list(appointments_query.values(
         'id', 'dentist_id', 'dentist__name', 'patient__name',
-        'start_time', 'end_time', 'status', 'treatment_type'
+        'start_time', 'end_time', 'treatment_type'
     ))
+    schedules = get_schedules(clinic_id)
     
-    # Slotları müsait/dolu olarak işaretle
-    available_slots = []
-    booked_slots = []
+    if range_mode:
+        days = iter_range_availability(start_date, end_date, booked_appointments, dentists, schedules)
+        return StreamingHttpResponse(
+            _stream_range_availability({'start': start_str, 'end': end_str}, days),
+            content_type='application/json'
+        )
     
-    for slot in all_slots:
-        is_booked = False
-        booking_info = None
-        
-        for apt in booked_appointments:
-            apt_start = apt['start_time']
-            apt_end = apt['end_time']
-            
-            # Çakışma kontrolü
-            if (slot['start_datetime'] < apt_end and slot['end_datetime'] > apt_start):
-                is_booked = True
-                booking_info = {
-                    'appointment_id': apt['id'],
-                    'dentist_id': apt['dentist_id'],
-                    'dentist_name': apt['dentist__name'],
-                    'patient_name': apt['patient__name'],
-                    'treatment_type': apt['treatment_type'] or 'Belirtilmemiş',
-                }
-                break
-        
-        slot_data = {
-            'start_time': slot['start_time'],
-            'end_time': slot['end_time'],
-            'is_available': not is_booked,
-        }
-        
-        if is_booked:
-            slot_data['booking'] = booking_info
-            booked_slots.append(slot_data)
-        else:
-            available_slots.append(slot_data)
+    result = compute_availability(start_date, booked_appointments, dentists, schedules)
     
     return Response({
         'date': date_str,
-        'working_hours': {
-            'start': f"{WORK_START_HOUR:02d}:00",
-            'end': f"{WORK_END_HOUR:02d}:00",
-        },
-        'slot_duration_minutes': SLOT_DURATION_MINUTES,
-        'total_slots': len(all_slots),
-        'available_count': len(available_slots),
-        'booked_count': len(booked_slots),
-        'available_slots': available_slots,
-        'booked_slots': booked_slots,
+        'working_hours': working_hours(result),
+        **result,
     })
 
 
 @api_view(['GET'])
-def dashboard_stats(request):
+def next_available(request):
     """
-    Dashboard için özet istatistikler döndürür.
+    Eşleşen hekimler arasında en erken boş slotları döndürür.
+    
+    Query Parameters:
+        - duration: Tedavi süresi (dakika, varsayılan 30)
+        - specialty: (opsiyonel) Hekim uzmanlık alanı (büyük/küçük harf duyarsız)
+        - days: Aranacak gün sayısı (varsayılan NEXT_AVAILABLE_DAYS, en fazla MAX_RANGE_DAYS)
+        - limit: Döndürülecek slot sayısı (varsayılan NEXT_AVAILABLE_LIMIT)
+        - from: (opsiyonel) YYYY-MM-DD, aramanın başlayacağı gün; geçmiş
+          saatler hiçbir zaman önerilmez
+        - clinic: (opsiyonel) Kliniğe bağlı kullanıcılar için otomatik uygulanır
+    
+    Slotlar hekim takvimlerinden gelir (bkz. availability.find_next_available).
+    Randevular önce ilk NEXT_AVAILABLE_FIRST_WINDOW_DAYS gün için tek bir
+    aralık sorgusuyla okunur; çoğu aramada bu yeterlidir. Yeterli slot
+    bulunamazsa ufkun geri kalanı ikinci bir aralık sorgusuyla alınır.
     """
-    today = timezone.now().date()
+    params = request.query_params
+    try:
+        duration = int(params.get('duration', SLOT_DURATION_MINUTES))
+        days = int(params.get('days', NEXT_AVAILABLE_DAYS))
+        limit = int(params.get('limit', NEXT_AVAILABLE_LIMIT))
+        from_date = _parse_date(params['from']) if params.get('from') else None
+    except ValueError:
+        return Response(
+            {'error': 'duration, days ve limit tam sayı, from YYYY-MM-DD formatında olmalıdır.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not 5 <= duration <= 480:
+        return Response({'error': 'duration 5 ile 480 dakika arasında olmalıdır.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= days <= MAX_RANGE_DAYS:
+        return Response({'error': f'days 1 ile {MAX_RANGE_DAYS} arasında olmalıdır.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= limit <= MAX_NEXT_AVAILABLE_LIMIT:
+        return Response({'error': f'limit 1 ile {MAX_NEXT_AVAILABLE_LIMIT} arasında olmalıdır.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    now = timezone.now()
+    earliest = now
+    if from_date:
+        earliest = max(now, day_range_bounds(from_date, from_date)[0])
+    start_date = timezone.localtime(earliest).date()
+    end_date = start_date + timedelta(days=days - 1)
     
-    # Bugünkü randevular
-    today_appointments = Appointment.objects.filter(start_time__date=today)
+    clinic_id = get_request_clinic_id(request)
+    dentists_query = Dentist.objects.for_clinic(clinic_id).filter(is_active=True)
+    specialty = params.get('specialty')
+    if specialty:
+        dentists_query = dentists_query.filter(specialty__iexact=specialty)
+    dentists = list(dentists_query.order_by('name').values_list('id', 'name', 'clinic_id', 'specialty'))
     
-    stats = {
-        'total_clinics': Clinic.objects.count(),
-        'total_dentists': Dentist.objects.filter(is_active=True).count(),
-        'total_patients': Patient.objects.count(),
-        'today_appointments': today_appointments.count(),
-        'today_completed': today_appointments.filter(status='completed').count(),
-        'today_pending': today_appointments.filter(status__in=['scheduled', 'confirmed']).count(),
-        'today_cancelled': today_appointments.filter(status='cancelled').count(),
-    }
+    schedules = get_schedules(clinic_id)
+    first_end = min(end_date, start_date + timedelta(days=NEXT_AVAILABLE_FIRST_WINDOW_DAYS - 1))
+    windows = [(start_date, first_end)]
+    if first_end < end_date:
+        windows.append((first_end + timedelta(days=1), end_date))
     
-    return Response(stats)
+    slots = []
+    for window_start, window_end in windows:
+        if not dentists or len(slots) >= limit:
+            break
+        range_start, range_end = day_range_bounds(window_start, window_end)
+        bookings = list(Appointment.objects.filter(
+            dentist_id__in=[dentist[0] for dentist in dentists],
+            start_time__gte=range_start,
+            start_time__lt=range_end,
+            status__in=ACTIVE_STATUSES,
+        ).values('id', 'dentist_id', 'start_time', 'end_time'))
+        slots += find_next_available(
+            max(earliest, range_start), window_end, duration, bookings, dentists, schedules, limit - len(slots)
+        )
+    return Response({
+        'duration_minutes': duration,
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'slots': [
+            {
+                'dentist_id': dentist[0],
+                'dentist_name': dentist[1],
+                'specialty': dentist[3],
+                'date': timezone.localtime(start).date().isoformat(),
+                'start_time': timezone.localtime(start).isoformat(),
+                'end_time': timezone.localtime(end).isoformat(),
+            }
+            for dentist, start, end in slots
+        ],
+    })
+
+
+@api_view(['GET'])
+@conditional_get(*RESOURCES, daily=True)
+def dashboard_stats(request):
+    """
+    Dashboard için özet istatistikler döndürür.
+    
+    Query Parameters:
+        - clinic: (opsiyonel) Sadece bu klinik için istatistikler. Kliniğe
+          bağlı kullanıcılar için her zaman kendi klinikleri kullanılır.
+    
+    Sonuçlar klinik bazında, kaynak sürümleriyle birlikte önbelleğe alınır;
+    randevu/hekim/hasta değişikliklerinde sürüm ilerler (bkz. stats.py).
+    If-None-Match ile gelen istek değişiklik yoksa 304 alır (bkz. conditional.py).
+    """
+    return Response(get_dashboard_stats(get_request_clinic_id(request)))
+
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+@permission_classes([IsAuthenticated])
+def import_data(request, kind):
+    """
+    Başka bir sistemden hasta veya randevu aktarır (bkz. importer.py).
+
+    URL: /api/import/patients/ veya /api/import/appointments/
+
+    Form alanları:
+        - file: CSV, JSON dizisi veya JSON Lines dosyası
+        - type: (opsiyonel) csv | json; verilmezse dosya uzantısından anlaşılır
+        - dry_run: (opsiyonel) 1 ise sadece doğrulama yapılır, kayıt oluşturulmaz
+
+    Sadece kliniğe bağlı, giriş yapmış kullanıcılar aktarım yapabilir; kayıtlar
+    kullanıcının kliniğine eklenir (?clinic= yok sayılır). Kliniğe bağlı
+    olmayan yöneticiler `import_data` yönetim komutunu kullanır.
+    Yanıt: işlenen, oluşturulan, tekrar eden ve hatalı satır sayıları ile
+    satır numaralı hatalar.
+    """
+    if kind not in IMPORTERS:
+        return Response({'error': f'Geçersiz aktarım türü: {kind}'}, status=status.HTTP_404_NOT_FOUND)
+    clinic = request.user.clinic
+    if clinic is None:
+        return Response({'error': 'Aktarım için kliniğe bağlı bir kullanıcı gereklidir.'},
+                        status=status.HTTP_403_FORBIDDEN)
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'file alanı gereklidir.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    file_format = request.data.get('type') or upload.name.rsplit('.', 1)[-1].lower()
+    if file_format in ('jsonl', 'ndjson'):
+        file_format = 'json'
+    if file_format not in IMPORT_FORMATS:
+        return Response({'error': f"type şunlardan biri olmalıdır: {', '.join(IMPORT_FORMATS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result = import_records(
+            kind, clinic, open_records(upload.file, file_format),
+            dry_run=request.data.get('dry_run') in ('1', 'true'),
+        )
+    except (ValueError, UnicodeDecodeError) as exc:
+        return Response({'error': f'Dosya okunamadı: {exc}'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_changes(request):
+    """
+    Mobil uygulama için artımlı senkronizasyon (bkz. sync.py). Kimlik
+    doğrulaması gerektirir.
+
+    Query Parameters:
+        - cursor: Önceki senkron yanıtındaki (veya son işlenen parçadaki)
+          cursor değeri; verilmezse 0 (tüm veri)
+        - clinic: Kliniğe bağlı olmayan yöneticiler için klinik ID'si
+
+    Yanıt parça parça akış olarak döner: yalnızca imleçten sonra oluşturulan
+    veya değişen kayıtlar (alan listesi başlıkta, satırlar dizi olarak) ve
+    silinen kayıtların id'leri. reset=true ise istemci yerel veriyi silip
+    gelen veriyle yeniden kurmalıdır.
+    """
+    clinic_id = _bulk_scope_clinic_id(request, request.user)
+    if clinic_id is None:
+        return Response({'error': 'Geçerli bir klinik gereklidir (clinic parametresi).'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    cursor = request.query_params.get('cursor') or '0'
+    if not cursor.isdigit():
+        return Response({'error': 'cursor negatif olmayan bir tam sayı olmalıdır.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return StreamingHttpResponse(stream_sync(clinic_id, int(cursor)), content_type='application/json')
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """
+    İstek metrikleri, Prometheus metin formatında (bkz. profiling.py).
+    Sadece yöneticiler (is_staff) erişebilir; metrikler bu sürece aittir.
+    """
+    return HttpResponse(get_registry().render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _event_stream_scope(request):
+    """
+    Olay akışının klinik/hekim kapsamını döndürür: (clinic_id, dentist_id, hata).
+
+    Akış kimlik doğrulaması gerektirir. EventSource başlık gönderemediği
+    için token ?token= ile de verilebilir; oturum çereziyle giriş yapmış
+    kullanıcı da kabul edilir. Kliniğe bağlı kullanıcının kapsamı kendi
+    kliniğidir; ?clinic= sadece kliniğe bağlı olmayan yöneticiler içindir.
+    """
+    key = request.GET.get('token')
+    header = request.headers.get('Authorization', '').split()
+    if not key and len(header) == 2 and header[0] == 'Token':
+        key = header[1]
+    if key:
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(key)
+        except AuthenticationFailed as exc:
+            return None, None, (str(exc.detail), status.HTTP_401_UNAUTHORIZED)
+    else:
+        user = request.user
+        if not user.is_authenticated:
+            return None, None, ('Kimlik doğrulama gereklidir (token parametresi).', status.HTTP_401_UNAUTHORIZED)
+    clinic_id = _bulk_scope_clinic_id(request, user)
+    dentist_id = request.GET.get('dentist')
+    if clinic_id is None or (dentist_id and not dentist_id.isdigit()):
+        return None, None, ('Geçerli bir klinik gereklidir.', status.HTTP_400_BAD_REQUEST)
+    if dentist_id and not Dentist.objects.filter(id=dentist_id, clinic_id=clinic_id).exists():
+        return None, None, ('Hekim bu klinikte bulunamadı.', status.HTTP_404_NOT_FOUND)
+    return clinic_id, int(dentist_id) if dentist_id else None, None
+
+
+@require_GET
+async def appointment_events(request):
+    """
+    Randevu olaylarını Server-Sent Events olarak akıtır (bkz. events.py).
+
+    Query Parameters:
+        - token: Kullanıcı token'ı (Authorization başlığı veya oturum da
+          kabul edilir); kliniğe bağlı kullanıcılar için kapsam kendi
+          klinikleridir
+        - clinic: Kliniğe bağlı olmayan yöneticiler (is_staff) için klinik ID'si
+        - dentist: (opsiyonel) Sadece bu hekimin randevuları
+
+    Yeniden bağlanırken tarayıcının gönderdiği Last-Event-ID başlığıyla
+    kaçırılan olaylar tekrar gönderilir.
+    """
+    clinic_id, dentist_id, error = await sync_to_async(_event_stream_scope)(request)
+    if error:
+        return JsonResponse({'error': error[0]}, status=error[1])
+
+    broker = get_broker()
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if isinstance(request, ASGIRequest):
+        subscription = broker.subscribe(clinic_id, dentist_id, last_event_id, loop=asyncio.get_running_loop())
+        content = stream_events(broker, subscription)
+    else:
+        subscription = broker.subscribe(clinic_id, dentist_id, last_event_id)
+        content = stream_events_sync(broker, subscription)
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx gibi ters vekil sunucuların akışı tamponlamasını engeller
+    response['X-Accel-Buffering'] = 'no'
+    return response
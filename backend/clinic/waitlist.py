@@ -0,0 +1,347 @@
+"""
+Bekleme listesi ve boşalan slot eşleştirmesi.
+
+Aktif bir randevu iptal edildiğinde veya "gelmedi" olarak işaretlendiğinde
+boşalan aralık, commit sonrasında bekleme listesindeki uygun kayıtlara
+teklif edilir. Uygun kayıtlar (waiting, pencere boşalan aralıkla kesişiyor,
+hekim tercihi bu hekim veya boş) hekim ve pencere indeksleriyle bulunur
+(waitlist_dentist_window_idx, waitlist_clinic_window_idx); liste taranmaz.
+
+Toplu iptallerde (ör. hasta olan hekimin günü boşaltılır) slotlar
+collect_freed_slots() bloğunda biriktirilir ve hekim başına tek seferde
+eşleştirilir: ardışık slotlar birleştirilir, boşluğa hâlâ çakışan aktif
+randevular ve bekleyen teklifler çıkarılır, kayıtlar ekleniş sırasıyla
+(ilk gelen ilk alır) yerleştirilir.
+
+Teklif SMS'i gönderim kuyruğuna eklenir (utils.send_waitlist_offer).
+Hasta kabul ederse randevu booking.save_appointment ile oluşturulur.
+
+Teklifler OFFER_TTL içinde yanıtlanmazsa düşer: kayıt yeniden beklemeye
+alınır ve aralık sıradaki kayıtlara teklif edilir. Eşleştirme, boşluğa
+denk gelen süresi dolmuş teklifleri bu şekilde kendisi düşürür; diğerleri
+için expire_offers() düzenli çalıştırılır (expire_waitlist_offers komutu).
+"""
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .availability import ACTIVE_STATUSES
+from .booking import save_appointment
+from .models import Appointment, WaitlistEntry
+from .utils import send_waitlist_offer
+
+
+# Slotu boşaltan randevu durumları
+FREED_STATUSES = ('cancelled', 'no_show')
+
+# Başlamasına bundan az kalmış aralıklar teklif edilmez
+OFFER_MIN_NOTICE = timedelta(minutes=30)
+
+# Bu süre içinde yanıtlanmayan teklif düşer
+OFFER_TTL = timedelta(hours=2)
+
+# Teklif düşürülürken sıfırlanan alanlar
+_OFFER_RESET = {'status': 'waiting', 'offer_dentist': None, 'offer_start': None, 'offer_end': None, 'offered_at': None}
+
+FreedSlot = namedtuple('FreedSlot', 'clinic_id dentist_id dentist_name start end')
+
+
+class OfferUnavailable(Exception):
+    """Teklif artık yanıtlanamaz (süresi doldu veya teklif edilen hekim silindi)."""
+
+_batch = threading.local()
+
+
+# ============================================================================
+# BOŞALAN SLOTLAR
+# ============================================================================
+
+def appointment_saved(instance, previous):
+    """Aktif randevu iptal/gelmedi durumuna geçtiyse boşalan slotu eşleştirmeye gönderir."""
+    if previous is None or instance.status not in FREED_STATUSES:
+        return
+    if previous['status'] not in ACTIVE_STATUSES:
+        return
+    slot_freed(FreedSlot(
+        instance.clinic_id, instance.dentist_id, instance.dentist.name,
+        instance.start_time, instance.end_time,
+    ))
+
+
+def slot_freed(slot):
+    """
+    Slotu commit sonrasında eşleştirir. collect_freed_slots() bloğu içindeyse
+    blok sonunda diğer slotlarla birlikte eşleştirilir.
+    """
+    pending = getattr(_batch, 'slots', None)
+    if pending is not None:
+        pending.append(slot)
+    else:
+        transaction.on_commit(partial(match_freed_slots, [slot]))
+
+
+@contextmanager
+def collect_freed_slots():
+    """Blok içinde boşalan slotları biriktirip commit sonrasında tek seferde eşleştirir."""
+    previous = getattr(_batch, 'slots', None)
+    _batch.slots = slots = []
+    try:
+        yield slots
+    finally:
+        _batch.slots = previous
+    if slots:
+        transaction.on_commit(partial(match_freed_slots, slots))
+
+
+# ============================================================================
+# EŞLEŞTİRME
+# ============================================================================
+
+def _merge(intervals):
+    """Kesişen veya uç uca eklenen aralıkları birleştirir."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(interval) for interval in merged]
+
+
+def _subtract(gaps, busy_start, busy_end):
+    result = []
+    for start, end in gaps:
+        if busy_end <= start or busy_start >= end:
+            result.append((start, end))
+            continue
+        if start < busy_start:
+            result.append((start, busy_start))
+        if busy_end < end:
+            result.append((busy_end, end))
+    return result
+
+
+def _place(gaps, entry):
+    """
+    Kaydı penceresine ve süresine uyan ilk boşluğa yerleştirir; bulunan
+    aralık boşluk listesinden çıkarılır.
+
+    Returns:
+        (start, end) veya None
+    """
+    duration = timedelta(minutes=entry.duration_minutes)
+    for index, (gap_start, gap_end) in enumerate(gaps):
+        start = max(gap_start, entry.window_start)
+        end = start + duration
+        if end <= min(gap_end, entry.window_end):
+            gaps[index:index + 1] = _subtract([(gap_start, gap_end)], start, end)
+            return start, end
+    return None
+
+
+def candidate_entries(clinic_id, dentist_id, range_start, range_end, exclude_ids=()):
+    """[range_start, range_end) ile penceresi kesişen, bu hekime uygun bekleyen kayıtlar."""
+    entries = WaitlistEntry.objects.filter(
+        Q(dentist_id=dentist_id) | Q(clinic_id=clinic_id, dentist__isnull=True),
+        status='waiting',
+        window_start__lt=range_end,
+        window_end__gt=range_start,
+    )
+    if exclude_ids:
+        entries = entries.exclude(pk__in=exclude_ids)
+    return entries.select_related('patient').order_by('created_at', 'id')
+
+
+def _match_dentist(clinic_id, dentist_id, dentist_name, intervals, exclude_ids):
+    gaps = _merge(intervals)
+    range_start, range_end = gaps[0][0], gaps[-1][1]
+
+    # Bu arada dolan veya başka bir kayda teklif edilmiş aralıklar çıkarılır;
+    # süresi dolmuş teklifler aralığı tutmaz, düşürülür
+    now = timezone.now()
+    busy = list(Appointment.objects.filter(
+        dentist_id=dentist_id, status__in=ACTIVE_STATUSES,
+        start_time__lt=range_end, end_time__gt=range_start,
+    ).values_list('start_time', 'end_time'))
+    expired = []
+    for pk, offer_start, offer_end, offered_at in WaitlistEntry.objects.filter(
+        offer_dentist_id=dentist_id, status='offered',
+        offer_start__lt=range_end, offer_end__gt=range_start,
+    ).values_list('pk', 'offer_start', 'offer_end', 'offered_at'):
+        if offered_at <= now - OFFER_TTL:
+            expired.append(pk)
+        else:
+            busy.append((offer_start, offer_end))
+    if expired:
+        WaitlistEntry.objects.filter(pk__in=expired, status='offered').update(**_OFFER_RESET, updated_at=now)
+        # Yanıt vermeyen kayıtlara aynı aralık yeniden teklif edilmez
+        exclude_ids = [*exclude_ids, *expired]
+    for busy_start, busy_end in busy:
+        gaps = _subtract(gaps, busy_start, busy_end)
+    if not gaps:
+        return []
+
+    offered = []
+    for entry in candidate_entries(clinic_id, dentist_id, range_start, range_end, exclude_ids):
+        placed = _place(gaps, entry)
+        if placed is None:
+            continue
+        # Eşzamanlı bir eşleştirme kaydı almış olabilir: koşullu güncelleme
+        claimed = WaitlistEntry.objects.filter(pk=entry.pk, status='waiting').update(
+            status='offered', offer_dentist_id=dentist_id,
+            offer_start=placed[0], offer_end=placed[1], offered_at=now,
+        )
+        if not claimed:
+            gaps = _merge(gaps + [placed])
+            continue
+        entry.status, entry.offer_dentist_id, entry.offered_at = 'offered', dentist_id, now
+        entry.offer_start, entry.offer_end = placed
+        send_waitlist_offer(entry, dentist_name)
+        offered.append(entry)
+        if not gaps:
+            break
+    return offered
+
+
+def match_freed_slots(slots, exclude_ids=()):
+    """
+    Boşalan slotları bekleme listesindeki kayıtlara teklif eder.
+
+    Hekim başına üç sorgu çalışır (aktif randevular, bekleyen teklifler,
+    uygun kayıtlar); teklif edilen her kayıt için ayrıca bir güncelleme ve
+    kuyruğa bir SMS yazılır.
+
+    Args:
+        slots: FreedSlot listesi
+        exclude_ids: Teklif edilmeyecek kayıtlar (ör. teklifi reddeden)
+
+    Returns:
+        list: Teklif yapılan WaitlistEntry nesneleri
+    """
+    earliest = timezone.now() + OFFER_MIN_NOTICE
+    by_dentist = {}
+    for slot in slots:
+        start = max(slot.start, earliest)
+        if start < slot.end:
+            key = (slot.clinic_id, slot.dentist_id, slot.dentist_name)
+            by_dentist.setdefault(key, []).append((start, slot.end))
+
+    offered = []
+    for (clinic_id, dentist_id, dentist_name), intervals in by_dentist.items():
+        offered += _match_dentist(clinic_id, dentist_id, dentist_name, intervals, exclude_ids)
+    return offered
+
+
+# ============================================================================
+# TEKLİF YANITI
+# ============================================================================
+
+def _release_offer(entry, now, rematch=True):
+    """
+    Teklifi düşürür ve kaydı beklemeye alır; rematch verilirse aralık
+    (commit sonrası) diğer kayıtlara teklif edilir. Teklif bu arada
+    yanıtlandıysa hiçbir şey yapmaz.
+
+    Returns:
+        bool: Teklif düşürüldüyse True
+    """
+    released = WaitlistEntry.objects.filter(
+        pk=entry.pk, status='offered', offered_at=entry.offered_at,
+    ).update(**_OFFER_RESET, updated_at=now)
+    if not released:
+        return False
+    if rematch and entry.offer_dentist_id is not None:
+        slot = FreedSlot(
+            entry.clinic_id, entry.offer_dentist_id, entry.offer_dentist.name, entry.offer_start, entry.offer_end,
+        )
+        transaction.on_commit(partial(match_freed_slots, [slot], exclude_ids=[entry.pk]))
+    for field, value in _OFFER_RESET.items():
+        setattr(entry, field, value)
+    entry.updated_at = now
+    return True
+
+
+def _check_offer(entry):
+    """
+    Teklif yanıtlanabilir değilse düşürür ve OfferUnavailable verir.
+
+    Teklif edilen hekim silinmişse (offer_dentist SET_NULL) aralık yeniden
+    teklif edilemez; süresi dolmuş teklifin aralığı ise diğer kayıtlara geçer.
+    """
+    now = timezone.now()
+    if entry.offer_dentist_id is None:
+        _release_offer(entry, now, rematch=False)
+        raise OfferUnavailable('Teklif edilen hekim artık mevcut değil; kayıt yeniden beklemeye alındı.')
+    if entry.offered_at <= now - OFFER_TTL:
+        _release_offer(entry, now)
+        raise OfferUnavailable('Teklifin süresi doldu; kayıt yeniden beklemeye alındı.')
+
+
+def expire_offers():
+    """
+    Süresi dolmuş teklifleri düşürür; aralıkları (commit sonrası) hekim
+    başına tek seferde yeniden eşleştirilir. Yanıt vermeyen kayıtlara aynı
+    aralık yeniden teklif edilmez.
+
+    Returns:
+        int: Düşürülen teklif sayısı
+    """
+    now = timezone.now()
+    stale = WaitlistEntry.objects.filter(
+        status='offered', offered_at__lte=now - OFFER_TTL,
+    ).select_related('offer_dentist')
+    slots, expired = [], []
+    with transaction.atomic():
+        for entry in stale:
+            dentist, start, end = entry.offer_dentist, entry.offer_start, entry.offer_end
+            if not _release_offer(entry, now, rematch=False):
+                continue
+            expired.append(entry.pk)
+            if dentist is not None:
+                slots.append(FreedSlot(entry.clinic_id, dentist.id, dentist.name, start, end))
+        if slots:
+            transaction.on_commit(partial(match_freed_slots, slots, exclude_ids=expired))
+    return len(expired)
+
+
+def accept_offer(entry):
+    """
+    Teklifi kabul eder: teklif edilen aralıkta randevu oluşturur.
+
+    Raises:
+        OfferUnavailable: Teklifin süresi dolduysa veya hekim silindiyse
+        BookingConflict: Aralık bu arada dolduysa
+        QuotaExceeded: Kliniğin aylık kotası dolduysa
+    """
+    _check_offer(entry)
+    with transaction.atomic():
+        appointment = save_appointment(Appointment(
+            dentist_id=entry.offer_dentist_id,
+            patient_id=entry.patient_id,
+            start_time=entry.offer_start,
+            end_time=entry.offer_end,
+            treatment_type=entry.treatment_type,
+        ))
+        entry.status = 'booked'
+        entry.appointment = appointment
+        entry.save(update_fields=['status', 'appointment', 'updated_at'])
+    return appointment
+
+
+def decline_offer(entry):
+    """
+    Teklifi reddeder: kayıt yeniden beklemeye alınır ve aralık (commit
+    sonrası) diğer kayıtlara teklif edilir.
+
+    Raises:
+        OfferUnavailable: Teklifin süresi dolduysa veya hekim silindiyse
+    """
+    _check_offer(entry)
+    with transaction.atomic():
+        _release_offer(entry, timezone.now())
@@ -5,6 +5,13 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The appointment event stream (/api/events/, see clinic/events.py) is an async
+Server-Sent Events view; serve it through this application, e.g.
+
+    uvicorn config.asgi:application
+
+so that idle connections do not hold a worker thread each.
 """
 
 import os
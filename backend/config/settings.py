@@ -27,6 +27,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'clinic.profiling.RequestProfilingMiddleware',
+    'clinic.routers.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -60,24 +62,115 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database - PostgreSQL for production, SQLite for development
 USE_POSTGRES = os.environ.get('USE_POSTGRES', 'false').lower() == 'true'
 
+# Kalıcı bağlantılar: her istekte yeni bağlantı açılmaz. DB_POOL=true ile
+# bunun yerine psycopg 3 bağlantı havuzu kullanılır (havuz kalıcı
+# bağlantılarla birlikte kullanılamaz).
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_POOL = os.environ.get('DB_POOL', 'false').lower() == 'true'
+
 if USE_POSTGRES:
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.postgresql',
-            'NAME': os.environ.get('DB_NAME', 'dentcare'),
-            'USER': os.environ.get('DB_USER', 'postgres'),
-            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
-            'HOST': os.environ.get('DB_HOST', 'localhost'),
-            'PORT': os.environ.get('DB_PORT', '5432'),
-        }
+    _primary = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'dentcare'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
+    if DB_POOL:
+        _primary['OPTIONS'] = {'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        }}
+    DATABASES = {'default': _primary}
+    # Okuma replikaları: DB_REPLICA_HOSTS=host1,host2:5433 (bkz. clinic/routers.py)
+    for _index, _host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+        _host, _, _port = _host.strip().partition(':')
+        DATABASES[f'replica{_index}'] = {
+            **_primary, 'HOST': _host, 'PORT': _port or _primary['PORT'], 'TEST': {'MIRROR': 'default'},
+        }
+    DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
-        }
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        },
+        # SQLite'ta replikasyon yoktur: bu ikinci dosya sadece testlerde
+        # replika yerine kullanılır (DATABASE_REPLICAS boş olduğu sürece okunmaz).
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db_replica.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'TEST': {'NAME': BASE_DIR / 'test_db_replica.sqlite3'},
+        },
+    }
+    DATABASE_REPLICAS = []
+
+DATABASE_ROUTERS = ['clinic.routers.ReadReplicaRouter']
+
+# Yazan istemcinin okumalarının birincilde kalacağı süre (replika gecikmesinden uzun olmalı)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+# Cache - tek süreçli geliştirme için yerel bellek. Birden fazla worker ile
+# sinyal tabanlı geçersizleştirmenin tüm süreçlere ulaşması için paylaşımlı
+# bir önbellek (Redis/Memcached) kullanılmalıdır.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'dentcare-default'),
     }
+}
+
+# Dashboard istatistiklerinin önbellekte kalma süresi (saniye). Sinyaller
+# değişiklikte anahtarları zaten siler; bu süre sadece bir güvenlik sınırıdır.
+DASHBOARD_STATS_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_STATS_CACHE_TIMEOUT', 300))
+
+# SMS gönderim kuyruğu (bkz. clinic/messaging.py, send_sms_outbox komutu)
+SMS_GATEWAYS = {
+    'mock': 'clinic.messaging.MockGateway',
+}
+SMS_DEFAULT_PROVIDER = os.environ.get('SMS_DEFAULT_PROVIDER', 'mock')
+SMS_BATCH_SIZE = int(os.environ.get('SMS_BATCH_SIZE', 100))
+SMS_WORKER_THREADS = int(os.environ.get('SMS_WORKER_THREADS', 4))
+SMS_MAX_ATTEMPTS = int(os.environ.get('SMS_MAX_ATTEMPTS', 5))
+SMS_RETRY_BASE_SECONDS = int(os.environ.get('SMS_RETRY_BASE_SECONDS', 30))
+SMS_RETRY_MAX_SECONDS = int(os.environ.get('SMS_RETRY_MAX_SECONDS', 3600))
+SMS_SENDING_LEASE_SECONDS = int(os.environ.get('SMS_SENDING_LEASE_SECONDS', 300))
+
+# Randevu olaylarının panellere anlık iletimi (bkz. clinic/events.py). Birden
+# fazla worker ile tüm süreçlere ulaşması için RedisBroker kullanılmalıdır.
+PUSH_BROKER = os.environ.get('PUSH_BROKER', 'clinic.events.InMemoryBroker')
+PUSH_BROKER_URL = os.environ.get('PUSH_BROKER_URL', 'redis://localhost:6379/0')
+
+# Token kimlik doğrulama önbelleği (bkz. clinic/authentication.py)
+AUTH_TOKEN_CACHE = {
+    'MAX_SIZE': int(os.environ.get('AUTH_TOKEN_CACHE_MAX_SIZE', 10000)),
+    'TTL': int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 30)),
+    'SHARED': os.environ.get('AUTH_TOKEN_CACHE_SHARED', 'false').lower() == 'true',
+    'SHARED_TTL': int(os.environ.get('AUTH_TOKEN_CACHE_SHARED_TTL', 300)),
+}
+
+# Derlenmiş hekim takvimleri için süreç içi önbellek (bkz. clinic/schedules.py).
+# Anahtar, her istekte veritabanından (ResourceVersion) okunan takvim sürümüdür;
+# bu yüzden değişiklik tüm worker'larda bir sonraki istekte yansır. TTL, eski
+# sürümlerin bellekte kalma süresini sınırlar.
+SCHEDULE_CACHE = {
+    'MAX_SIZE': int(os.environ.get('SCHEDULE_CACHE_MAX_SIZE', 1000)),
+    'TTL': int(os.environ.get('SCHEDULE_CACHE_TTL', 600)),
+}
+
+# İstek profilleme ve /api/metrics/ (bkz. clinic/profiling.py). Toplam süre her
+# istekte, SQL/renderer ayrıntısı SAMPLE_RATE oranındaki isteklerde ölçülür.
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('REQUEST_PROFILING_ENABLED', 'true').lower() == 'true',
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', 0.05)),
+    'SLOW_REQUEST_MS': int(os.environ.get('REQUEST_PROFILING_SLOW_REQUEST_MS', 500)),
+    'MAX_CLINICS': int(os.environ.get('REQUEST_PROFILING_MAX_CLINICS', 200)),
+}
 
 # Custom User Model
 AUTH_USER_MODEL = 'clinic.ClinicUser'
@@ -104,7 +197,7 @@ CORS_ALLOW_ALL_ORIGINS = True  # Development only - restrict in production
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'clinic.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
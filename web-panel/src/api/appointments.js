@@ -35,6 +35,15 @@ export async function checkAvailability(date, dentistId = null) {
     return apiRequest(endpoint);
 }
 
+// Check Availability for a date range (week / month views, single request)
+export async function checkAvailabilityRange(start, end, dentistId = null) {
+    let endpoint = `/check-availability/?start=${start}&end=${end}`;
+    if (dentistId) {
+        endpoint += `&dentist_id=${dentistId}`;
+    }
+    return apiRequest(endpoint);
+}
+
 // Appointments
 export async function getAppointments(params = {}) {
     const queryParams = new URLSearchParams(params).toString();
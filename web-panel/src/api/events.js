@@ -0,0 +1,54 @@
+// Randevu olayları (Server-Sent Events) - bkz. backend/clinic/events.py
+const API_BASE_URL = 'http://localhost:8000/api';
+
+// Olay akışına bağlanır. Tarayıcı bağlantı koparsa Last-Event-ID ile
+// kendisi yeniden bağlanır; kaçırılan olaylar sunucudan tekrar gelir.
+// Dönen fonksiyon bağlantıyı kapatır.
+export function subscribeAppointmentEvents({ dentistId = null, onEvent, onResync }) {
+    const params = new URLSearchParams();
+    const token = localStorage.getItem('token');
+    if (token) {
+        params.set('token', token);
+    }
+    if (dentistId) {
+        params.set('dentist', dentistId);
+    }
+    const source = new EventSource(`${API_BASE_URL}/events/?${params.toString()}`);
+
+    source.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        if (event.type === 'resync') {
+            onResync?.();
+        } else {
+            onEvent?.(event);
+        }
+    };
+
+    return () => source.close();
+}
+
+const pad = (value) => String(value).padStart(2, '0');
+
+// ISO zaman damgasının yerel tarihini YYYY-MM-DD olarak döndürür
+export function localDate(isoString) {
+    const date = new Date(isoString);
+    return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())}`;
+}
+
+// Olay verilen günü (yeni veya eski haliyle) etkiliyor mu?
+export function eventTouchesDate(event, dateStr) {
+    return localDate(event.appointment.start_time) === dateStr
+        || (event.previous && localDate(event.previous.start_time) === dateStr);
+}
+
+// Bir günün randevu listesine olayı uygular (yeni liste döndürür)
+export function applyAppointmentEvent(appointments, event, dateStr) {
+    const delta = event.appointment;
+    const existing = appointments.find((apt) => apt.id === delta.id);
+    const rest = appointments.filter((apt) => apt.id !== delta.id);
+    if (event.type === 'appointment.deleted' || localDate(delta.start_time) !== dateStr) {
+        return rest;
+    }
+    return [...rest, { ...existing, ...delta }]
+        .sort((a, b) => new Date(a.start_time) - new Date(b.start_time));
+}
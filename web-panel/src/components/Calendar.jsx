@@ -1,5 +1,6 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { checkAvailability, getAppointments } from '../api/appointments';
+import { subscribeAppointmentEvents, eventTouchesDate, applyAppointmentEvent } from '../api/events';
 import AppointmentForm from './AppointmentForm';
 
 export default function Calendar() {
@@ -9,16 +10,51 @@ export default function Calendar() {
     const [loading, setLoading] = useState(true);
     const [showForm, setShowForm] = useState(false);
 
+    const selectedDateRef = useRef(selectedDate);
+
     useEffect(() => {
+        selectedDateRef.current = selectedDate;
         fetchData();
     }, [selectedDate]);
 
+    // Randevu değişiklikleri sunucudan anlık gelir; liste yerinde güncellenir,
+    // sadece görüntülenen günü etkileyen olaylarda slotlar yeniden alınır
+    useEffect(() => {
+        let availabilityTimer = null;
+        const unsubscribe = subscribeAppointmentEvents({
+            onEvent: (event) => {
+                const date = selectedDateRef.current;
+                if (!eventTouchesDate(event, date)) {
+                    return;
+                }
+                setAppointments((current) => applyAppointmentEvent(current, event, date));
+                // Art arda gelen olaylar tek istekte toplanır
+                clearTimeout(availabilityTimer);
+                availabilityTimer = setTimeout(refreshAvailability, 300);
+            },
+            onResync: () => fetchData(),
+        });
+        return () => {
+            clearTimeout(availabilityTimer);
+            unsubscribe();
+        };
+    }, []);
+
+    const refreshAvailability = async () => {
+        try {
+            setAvailability(await checkAvailability(selectedDateRef.current));
+        } catch (error) {
+            console.error('Availability fetch error:', error);
+        }
+    };
+
     const fetchData = async () => {
+        const date = selectedDateRef.current;
         setLoading(true);
         try {
             const [availData, apptData] = await Promise.all([
-                checkAvailability(selectedDate),
-                getAppointments({ date: selectedDate })
+                checkAvailability(date),
+                getAppointments({ date })
             ]);
             setAvailability(availData);
             setAppointments(apptData.results || []);
@@ -65,9 +101,9 @@ export default function Calendar() {
         setSelectedDate(current.toISOString().split('T')[0]);
     };
 
+    // Yeni randevu olay akışından gelir; yeniden yükleme gerekmez
     const handleAppointmentSuccess = () => {
         setShowForm(false);
-        fetchData();
     };
 
     return (
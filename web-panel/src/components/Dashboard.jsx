@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { subscribeAppointmentEvents, applyAppointmentEvent, localDate } from '../api/events';
 
 const API_BASE = 'http://localhost:8000/api';
 
@@ -11,29 +12,51 @@ export default function Dashboard() {
     const [todayAppointments, setTodayAppointments] = useState([]);
     const [loading, setLoading] = useState(true);
 
+    const fetchData = async () => {
+        try {
+            const token = localStorage.getItem('token');
+            const headers = token ? { 'Authorization': `Token ${token}` } : {};
+
+            // Fetch stats
+            const statsRes = await fetch(`${API_BASE}/dashboard-stats/`, { headers });
+            const statsData = await statsRes.json();
+            setStats(statsData);
+
+            // Fetch today's appointments
+            const today = localDate(new Date());
+            const apptRes = await fetch(`${API_BASE}/appointments/?date=${today}`, { headers });
+            const apptData = await apptRes.json();
+            setTodayAppointments(apptData.results || apptData || []);
+        } catch (error) {
+            console.error('Dashboard fetch error:', error);
+        } finally {
+            setLoading(false);
+        }
+    };
+
     useEffect(() => {
-        const fetchData = async () => {
-            try {
-                const token = localStorage.getItem('token');
-                const headers = token ? { 'Authorization': `Token ${token}` } : {};
-
-                // Fetch stats
-                const statsRes = await fetch(`${API_BASE}/dashboard-stats/`, { headers });
-                const statsData = await statsRes.json();
-                setStats(statsData);
-
-                // Fetch today's appointments
-                const today = new Date().toISOString().split('T')[0];
-                const apptRes = await fetch(`${API_BASE}/appointments/?date=${today}`, { headers });
-                const apptData = await apptRes.json();
-                setTodayAppointments(apptData.results || apptData || []);
-            } catch (error) {
-                console.error('Dashboard fetch error:', error);
-            } finally {
-                setLoading(false);
-            }
-        };
         fetchData();
+
+        // Bugünün randevuları ve sayacı olaylarla yerinde güncellenir
+        return subscribeAppointmentEvents({
+            onEvent: (event) => {
+                const today = localDate(new Date());
+                const isToday = event.type !== 'appointment.deleted'
+                    && localDate(event.appointment.start_time) === today;
+                const wasToday = event.type === 'appointment.deleted'
+                    ? localDate(event.appointment.start_time) === today
+                    : Boolean(event.previous) && localDate(event.previous.start_time) === today;
+                if (!isToday && !wasToday) {
+                    return;
+                }
+                setTodayAppointments((current) => applyAppointmentEvent(current, event, today));
+                setStats((current) => ({
+                    ...current,
+                    today_appointments: current.today_appointments + (isToday ? 1 : 0) - (wasToday ? 1 : 0),
+                }));
+            },
+            onResync: () => fetchData(),
+        });
     }, []);
 
     const handlePrint = () => {
@@ -24,15 +24,45 @@ export default function ReportsPage() {
         fetchDentists();
     }, []);
 
-    const handleDentistPDF = (dentist) => {
+    const handleDentistPDF = async (dentist) => {
         setSelectedDentist(dentist);
-        // In production: call API to generate PDF
-        alert(`PDF raporu: Dr. ${dentist.name}\n\n- Aylık hasta grafiği\n- Hastadan elde edilen kazanç\n- Randevu yoğunluğu\n- Toplam sayı dökümü\n\n(Backend entegrasyonu gerekli)`);
+        try {
+            const token = localStorage.getItem('token');
+            const headers = token ? { 'Authorization': `Token ${token}` } : {};
+            const res = await fetch(`${API_BASE}/dentists/${dentist.id}/report/?type=pdf`, { headers });
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            const blob = await res.blob();
+            const url = URL.createObjectURL(blob);
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = `hekim_raporu_${dentist.id}.pdf`;
+            link.click();
+            URL.revokeObjectURL(url);
+        } catch (error) {
+            console.error('Dentist report error:', error);
+            alert(`Dr. ${dentist.name} raporu indirilemedi.`);
+        } finally {
+            setSelectedDentist(null);
+        }
     };
 
     const handlePatientsExcel = async () => {
-        // In production: call API to generate Excel
-        alert('Hasta listesi Excel dosyası indirilecek.\n\n(Backend entegrasyonu gerekli)');
+        try {
+            const token = localStorage.getItem('token');
+            const headers = token ? { 'Authorization': `Token ${token}` } : {};
+            const res = await fetch(`${API_BASE}/patients/export/?type=xlsx`, { headers });
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            const blob = await res.blob();
+            const url = URL.createObjectURL(blob);
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = `hastalar_${new Date().toISOString().slice(0, 10)}.xlsx`;
+            link.click();
+            URL.revokeObjectURL(url);
+        } catch (error) {
+            console.error('Patients export error:', error);
+            alert('Hasta listesi indirilemedi.');
+        }
     };
 
     if (loading) {
@@ -81,7 +111,9 @@ export default function ReportsPage() {
                                         <span className="text-gray-400 text-sm">{index + 1}.</span>
                                         <span className="font-medium text-gray-900">Dr. {dentist.name}</span>
                                     </div>
-                                    <span className="text-blue-600 text-sm font-medium">PDF ↓</span>
+                                    <span className="text-blue-600 text-sm font-medium">
+                                        {selectedDentist?.id === dentist.id ? 'Hazırlanıyor...' : 'PDF ↓'}
+                                    </span>
                                 </button>
                             ))}
                         </div>
@@ -120,7 +152,7 @@ export default function ReportsPage() {
                     </div>
 
                     <div className="mt-4 p-3 bg-green-50 rounded-lg text-sm text-green-700">
-                        <strong>Excel içeriği:</strong> Ad, telefon, e-posta, kayıt tarihi, randevu sayısı
+                        <strong>Excel içeriği:</strong> Ad, telefon, e-posta, doğum tarihi, sağlık bilgileri, SMS izni, kayıt tarihi
                     </div>
                 </div>
             </div>